@@ -7,6 +7,7 @@ from app.core.config import settings
 from app.matrix.world_dna import WorldRegistry
 from app.core.schemas.world import SceneLayout
 from app.core.vertex_init import get_genai_client
+from app.core.services.semantic_cache import get_semantic_cache, scope_key
 
 class ArchitectAgent:
     """The Space Guardian agent responsible for environmental consistency."""
@@ -19,6 +20,7 @@ class ArchitectAgent:
         """
         self.client = get_genai_client()
         self.model_name = model_name
+        self.semantic_cache = get_semantic_cache("architect")
 
     def plan_scene_layout(self, script_intent: str, world_registry: WorldRegistry) -> SceneLayout:
         """Selects the best location and objects for a given narrative intent.
@@ -31,13 +33,8 @@ class ArchitectAgent:
             SceneLayout: Structured environmental setup.
         """
         
-        # 1. Prepare World Context
-        locations_info = []
-        for loc in world_registry.list_locations():
-            context = world_registry.get_location_context(loc.location_id)
-            locations_info.append(context)
-        
-        world_context = "\n\n".join(locations_info)
+        # 1. Prepare World Context (memoized by the registry)
+        world_context = world_registry.get_world_context()
 
         # 2. Construct Prompt
         prompt = f"""
@@ -55,6 +52,14 @@ class ArchitectAgent:
         Output a JSON object matching the SceneLayout schema.
         """
 
+        if self.semantic_cache is None:
+            return self._generate_layout(prompt)
+        # Same world DNA + a near-identical intent -> same layout
+        return self.semantic_cache.get_or_compute(
+            script_intent, scope_key(self.model_name, world_context), lambda: self._generate_layout(prompt)
+        )
+
+    def _generate_layout(self, prompt: str) -> SceneLayout:
         response = self.client.models.generate_content(
             model=self.model_name,
             contents=[
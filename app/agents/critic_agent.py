@@ -1,11 +1,13 @@
 """CriticAgent for visual consistency and quality assurance (v3)."""
 
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import List, Optional, Dict, Any
 import google.genai as genai
 from google.genai import types
 from app.core.config import settings
-from app.core.schemas.qa import QAReport, QAFailure, ConsistencyReport
+from app.core.schemas.qa import QAReport, QAFailure, ConsistencyReport, ImageArtifacts, AreaDetection
 from app.core.utils.visual_comparison import VisualComparator
 from app.state.db_access import StateManager
 from app.core.vertex_init import get_genai_client
@@ -25,6 +27,7 @@ class CriticAgent:
         # Seuil critique : 0.75 de similarité cosinus (Règle des 2% de déviation)
         self.identity_threshold = 0.75
         self.quality_threshold = 0.85 # VideoScore2 Threshold
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="critic")
 
     def verify_consistency(
         self,
@@ -32,26 +35,66 @@ class CriticAgent:
         reference_face_bytes: bytes,
         criteria: str = "visual identity, colors, and spatial continuity"
     ) -> QAReport:
-        """Comprehensive audit of the generated image vs Signature Assets."""
-        self.state_manager.publish_event("CRITIC_AUDIT", "Performing biometric identity check...")
-        
-        failures = []
-        semantic_score = 1.0 # Default if not using CLIP yet
+        """Comprehensive audit of the generated image vs Signature Assets.
+
+        The Gemini artifact call and the vitrine events run on the Critic's
+        thread pool while the local face comparison runs on the caller's
+        thread; events never block or fail the audit.
+        """
+        events = [self._executor.submit(self._publish, "CRITIC_AUDIT", "Performing biometric identity check...")]
+        artifacts = self._executor.submit(self.detect_physical_artifacts, generated_image_bytes)
 
         # 1. Biometric Analysis (Identity Drift)
-        drift_score = self.comparator.calculate_face_similarity(
-            generated_image_bytes, 
-            reference_face_bytes
-        )
-        
-        self.state_manager.publish_event("CRITIC_SCORE", f"Identity Similarity Score: {drift_score:.4f}", {"score": drift_score})
-        
+        try:
+            drift_score = self.comparator.calculate_face_similarity(generated_image_bytes, reference_face_bytes)
+        except BaseException:
+            artifacts.cancel()
+            raise
+        events.append(self._executor.submit(
+            self._publish, "CRITIC_SCORE", f"Identity Similarity Score: {drift_score:.4f}", {"score": drift_score}
+        ))
+
         # 2. Artifact Detection (v2 Expansion)
-        artifact_report = self.detect_physical_artifacts(generated_image_bytes)
-        if artifact_report:
-            failures.extend(artifact_report)
+        failures = list(artifacts.result() or [])
+        wait(events)
+        return self._build_report(drift_score, failures)
 
-        # 3. Decision Logic (2% rule equivalent - simplified)
+    async def verify_consistency_async(
+        self,
+        generated_image_bytes: bytes,
+        reference_face_bytes: bytes,
+        criteria: str = "visual identity, colors, and spatial continuity"
+    ) -> QAReport:
+        """Same audit for callers on the event loop (runs in a worker thread)."""
+        return await asyncio.to_thread(self.verify_consistency, generated_image_bytes, reference_face_bytes, criteria)
+
+    async def verify_batch(self, images: List[bytes], reference_face_bytes: bytes) -> List[QAReport]:
+        """Audits several candidates (e.g. Best-of-N renders) at once.
+
+        Biometric checks run concurrently and artifact detection is a single
+        batched Gemini call. Returns one QAReport per image, in order.
+        """
+        if not images:
+            return []
+        artifacts = asyncio.create_task(asyncio.to_thread(self.detect_physical_artifacts_batch, images))
+        try:
+            drift_scores = await asyncio.gather(*(
+                asyncio.to_thread(self.comparator.calculate_face_similarity, image, reference_face_bytes)
+                for image in images
+            ))
+        except BaseException:
+            artifacts.cancel()
+            raise
+        failures = await artifacts
+        await asyncio.to_thread(
+            self._publish, "CRITIC_SCORE", f"Batch audit of {len(images)} candidates",
+            {"scores": [round(s, 4) for s in drift_scores]}
+        )
+        return [self._build_report(score, list(f)) for score, f in zip(drift_scores, failures)]
+
+    def _build_report(self, drift_score: float, failures: List[QAFailure]) -> QAReport:
+        """Decision Logic (2% rule equivalent - simplified)."""
+        semantic_score = 1.0 # Default if not using CLIP yet
         is_consistent = drift_score >= self.identity_threshold and not any(f.severity > 0.8 for f in failures)
 
         if not is_consistent and drift_score < self.identity_threshold:
@@ -73,6 +116,19 @@ class CriticAgent:
             final_decision=decision
         )
 
+    def _publish(self, event_type: str, message: str, metadata: Optional[dict] = None) -> None:
+        try:
+            self.state_manager.publish_event(event_type, message, metadata)
+        except Exception as e:
+            logger.warning(f"CRITIC: Failed to publish {event_type} event: {e}")
+
+    def score_identity_batch(self, images: List[bytes], reference_face_bytes: bytes) -> List[float]:
+        """Structural similarity (MS-SSIM by default) of many candidates to the reference, in one vectorized pass.
+
+        Used to rank Best-of-N keyframes; the reference is featurized once.
+        """
+        return self.comparator.rank_renders(images, reference_face_bytes)
+
     def detect_mask_area(self, image_bytes: bytes, feature_description: str) -> Optional[List[int]]:
         """Detects the bounding box of a specific feature for masking."""
         prompt = f"Detect the bounding box for: {feature_description}. Return JSON box_2d [ymin, xmin, ymax, xmax] 0-1000."
@@ -99,6 +155,52 @@ class CriticAgent:
         )
         return response.parsed.box_2d
 
+    def detect_mask_areas(self, image_bytes: bytes, feature_descriptions: List[str]) -> List[Optional[List[int]]]:
+        """Detects the bounding boxes of several features in one Gemini call.
+
+        Returns one box (or None) per description, in order. Areas the
+        batched answer does not cover are detected individually.
+        """
+        areas = "\n".join(f"{i}. {d}" for i, d in enumerate(feature_descriptions))
+        prompt = (
+            f"Detect the bounding box of each of these {len(feature_descriptions)} areas:\n{areas}\n"
+            "Return a JSON list with one entry per area: area_index (0-based) and "
+            "box_2d [ymin, xmin, ymax, xmax] 0-1000 (null if the area is not visible)."
+        )
+
+        results: List[Optional[List[int]]] = [None] * len(feature_descriptions)
+        covered = set()
+        try:
+            response = self.client.models.generate_content(
+                model=self.model_name,
+                contents=[
+                    types.Content(
+                        role="user",
+                        parts=[
+                            types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg"),
+                            types.Part.from_text(text=prompt)
+                        ]
+                    )
+                ],
+                config=types.GenerateContentConfig(
+                    response_mime_type="application/json",
+                    response_schema=List[AreaDetection]
+                )
+            )
+            for entry in response.parsed or []:
+                if 0 <= entry.area_index < len(results):
+                    results[entry.area_index] = entry.box_2d
+                    covered.add(entry.area_index)
+        except Exception as e:
+            logger.error(f"CRITIC: Batched mask detection failed: {e}")
+
+        missing = [i for i in range(len(results)) if i not in covered]
+        if missing:
+            logger.warning(f"CRITIC: Batched mask detection missed {len(missing)} area(s), detecting them individually.")
+            for i in missing:
+                results[i] = self.detect_mask_area(image_bytes, feature_descriptions[i])
+        return results
+
     def detect_physical_artifacts(self, image_bytes: bytes) -> List[QAFailure]:
         """Uses Gemini Vision to detect distorted limbs, shadows, or anatomy anomalies."""
         logger.info("CRITIC: Analyzing image for physical artifacts (Hands, Shadows, Anatomy)...")
@@ -143,6 +245,56 @@ class CriticAgent:
             logger.error(f"CRITIC: Artifact detection failed: {e}")
             return []
 
+    def detect_physical_artifacts_batch(self, images: List[bytes], max_batch: int = 8) -> List[List[QAFailure]]:
+        """Artifact detection for several images, `max_batch` images per Gemini call.
+
+        Images the batched answer does not cover are re-audited individually.
+        """
+        results: List[Optional[List[QAFailure]]] = [None] * len(images)
+        for start in range(0, len(images), max_batch):
+            chunk = images[start:start + max_batch]
+            for entry in self._detect_artifacts_chunk(chunk):
+                if 0 <= entry.image_index < len(chunk):
+                    results[start + entry.image_index] = entry.failures
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            logger.warning(f"CRITIC: Batched audit missed {len(missing)} image(s), auditing them individually.")
+            for i in missing:
+                results[i] = self.detect_physical_artifacts(images[i])
+        return results
+
+    def _detect_artifacts_chunk(self, images: List[bytes]) -> List[ImageArtifacts]:
+        logger.info(f"CRITIC: Analyzing {len(images)} images for physical artifacts in one call...")
+        parts = []
+        for i, image in enumerate(images):
+            parts.append(types.Part.from_text(text=f"Image {i}:"))
+            parts.append(types.Part.from_bytes(data=image, mime_type="image/jpeg"))
+        parts.append(types.Part.from_text(text=f"""
+        Analyze each of the {len(images)} AI-generated images above for physical and anatomical artifacts
+        (extra fingers or distorted hands, missing or impossible shadows, floating objects or detached
+        limbs, blurry face or identity inconsistencies).
+
+        Return a JSON list with one entry per image:
+        - image_index: the image number (0-based).
+        - failures: QAFailure objects (area, severity 0.0-1.0, description,
+          action_type 'inpaint' or 'regenerate'); an empty list if the image is clean.
+        """))
+
+        try:
+            response = self.client.models.generate_content(
+                model="gemini-3-flash-preview",
+                contents=[types.Content(role="user", parts=parts)],
+                config=types.GenerateContentConfig(
+                    response_mime_type="application/json",
+                    response_schema=List[ImageArtifacts]
+                )
+            )
+            return response.parsed or []
+        except Exception as e:
+            logger.error(f"CRITIC: Batched artifact detection failed: {e}")
+            return []
+
 
     def verify_vocal_consistency(self, audio_bytes: bytes, vocal_anchor_bytes: bytes) -> float:
         """Audits the generated audio against the Muse's vocal anchor using Gemini."""
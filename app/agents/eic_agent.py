@@ -1,9 +1,11 @@
 """Editor-in-Chief (EIC) agent for staging and final routing of content."""
 
+import hashlib
 import logging
 from typing import Dict, Any
 from app.matrix.assets_manager import SignatureAssetsManager
 from app.core.config import settings
+from app.core.utils.perceptual_hash import get_render_hash_index
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,7 @@ class EICAgent:
 
     def __init__(self):
         self.assets_manager = SignatureAssetsManager(bucket_name=settings.GCS_BUCKET_NAME)
+        self.render_index = get_render_hash_index()
 
     def stage_for_review(self, production_data: Dict[str, Any], subject_id: str) -> str:
         """Stages the generated assets in a specific review folder in GCS.
@@ -21,8 +24,23 @@ class EICAgent:
             subject_id: The ID of the Muse.
             
         Returns:
-            str: The base GCS path where assets are staged.
+            str: The base GCS path where assets are staged (or, when the exact
+                same production was already staged, its existing path).
         """
+        poster_hash = self.render_index.fingerprint(production_data["poster_image_bytes"])
+        content_digest = self._content_digest(production_data)
+        near_duplicate_of = None
+        if poster_hash is not None and settings.PHASH_SKIP_DUPLICATE_STAGING:
+            duplicates = [entry for entry, _ in self.render_index.find(subject_id, labels=("staged",), value=poster_hash)]
+            for entry in duplicates:
+                if entry.metadata.get("content_digest") == content_digest:
+                    logger.info(f"EIC: Production already staged at {entry.metadata['review_path']}. Skipping staging.")
+                    return entry.metadata["review_path"]
+            if duplicates:
+                # Same-looking poster but new video/copy: stage it, flagged for the reviewer
+                near_duplicate_of = duplicates[0].metadata["review_path"]
+                logger.info(f"EIC: Poster is a near-duplicate of {near_duplicate_of}. Staging with a flag.")
+
         import uuid
         review_id = str(uuid.uuid4())[:8]
         base_path = f"reviews/{subject_id}/{review_id}"
@@ -51,10 +69,25 @@ class EICAgent:
             "title": production_data["title"],
             "caption": production_data["caption"]
         }
+        if near_duplicate_of is not None:
+            meta_data["near_duplicate_of"] = near_duplicate_of
         self.assets_manager.upload_asset(
             f"{base_path}/metadata.json",
             json.dumps(meta_data).encode("utf-8"),
             metadata={"type": "review_metadata"}
         )
-        
+
+        if poster_hash is not None:
+            self.render_index.add(
+                subject_id, None, "staged",
+                {"review_path": base_path, "content_digest": content_digest}, value=poster_hash
+            )
         return base_path
+
+    @staticmethod
+    def _content_digest(production_data: Dict[str, Any]) -> str:
+        """Digest of the video, title and caption (the poster is compared perceptually)."""
+        digest = hashlib.sha256(production_data["video_bytes"])
+        for field in ("title", "caption"):
+            digest.update(b"\0" + production_data[field].encode("utf-8"))
+        return digest.hexdigest()
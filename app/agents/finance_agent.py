@@ -2,12 +2,15 @@
 
 import logging
 import datetime
-from typing import List, Dict, Any
+import math
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
 import google.genai as genai
 from google.genai import types
 from pydantic import BaseModel, Field
 from app.core.config import settings
-from app.core.schemas.finance import Transaction, TransactionType, TransactionCategory, SolvencyCheck
+from app.core.schemas.finance import Transaction, TransactionType, TransactionCategory, SolvencyCheck, BudgetHold
 from app.state.models import Wallet
 from app.core.services.ledger_service import LedgerService
 from app.core.finance.cost_calculator import CostCalculator
@@ -31,6 +34,8 @@ class CFOAgent:
     unauthorized or risky productions.
     """
 
+    MAX_CACHED_DECISIONS = 1024
+
     def __init__(self, model_name: str = "gemini-3-flash-preview"):
         """Initializes the CFOAgent.
         
@@ -45,26 +50,75 @@ class CFOAgent:
         # Circuit Breaker: Max spend allowed per hour (Internal USD)
         self.SPEND_LIMIT_PER_HOUR = 5.0
 
-    def verify_solvency(self, wallet: Wallet, history: List[Transaction], estimated_cost: float) -> SolvencyCheck:
-        """Verifies solvency before any action (Hard Constraint)."""
+        # Borderline LLM decisions per (wallet, balance bucket, cost bucket)
+        self._decisions: Dict[Tuple[str, int, int], Tuple[float, SolvencyCheck]] = {}
+        self._decisions_lock = threading.Lock()
+        self.metrics: Dict[str, int] = {"fast_approved": 0, "fast_denied": 0, "cache_hits": 0, "llm_calls": 0}
+
+    def verify_solvency(
+        self,
+        wallet: Wallet,
+        history: Optional[List[Transaction]],
+        estimated_cost: float,
+        hourly_spend: Optional[float] = None
+    ) -> SolvencyCheck:
+        """Verifies solvency before any action (Hard Constraint).
+
+        Args:
+            wallet: The wallet, with `daily_spend` and `held_usd` filled in
+                (LedgerService.get_wallet). Outstanding holds of in-flight
+                productions count as already spent.
+            history: Recent transactions to derive the hourly spend from. Pass
+                None to read the ledger's windowed spend counters instead.
+            estimated_cost: Cost of the action to authorize.
+            hourly_spend: Spend of the trailing hour, when already known.
+        """
         self.ledger_service.state_manager.publish_event("CFO_AUDIT", f"Analyzing solvency for production (Cost: {estimated_cost} USD)")
         
         # 1. Circuit Breaker Calculation (Spend in the last hour)
-        one_hour_ago = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)
-        recent_spend = sum(tx.amount for tx in history 
-                          if tx.timestamp > one_hour_ago and tx.type == TransactionType.EXPENSE)
+        if hourly_spend is not None:
+            recent_spend = hourly_spend
+        elif history is None:
+            recent_spend = self.ledger_service.get_hourly_spend(wallet.address)
+        else:
+            one_hour_ago = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)
+            recent_spend = sum(tx.amount for tx in history 
+                              if tx.timestamp > one_hour_ago and tx.type == TransactionType.EXPENSE)
         
-        if (recent_spend + estimated_cost) > self.SPEND_LIMIT_PER_HOUR:
+        committed_cost = wallet.held_usd + estimated_cost
+        if (recent_spend + committed_cost) > self.SPEND_LIMIT_PER_HOUR:
             self.ledger_service.state_manager.publish_event("CIRCUIT_BREAKER", "Hourly limit exceeded. Blocking production.")
             return SolvencyCheck(
                 is_authorized=False,
-                projected_balance=wallet.internal_usd_balance - estimated_cost,
-                reasoning=f"CIRCUIT BREAKER ACTIVE: Hourly spend rate ({recent_spend + estimated_cost:.2f}) exceeds safety limit ({self.SPEND_LIMIT_PER_HOUR}).",
+                projected_balance=wallet.internal_usd_balance - committed_cost,
+                reasoning=f"CIRCUIT BREAKER ACTIVE: Hourly spend rate ({recent_spend + committed_cost:.2f}) exceeds safety limit ({self.SPEND_LIMIT_PER_HOUR}).",
                 circuit_breaker_active=True
             )
 
+        # 1b. Daily Budget (spend since 00:00 UTC)
+        if (wallet.daily_spend + committed_cost) > wallet.daily_budget:
+            self.ledger_service.state_manager.publish_event("DAILY_BUDGET", "Daily budget exceeded. Blocking production.")
+            return SolvencyCheck(
+                is_authorized=False,
+                projected_balance=wallet.internal_usd_balance - committed_cost,
+                reasoning=f"DAILY BUDGET EXCEEDED: Today's spend ({wallet.daily_spend + committed_cost:.2f}) exceeds the daily budget ({wallet.daily_budget})."
+            )
+
+        # 2. Deterministic fast path for the clear cases
+        available = wallet.internal_usd_balance - wallet.held_usd
+        projected = available - estimated_cost
+        fast = self._fast_decision(available, estimated_cost)
+        if fast is not None:
+            return fast
+
+        # 3. LLM Reasoning for borderline cases (decisions cached per wallet and balance/cost bucket)
+        cache_key = (wallet.address, self._bucket(available), self._bucket(estimated_cost))
+        decision = self._cached_decision(cache_key)
+        if decision is not None:
+            self._count("cache_hits")
+            # Buckets are ~10% wide: re-check the hard constraint on this exact projection
+            return self._enforce_constitution(decision.model_copy(update={"projected_balance": projected}))
 
-        # 2. LLM Reasoning for Strategic Decision
         prompt = f"""
         You are the CFO Agent (Risk Officer) for the Muse.
         
@@ -75,8 +129,9 @@ class CFOAgent:
         
         FINANCIAL STATE:
         - Current Internal USD Balance: {wallet.internal_usd_balance}
+        - Held by In-Flight Productions: {wallet.held_usd}
         - Estimated Cost of Action: {estimated_cost}
-        - Projected Balance: {wallet.internal_usd_balance - estimated_cost}
+        - Projected Balance: {projected}
         
         Decide if this production is authorized.
         """
@@ -94,16 +149,88 @@ class CFOAgent:
                 response_schema=SolvencyCheck
             )
         )
+        self._count("llm_calls")
         
         decision = response.parsed
         
-        # 3. Hard Constraint Enforcement (Safety Lock in Code)
-        if (wallet.internal_usd_balance - estimated_cost) < 0:
+        # 4. Hard Constraint Enforcement (Safety Lock in Code)
+        if projected < 0:
+            decision.is_authorized = False
+            decision.reasoning = "CONSTITUTIONAL PROHIBITION: Insufficient projected balance."
+
+        self._store_decision(cache_key, decision)
+        return decision
+
+    @staticmethod
+    def _enforce_constitution(decision: SolvencyCheck) -> SolvencyCheck:
+        """Denies any decision whose projected balance is negative."""
+        if decision.projected_balance < 0:
             decision.is_authorized = False
             decision.reasoning = "CONSTITUTIONAL PROHIBITION: Insufficient projected balance."
-            
         return decision
 
+    def _count(self, metric: str) -> None:
+        with self._decisions_lock:
+            self.metrics[metric] += 1
+
+    def _fast_decision(self, balance: float, estimated_cost: float) -> Optional[SolvencyCheck]:
+        """Decides clear-cut cases locally; None means borderline (ask the LLM).
+
+        Rules:
+        - Negative projected balance: always prohibited (the constitution).
+        - Cost within CFO_FAST_APPROVE_MAX_COST_RATIO of the balance, leaving
+          at least CFO_FAST_APPROVE_MIN_RESERVE: approved.
+        """
+        if not settings.CFO_FAST_PATH_ENABLED:
+            return None
+        projected = balance - estimated_cost
+        if projected < 0:
+            self._count("fast_denied")
+            return SolvencyCheck(
+                is_authorized=False,
+                projected_balance=projected,
+                reasoning="CONSTITUTIONAL PROHIBITION: Insufficient projected balance."
+            )
+        if (estimated_cost <= balance * settings.CFO_FAST_APPROVE_MAX_COST_RATIO
+                and projected >= settings.CFO_FAST_APPROVE_MIN_RESERVE):
+            self._count("fast_approved")
+            return SolvencyCheck(
+                is_authorized=True,
+                projected_balance=projected,
+                reasoning=f"FAST PATH: Cost ({estimated_cost:.2f}) is a minor share of the balance ({balance:.2f})."
+            )
+        return None
+
+    @staticmethod
+    def _bucket(value: float) -> int:
+        """Logarithmic bucket (~10% wide) of a non-negative amount."""
+        if value <= 0:
+            return -10**6
+        return math.floor(math.log(value, 1.1))
+
+    def _cached_decision(self, key: Tuple[str, int, int]) -> Optional[SolvencyCheck]:
+        with self._decisions_lock:
+            entry = self._decisions.get(key)
+            if entry is None:
+                return None
+            expires_at, decision = entry
+            if expires_at < time.monotonic():
+                del self._decisions[key]
+                return None
+            return decision
+
+    def _store_decision(self, key: Tuple[str, int, int], decision: SolvencyCheck) -> None:
+        ttl = settings.CFO_DECISION_CACHE_TTL_SECONDS
+        if ttl <= 0 or not isinstance(decision, SolvencyCheck):
+            return
+        with self._decisions_lock:
+            if len(self._decisions) >= self.MAX_CACHED_DECISIONS:
+                now = time.monotonic()
+                self._decisions = {k: v for k, v in self._decisions.items() if v[0] >= now}
+                if len(self._decisions) >= self.MAX_CACHED_DECISIONS:
+                    self._decisions.clear()
+            self._decisions[key] = (time.monotonic() + ttl, decision.model_copy())
+
     def allocate_compute_burst(self, vvs_score: float) -> int:
         """Dynamically determines the N-sampling depth (Best-of-N) based on VVS.
         
@@ -120,30 +247,45 @@ class CFOAgent:
         if vvs_score > 60: return 2
         return 1
 
-    def settle_production_cost(self, cost_estimate: float, task_id: str) -> Transaction:
+    def allocate_tournament(self, vvs_score: float) -> Tuple[int, int]:
+        """Sizes a tournament Best-of-N: N keyframes, k promoted to video.
 
-        """Records a production expense in the ledger."""
+        Governance Rule:
+        - N follows allocate_compute_burst (keyframes are cheap).
+        - k = ceil(N / 4): the expensive video stage runs for at most a
+          quarter of the candidates (10 -> 3, 5 -> 2, 2 -> 1).
+        """
+        n = self.allocate_compute_burst(vvs_score)
+        k = max(1, math.ceil(n / 4))
+        logger.info(f"CFO_BURST: Tournament allocation N={n} keyframes, k={k} videos")
+        return n, k
+
+    def reserve_production_cost(self, cost_estimate: float, task_id: str) -> Optional[BudgetHold]:
+        """Holds the estimated cost of a production at admission (None if unaffordable)."""
+        return self.ledger_service.place_hold("main-wallet", cost_estimate, hold_id=task_id)
+
+    def settle_production_cost(self, cost_estimate: float, task_id: str) -> Transaction:
+        """Records a production expense in the ledger, settling the task's hold if any."""
         tx = self.ledger_service.record_transaction(
             wallet_address="main-wallet",
             amount=cost_estimate,
             tx_type=TransactionType.EXPENSE,
             category=TransactionCategory.API_COST,
-            description=f"Production cost settlement for task: {task_id}"
+            description=f"Production cost settlement for task: {task_id}",
+            hold_id=task_id
         )
         self.ledger_service.state_manager.publish_event("CFO_SETTLEMENT", f"Deducted {cost_estimate} USD for task {task_id}.")
         return tx
 
-    def rollback_production_cost(self, amount: float, task_id: str) -> Transaction:
-        """Refunds the wallet if a production task fails (Financial Safety)."""
-        logger.warning(f"FINANCE_ROLLBACK: Refunding {amount} USD for failed task {task_id}.")
-        self.ledger_service.state_manager.publish_event("CFO_ROLLBACK", f"Refunded {amount} USD due to failure in {task_id}.")
-        return self.ledger_service.record_transaction(
-            wallet_address="main-wallet",
-            amount=amount,
-            tx_type=TransactionType.INCOME, # Refund is income/re-credit
-            category=TransactionCategory.OTHER,
-            description=f"REFUND: Failed production rollback for {task_id}"
-        )
+    def rollback_production_cost(self, amount: float, task_id: str) -> bool:
+        """Releases the hold of a failed production task (Financial Safety).
+
+        Nothing was debited yet, so no refund transaction is needed. Returns
+        False if the hold had already been settled, released or expired.
+        """
+        logger.warning(f"FINANCE_ROLLBACK: Releasing {amount} USD held for failed task {task_id}.")
+        self.ledger_service.state_manager.publish_event("CFO_ROLLBACK", f"Released {amount} USD held by {task_id}.")
+        return self.ledger_service.release_hold("main-wallet", task_id)
 
 
 
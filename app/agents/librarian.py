@@ -7,6 +7,7 @@ from google.genai import types
 from typing import List, Optional, Any, Dict
 from app.core.config import settings
 from app.core.vertex_init import get_genai_client
+from app.core.services.semantic_cache import get_semantic_cache, scope_key
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +27,7 @@ class Librarian:
         """
         self.client = get_genai_client()
         self.model_name = model_name
+        self.semantic_cache = get_semantic_cache("librarian")
 
     def extract_viral_structure(self, content: str) -> Dict[str, Any]:
         """Deconstructs content into its underlying structural components.        
@@ -35,6 +37,14 @@ class Librarian:
         Returns:
             Dict: A structural map of the content.
         """
+        if self.semantic_cache is None:
+            return self._extract(content)
+        return self.semantic_cache.get_or_compute(
+            content, scope_key(self.model_name), lambda: self._extract(content),
+            should_store=lambda structure: "parse_error" not in structure
+        )
+
+    def _extract(self, content: str) -> Dict[str, Any]:
         prompt = f"""
         Analyze the following content and extract its 'Viral DNA' structure.
         Identify the underlying mechanics that make it effective.
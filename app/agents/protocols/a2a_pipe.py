@@ -8,6 +8,8 @@ from pydantic import BaseModel, Field
 
 from app.state.db_access import StateManager
 
+from app.core.tracing import span
+
 
 
 logger = logging.getLogger(__name__)
@@ -72,12 +74,16 @@ class A2AContextPipe:
 
         """Updates and validates the context during a transition."""
 
-        logger.info(f"A2A_PIPE: Transitioning from {context.current_step} to {next_step}.")
+        with span("a2a.transition", "a2a", production_id=context.task_id, muse_id=context.muse_id,
+
+                  from_step=context.current_step, to_step=next_step):
+
+            logger.info(f"A2A_PIPE: Transitioning from {context.current_step} to {next_step}.")
 
-        self.state_manager.publish_event("PIPE_TRANSITION", f"Transition: {context.current_step} -> {next_step}", {"task_id": context.task_id})
+            self.state_manager.publish_event("PIPE_TRANSITION", f"Transition: {context.current_step} -> {next_step}", {"task_id": context.task_id})
 
-        context.current_step = next_step
+            context.current_step = next_step
 
-        context.data.update(update_data)
+            context.data.update(update_data)
 
         return context
@@ -9,6 +9,7 @@ from app.core.schemas.look import LookSelection
 from app.core.schemas.world import SceneLayout
 from app.state.models import Mood
 from app.core.vertex_init import get_genai_client
+from app.core.services.semantic_cache import get_semantic_cache, scope_key
 
 class StylistAgent:
     """The Guardian of Look agent responsible for wardrobe and props."""
@@ -16,6 +17,7 @@ class StylistAgent:
     def __init__(self, model_name: str = "gemini-3-pro-preview-preview"):
         self.client = get_genai_client()
         self.model_name = model_name
+        self.semantic_cache = get_semantic_cache("stylist")
 
     def select_look(
         self, 
@@ -36,16 +38,8 @@ class StylistAgent:
             LookSelection: Structured look configuration.
         """
         
-        # 1. Prepare Wardrobe Context
-        items_info = []
-        for item in registry.items.values():
-            items_info.append(f"- {item.item_id}: {item.name} ({', '.join(item.tags)}). {item.description}")
-        
-        props_info = []
-        for prop in registry.props.values():
-            props_info.append(f"- {prop.prop_id}: {prop.name}. {prop.description}")
-            
-        wardrobe_context = "AVAILABLE ITEMS:\n" + "\n".join(items_info) + "\n\nAVAILABLE PROPS:\n" + "\n".join(props_info)
+        # 1. Prepare Wardrobe Context (memoized by the registry)
+        wardrobe_context = registry.get_wardrobe_context()
 
         # 2. Construct Prompt
         prompt = f"""
@@ -65,6 +59,15 @@ class StylistAgent:
         Output a JSON object matching the LookSelection schema.
         """
 
+        if self.semantic_cache is None:
+            return self._generate_look(prompt)
+        # Wardrobe, location and (coarse) mood must match exactly; the narrative semantically
+        scope = scope_key(
+            self.model_name, wardrobe_context, layout.location_id, round(mood.valence, 1), round(mood.arousal, 1)
+        )
+        return self.semantic_cache.get_or_compute(script_intent, scope, lambda: self._generate_look(prompt))
+
+    def _generate_look(self, prompt: str) -> LookSelection:
         response = self.client.models.generate_content(
             model=self.model_name,
             contents=[
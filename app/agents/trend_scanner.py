@@ -6,6 +6,7 @@ from app.core.config import settings
 from app.core.services.search_service import SearchService
 from app.core.schemas.trend import TrendReport, RelevanceScore
 from app.core.vertex_init import get_genai_client
+from app.core.services.semantic_cache import get_semantic_cache, scope_key
 
 class TrendScanner:
     """Agent that perceives trends and evaluates their fit for the Muse."""
@@ -19,6 +20,7 @@ class TrendScanner:
         self.client = get_genai_client()
         self.model_name = model_name
         self.search_service = SearchService(model_name=model_name)
+        self.semantic_cache = get_semantic_cache("trend_scanner")
 
     def analyze_trend(self, topic: str, persona_constraints: str = "Avoid political controversy. Focus on fashion, tech, and art.") -> TrendReport:
         """Analyzes a topic using real-time search data and persona constraints.
@@ -30,7 +32,14 @@ class TrendScanner:
         Returns:
             TrendReport: Structured analysis including a proactive IntentObject.
         """
-        
+        if self.semantic_cache is None:
+            return self._analyze(topic, persona_constraints)
+        # A re-scanned topic skips both the search grounding and the analysis
+        return self.semantic_cache.get_or_compute(
+            topic, scope_key(self.model_name, persona_constraints), lambda: self._analyze(topic, persona_constraints)
+        )
+
+    def _analyze(self, topic: str, persona_constraints: str) -> TrendReport:
         # 1. Gather Context via Search
         search_summary = self.search_service.search(f"What is the current sentiment and context for: {topic}?")
         
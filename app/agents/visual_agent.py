@@ -6,7 +6,15 @@ import google.genai as genai
 from google.genai import types
 from app.core.config import settings
 from app.matrix.assets_manager import SignatureAssetsManager
+from app.matrix.reference_prefetcher import (
+    ReferenceBundle,
+    subject_face_path,
+    location_reference_path,
+    object_reference_path,
+    wardrobe_reference_path,
+)
 from app.core.vertex_init import get_genai_client
+from app.core.utils.perceptual_hash import get_render_hash_index
 from app.agents.base_worker import BaseWorker, WorkerOutput
 
 logger = logging.getLogger(__name__)
@@ -20,6 +28,7 @@ class VisualAgent(BaseWorker):
         self.client = get_genai_client()
         self.model_name = model_name
         self.assets_manager = SignatureAssetsManager(bucket_name=settings.GCS_BUCKET_NAME)
+        self.render_index = get_render_hash_index()
 
     async def execute_task(self, instruction: str, context: Dict[str, Any]) -> WorkerOutput:
         """HLP/Worker contract: Executes image generation."""
@@ -52,7 +61,8 @@ class VisualAgent(BaseWorker):
         object_ids: Optional[List[str]] = None,
         item_ids: Optional[List[str]] = None,
         aspect_ratio: str = "1:1",
-        number_of_images: int = 1
+        number_of_images: int = 1,
+        references: Optional[ReferenceBundle] = None
     ) -> bytes:
         """Generates an image based on a prompt and optional subject/style/world/wardrobe guidance.
 
@@ -65,6 +75,8 @@ class VisualAgent(BaseWorker):
             item_ids: List of IDs of persistent wardrobe items.
             aspect_ratio: Aspect ratio (e.g., '1:1', '16:9').
             number_of_images: How many images to generate.
+            references: Prefetched reference bundle. Paths it covers are not
+                downloaded again.
 
         Returns:
             bytes: The raw image data of the first generated image.
@@ -73,46 +85,27 @@ class VisualAgent(BaseWorker):
         enhanced_prompt = prompt
         
         # 1. Subject Guidance
-        if subject_id:
-            try:
-                self.assets_manager.download_asset(f"muses/{subject_id}/face.png")
-                enhanced_prompt = f"Subject: {subject_id}. {enhanced_prompt}"
-            except Exception:
-                pass
+        if subject_id and self._has_reference(subject_face_path(subject_id), references):
+            enhanced_prompt = f"Subject: {subject_id}. {enhanced_prompt}"
 
         # 2. Style Guidance
-        if style_id:
-            try:
-                self.assets_manager.download_asset(f"styles/{style_id}.png")
-                enhanced_prompt += f" Style: {style_id}"
-            except Exception:
-                pass
+        if style_id and self._has_reference(f"styles/{style_id}.png", references):
+            enhanced_prompt += f" Style: {style_id}"
 
         # 3. World Guidance (Locations & Objects)
-        if location_id:
-            try:
-                self.assets_manager.download_asset(f"world/locations/{location_id}/reference.png")
-                enhanced_prompt += f" Location: {location_id}"
-            except Exception:
-                pass
+        if location_id and self._has_reference(location_reference_path(location_id), references):
+            enhanced_prompt += f" Location: {location_id}"
         
         if object_ids:
             for obj_id in object_ids:
-                try:
-                    self.assets_manager.download_asset(f"world/objects/{obj_id}/reference.png")
+                if self._has_reference(object_reference_path(obj_id), references):
                     enhanced_prompt += f" Including Object: {obj_id}"
-                except Exception:
-                    pass
 
         # 4. Wardrobe Guidance
         if item_ids:
             for item_id in item_ids:
-                try:
-                    # Fetching from the appropriate path
-                    self.assets_manager.download_asset(f"wardrobe/items/{item_id}/reference.png")
+                if self._has_reference(wardrobe_reference_path(item_id), references):
                     enhanced_prompt += f" Wearing: {item_id}"
-                except Exception:
-                    pass
 
         try:
             response = self.client.models.generate_images(
@@ -130,17 +123,35 @@ class VisualAgent(BaseWorker):
                 raise RuntimeError("Imagen 3 returned no images.")
 
             # Return the bytes of the first image
-            return response.generated_images[0].image_bytes
+            image_bytes = response.generated_images[0].image_bytes
+            self._index_render(subject_id, image_bytes, "generated")
+            return image_bytes
         except Exception as e:
             logger.error(f"VISUAL: Image generation failed: {e}")
             raise
 
+    def _index_render(self, subject_id: Optional[str], image_bytes: bytes, label: str) -> None:
+        """Records the render's perceptual hash for near-duplicate lookups."""
+        if subject_id:
+            self.render_index.add(subject_id, image_bytes, label, {"model": self.model_name})
+
+    def _has_reference(self, path: str, references: Optional[ReferenceBundle]) -> bool:
+        """Checks a reference asset, using the prefetched bundle when it covers the path."""
+        if references is not None and references.covers(path):
+            return references.has(path)
+        try:
+            self.assets_manager.download_asset(path)
+            return True
+        except Exception:
+            return False
+
     def edit_image(
         self,
         prompt: str,
         base_image_bytes: bytes,
         mask_image_bytes: Optional[bytes] = None,
-        number_of_images: int = 1
+        number_of_images: int = 1,
+        subject_id: Optional[str] = None
     ) -> bytes:
         """Edits an image using mask-based inpainting.
 
@@ -149,6 +160,7 @@ class VisualAgent(BaseWorker):
             base_image_bytes: The original image to edit.
             mask_image_bytes: The binary mask (white = edit area, black = preserve).
             number_of_images: Number of images to generate.
+            subject_id: The Muse, to index the edit for near-duplicate lookups.
 
         Returns:
             bytes: The edited image data.
@@ -185,7 +197,9 @@ class VisualAgent(BaseWorker):
             if not response.generated_images:
                 raise RuntimeError("Imagen 3 returned no edited images.")
             
-            return response.generated_images[0].image_bytes
+            image_bytes = response.generated_images[0].image_bytes
+            self._index_render(subject_id, image_bytes, "edited")
+            return image_bytes
         except Exception as e:
             logger.error(f"VISUAL: Image editing failed: {e}")
             raise
@@ -1,10 +1,16 @@
 
 from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.core.schemas.trend import TrendReport, ViralVelocity, Sentiment, RelevanceScore, TrendType
 from app.state.models import Mood, Wallet
 from app.core.redis_client import get_redis_client
 from app.core.config import settings
+from app.core.services.approval_gate import ApprovalGate, APPROVAL_ACTIONS
+from app.core.tracing import get_tracer
+from app.core.services.semantic_cache import semantic_cache_stats
+from app.core.production_scheduler import get_production_scheduler
+from app.core.production_registry import get_production_registry
+from app.core.schemas.production import ProductionRecord
 import json
 import logging
 
@@ -99,20 +105,55 @@ async def get_swarm_status():
         {"id": "visual-agent", "status": "standby", "task": "Awaiting Production"}
     ]
 
+@swarm.get("/traces/latency")
+async def get_latency_histograms(kind: Optional[str] = None):
+    """Per-span latency histograms (stages, model calls, GCS, Redis, A2A)."""
+    return get_tracer().histograms(kind)
+
+@swarm.get("/caches/semantic")
+async def get_semantic_cache_stats():
+    """Hit rates of the per-agent semantic response caches (empty when disabled)."""
+    return semantic_cache_stats()
+
 @swarm.get("/pipeline")
 async def get_pipeline():
-    return {"active_productions": 0, "queue_depth": 0}
+    """Production scheduler load plus registry counts per state and stuck productions."""
+    stats = get_production_scheduler().stats()
+    registry = get_production_registry().summary(stuck_after_seconds=settings.PRODUCTION_STUCK_AFTER_SECONDS)
+    return {
+        "active_productions": stats["running"],
+        "queue_depth": stats["queue_depth"],
+        "scheduler": stats,
+        "productions": registry
+    }
 
 # --- STUDIO ENDPOINTS ---
-@studio.get("/productions/active")
+@studio.get("/productions/active", response_model=List[ProductionRecord])
 async def get_active_productions():
-    return []
+    """Queued, running and HITL-parked productions with their live progress."""
+    return get_production_registry().list_active()
 
-@studio.get("/productions/history")
-async def get_production_history():
-    return []
+@studio.get("/productions/history", response_model=List[ProductionRecord])
+async def get_production_history(limit: int = 20):
+    """Most recently finished (completed, failed or shed) productions."""
+    return get_production_registry().list_recent(limit)
+
+@studio.get("/productions/{task_id}", response_model=ProductionRecord)
+async def get_production(task_id: str):
+    record = get_production_registry().get(task_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown production '{task_id}'.")
+    return record
 
 # --- HITL ENDPOINTS ---
 @hitl.get("/proposals")
 async def get_proposals():
     return []
+
+@hitl.post("/tasks/{task_id}/{action}")
+async def signal_task(task_id: str, action: str):
+    """Approves or rejects a production paused at a HITL gate."""
+    if action not in APPROVAL_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown action '{action}'.")
+    ApprovalGate(get_redis_client()).signal(task_id, action)
+    return {"task_id": task_id, "action": action}
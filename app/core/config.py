@@ -19,6 +19,80 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
 
+    # Tiered read-through cache for GCS assets (see app/matrix/asset_cache.py)
+    ASSET_CACHE_ENABLED: bool = True
+    ASSET_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    ASSET_CACHE_DIR: str = "/tmp/smos/asset_cache"
+    ASSET_CACHE_MAX_DISK_BYTES: int = 2 * 1024 * 1024 * 1024
+    ASSET_CACHE_REVALIDATE_SECONDS: float = 300.0
+
+    # Decoded identity-anchor features (see app/core/utils/anchor_features.py)
+    ANCHOR_FEATURE_DIR: str = "/tmp/smos/anchor_features"
+    ANCHOR_FEATURE_CACHE_SIZE: int = 64
+    ANCHOR_FEATURE_MAX_DISK_BYTES: int = 256 * 1024 * 1024
+    ANCHOR_THUMBNAIL_SIZE: int = 64
+
+    # Identity anchor vector index (see app/matrix/anchor_index.py)
+    ANCHOR_INDEX_DIR: str = "/tmp/smos/anchor_index"
+    ANCHOR_EMBEDDING_SIZE: int = 32
+
+    # Structural similarity engine (see app/core/utils/image_similarity.py)
+    SIMILARITY_METRIC: str = "ms_ssim"
+    SIMILARITY_SIZE: int = 128
+
+    # Perceptual-hash index of renders (see app/core/utils/perceptual_hash.py)
+    PHASH_ALGORITHM: str = "phash"
+    PHASH_DUPLICATE_RADIUS: int = 4
+    PHASH_MAX_ENTRIES_PER_MUSE: int = 5000
+    PHASH_QA_SHORT_CIRCUIT: bool = True
+    PHASH_SKIP_DUPLICATE_STAGING: bool = True
+
+    # Budget holds of in-flight productions (see app/core/services/ledger_service.py)
+    LEDGER_HOLD_TTL_SECONDS: int = 3600
+
+    # CFO solvency fast path (see app/agents/finance_agent.py)
+    CFO_FAST_PATH_ENABLED: bool = True
+    CFO_FAST_APPROVE_MAX_COST_RATIO: float = 0.05
+    CFO_FAST_APPROVE_MIN_RESERVE: float = 1.0
+    CFO_DECISION_CACHE_TTL_SECONDS: float = 300.0
+
+    # Visual QA repair loop (see app/core/workflow_engine.py)
+    REPAIR_MERGE_INPAINT_AREAS: bool = True
+
+    # HITL gates: max time a production stays suspended awaiting a decision
+    HITL_APPROVAL_TIMEOUT_SECONDS: float = 300.0
+
+    # Durable per-stage production checkpoints (see app/core/services/checkpoint_store.py)
+    CHECKPOINT_ENABLED: bool = True
+    CHECKPOINT_TTL_SECONDS: int = 86400
+    CHECKPOINT_BLOB_DIR: str = "/tmp/smos/checkpoint_blobs"
+    CHECKPOINT_MAX_INLINE_BYTES: int = 64 * 1024
+
+    # Per-stage tracing spans (see app/core/tracing.py)
+    TRACING_ENABLED: bool = True
+    TRACE_DIR: str = "/tmp/smos/traces"
+    TRACE_MAX_SPANS: int = 10000
+
+    # Global production scheduler (see app/core/production_scheduler.py)
+    SCHEDULER_MAX_WORKERS: int = 4
+    SCHEDULER_PER_MUSE_LIMIT: int = 3
+    SCHEDULER_MAX_QUEUE: int = 50
+
+    # Production status registry (see app/core/production_registry.py)
+    PRODUCTION_HISTORY_SIZE: int = 100
+    PRODUCTION_STUCK_AFTER_SECONDS: float = 600.0
+
+    # Prompt rewrite memoization (see app/core/services/prompt_cache.py)
+    PROMPT_CACHE_ENABLED: bool = True
+    PROMPT_CACHE_TTL_SECONDS: int = 7 * 86400
+    PROMPT_CACHE_MAX_ENTRIES: int = 10000
+    PROMPT_CACHE_L1_SIZE: int = 512
+
+    # Opt-in semantic cache of structured agent responses (see app/core/services/semantic_cache.py)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_EMBEDDING_MODEL: str = "text-embedding-004"
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000
+
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:8080"
 
     @field_validator("PROJECT_ID")
@@ -0,0 +1,51 @@
+"""Time-bucketed spend counters per wallet (circuit breaker and daily budget)."""
+
+import time
+from typing import List, Optional, Tuple
+import redis
+
+# Minute buckets only need to outlive the widest rolling window read from them
+MINUTE_BUCKET_TTL_SECONDS = 2 * 3600
+DAY_BUCKET_TTL_SECONDS = 2 * 86400
+
+
+class SpendTracker:
+    """Names and reads the per-wallet expense buckets maintained by the ledger.
+
+    Every expense increments one per-minute key (rolling windows, e.g. the
+    last hour = 60 keys) and one per-UTC-day key (daily budget). The ledger
+    updates them in the same atomic script as the balance, so a check costs
+    one MGET and never parses history.
+    """
+
+    def __init__(self, redis_client: redis.Redis, key_prefix: str = "smos:finance:spend:"):
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+
+    def minute_key(self, wallet_address: str, minute: int) -> str:
+        return f"{self.key_prefix}{wallet_address}:m:{minute}"
+
+    def day_key(self, wallet_address: str, day: int) -> str:
+        return f"{self.key_prefix}{wallet_address}:d:{day}"
+
+    def bucket_keys(self, wallet_address: str, timestamp: float) -> Tuple[str, str]:
+        """The (minute, day) buckets an expense made at `timestamp` (epoch seconds) lands in."""
+        return (
+            self.minute_key(wallet_address, int(timestamp // 60)),
+            self.day_key(wallet_address, int(timestamp // 86400))
+        )
+
+    def spend_last(self, wallet_address: str, seconds: int = 3600, now: Optional[float] = None) -> float:
+        """Expenses over the trailing window, at minute granularity (current minute included)."""
+        current = int((time.time() if now is None else now) // 60)
+        minutes = max(1, -(-seconds // 60))
+        return self._sum([self.minute_key(wallet_address, m) for m in range(current - minutes + 1, current + 1)])
+
+    def spend_today(self, wallet_address: str, now: Optional[float] = None) -> float:
+        """Expenses since 00:00 UTC."""
+        day = int((time.time() if now is None else now) // 86400)
+        return self._sum([self.day_key(wallet_address, day)])
+
+    def _sum(self, keys: List[str]) -> float:
+        values = self.redis.mget(keys)
+        return round(sum(float(v) for v in values if v is not None), 6)
@@ -0,0 +1,275 @@
+"""Registry of background productions: state, stage progress, cost and artifacts."""
+
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import redis
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.core.schemas.production import ProductionRecord, ProductionState, StageTiming, ACTIVE_STATES
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ProductionRegistry:
+    """Tracks every production under its task ID.
+
+    Records are mutated in-process (the process running the production owns
+    its record) and mirrored to Redis as JSON, so the API can list active and
+    recent productions from any replica. Updates for unknown task IDs (e.g.
+    Best-of-N branch IDs) are ignored. Registry failures never break a
+    production.
+
+    Writes are serialized (`_write_lock`, taken before the record lock), so
+    Redis always ends up with the latest state of a record, even when
+    updates come from several threads. Scheduler events arrive on the event
+    loop: they only update the in-process record, and a background writer
+    thread mirrors the record's latest state to Redis.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        history_size: int = 100,
+        ttl_seconds: int = 7 * 86400,
+        key_prefix: str = "smos:"
+    ):
+        self.redis = redis_client or get_redis_client()
+        self.history_size = history_size
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self.record_key_prefix = f"{key_prefix}production:"
+        self.active_key = f"{key_prefix}productions:active"
+        self.history_key = f"{key_prefix}productions:history"
+        self._records: Dict[str, ProductionRecord] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Deferred writes: task IDs to mirror, and finished records not yet mirrored
+        self._pending: "queue.Queue[str]" = queue.Queue()
+        self._finished: Dict[str, ProductionRecord] = {}
+        self._writer: Optional[threading.Thread] = None
+
+    # --- Lifecycle ---
+
+    def register(self, task_id: str, subject_id: str, intent: str = "", priority: float = 0.0,
+                 state: ProductionState = ProductionState.QUEUED) -> ProductionRecord:
+        """Creates (or resets) the record of a production."""
+        record = ProductionRecord(task_id=task_id, subject_id=subject_id, intent=intent,
+                                  priority=priority, state=state)
+        if state == ProductionState.RUNNING:
+            record.started_at = record.created_at
+        with self._write_lock:
+            with self._lock:
+                self._records[task_id] = record
+                snapshot = record.model_copy(deep=True)
+            self._persist(snapshot)
+        return record
+
+    def mark_running(self, task_id: str, subject_id: str, intent: str = "") -> None:
+        """Marks a production as started, registering it if it was never queued."""
+        with self._lock:
+            known = task_id in self._records
+        if not known:
+            self.register(task_id, subject_id, intent, state=ProductionState.RUNNING)
+            return
+
+        def apply(record: ProductionRecord):
+            record.state = ProductionState.RUNNING
+            record.started_at = record.started_at or _now()
+            record.finished_at = None
+            record.error = None
+        self._update(task_id, apply)
+
+    def stage_started(self, task_id: str, stage: str) -> None:
+        def apply(record: ProductionRecord):
+            record.current_stages.append(stage)
+            record.stage_timings[stage] = StageTiming(started_at=_now())
+        self._update(task_id, apply)
+
+    def stage_completed(self, task_id: str, stage: str, cost: float = 0.0) -> None:
+        def apply(record: ProductionRecord):
+            if stage in record.current_stages:
+                record.current_stages.remove(stage)
+            timing = record.stage_timings.get(stage)
+            if timing:
+                timing.finished_at = _now()
+                timing.duration_seconds = round((timing.finished_at - timing.started_at).total_seconds(), 3)
+            record.cost_so_far = round(record.cost_so_far + cost, 6)
+        self._update(task_id, apply)
+
+    def set_state(self, task_id: str, state: ProductionState) -> None:
+        """Transient state changes (e.g. parked at a HITL gate and back)."""
+        def apply(record: ProductionRecord):
+            record.state = state
+        self._update(task_id, apply)
+
+    def complete(self, task_id: str, artifacts: Dict[str, Any], cost: Optional[float] = None) -> None:
+        def apply(record: ProductionRecord):
+            record.state = ProductionState.COMPLETED
+            record.artifacts = artifacts
+            if cost is not None:
+                record.cost_so_far = cost
+            record.current_stages = []
+        self._finish(task_id, apply)
+
+    def fail(self, task_id: str, error: str) -> None:
+        def apply(record: ProductionRecord):
+            record.state = ProductionState.FAILED
+            record.error = error
+            record.current_stages = []
+        self._finish(task_id, apply)
+
+    def on_scheduler_event(self, task_id: str, event: str, subject_id: str, priority: float) -> None:
+        """Scheduler listener: records queued and shed productions.
+
+        Called on the event loop, so Redis writes are left to the writer thread.
+        """
+        if event == "queued":
+            with self._lock:
+                record = self._records.get(task_id)
+                if record is None:
+                    self._records[task_id] = ProductionRecord(task_id=task_id, subject_id=subject_id, priority=priority)
+                else:
+                    record.priority = priority
+                    record.updated_at = _now()
+        elif event == "shed":
+            with self._lock:
+                record = self._records.pop(task_id, None)
+                if record is None:
+                    return
+                record.state = ProductionState.SHED
+                record.finished_at = record.updated_at = _now()
+                self._finished[task_id] = record
+        else:
+            return
+        self._persist_later(task_id)
+
+    def flush(self) -> None:
+        """Blocks until every deferred write reached Redis."""
+        self._pending.join()
+
+    # --- Queries ---
+
+    def get(self, task_id: str) -> Optional[ProductionRecord]:
+        with self._lock:
+            record = self._records.get(task_id) or self._finished.get(task_id)
+            if record is not None:
+                return record.model_copy(deep=True)
+        data = self.redis.get(f"{self.record_key_prefix}{task_id}")
+        return ProductionRecord.model_validate_json(data) if data else None
+
+    def list_active(self) -> List[ProductionRecord]:
+        """Queued, running and HITL-parked productions, oldest first."""
+        ids = [i.decode("utf-8") if isinstance(i, bytes) else i for i in self.redis.zrange(self.active_key, 0, -1)]
+        records = self._load_many(ids)
+        return [r for r in records if r.state in ACTIVE_STATES]
+
+    def list_recent(self, count: int = 20) -> List[ProductionRecord]:
+        """Most recently finished productions, newest first."""
+        ids = [i.decode("utf-8") if isinstance(i, bytes) else i for i in self.redis.lrange(self.history_key, 0, count - 1)]
+        return self._load_many(ids)
+
+    def summary(self, stuck_after_seconds: float = 600.0) -> Dict[str, Any]:
+        """Counts per state plus productions without progress for too long."""
+        active = self.list_active()
+        now = _now()
+        by_state: Dict[str, int] = {}
+        for record in active:
+            by_state[record.state.value] = by_state.get(record.state.value, 0) + 1
+        stuck = [
+            r.task_id for r in active
+            if r.state == ProductionState.RUNNING and (now - r.updated_at).total_seconds() > stuck_after_seconds
+        ]
+        return {"active": len(active), "by_state": by_state, "stuck": stuck}
+
+    # --- Internals ---
+
+    def _load_many(self, ids: List[str]) -> List[ProductionRecord]:
+        if not ids:
+            return []
+        records = []
+        for task_id, data in zip(ids, self.redis.mget([f"{self.record_key_prefix}{i}" for i in ids])):
+            if data:
+                records.append(ProductionRecord.model_validate_json(data))
+        return records
+
+    def _update(self, task_id: str, apply) -> None:
+        with self._write_lock:
+            with self._lock:
+                record = self._records.get(task_id)
+                if record is None:
+                    return
+                apply(record)
+                record.updated_at = _now()
+                snapshot = record.model_copy(deep=True)
+            self._persist(snapshot)
+
+    def _finish(self, task_id: str, apply) -> None:
+        with self._write_lock:
+            with self._lock:
+                record = self._records.pop(task_id, None)
+                if record is None:
+                    return
+                apply(record)
+                record.finished_at = record.updated_at = _now()
+            self._persist(record, finished=True)
+
+    def _persist_later(self, task_id: str) -> None:
+        """Queues a task ID for the writer thread (started on first use)."""
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_pending, name="registry-writer", daemon=True)
+                self._writer.start()
+        self._pending.put(task_id)
+
+    def _write_pending(self) -> None:
+        while True:
+            task_id = self._pending.get()
+            try:
+                # Mirror whatever is latest now: a newer synchronous write may have gone first
+                with self._write_lock:
+                    with self._lock:
+                        record = self._records.get(task_id)
+                        finished = record is None
+                        snapshot = self._finished.pop(task_id, None) if finished else record.model_copy(deep=True)
+                    if snapshot is not None:
+                        self._persist(snapshot, finished=finished)
+            except Exception as e:
+                logger.warning(f"REGISTRY: Deferred write of production {task_id} failed: {e}")
+            finally:
+                self._pending.task_done()
+
+    def _persist(self, record: ProductionRecord, finished: bool = False) -> None:
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(f"{self.record_key_prefix}{record.task_id}", record.model_dump_json(), ex=self.ttl_seconds)
+            if finished:
+                pipe.zrem(self.active_key, record.task_id)
+                pipe.lpush(self.history_key, record.task_id)
+                pipe.ltrim(self.history_key, 0, self.history_size - 1)
+            else:
+                pipe.zadd(self.active_key, {record.task_id: record.created_at.timestamp()})
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"REGISTRY: Failed to persist production {record.task_id}: {e}")
+
+
+# Global Singleton
+_REGISTRY: Optional[ProductionRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_production_registry() -> ProductionRegistry:
+    """Returns the process-wide production registry."""
+    global _REGISTRY
+
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = ProductionRegistry(history_size=settings.PRODUCTION_HISTORY_SIZE)
+    return _REGISTRY
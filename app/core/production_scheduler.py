@@ -0,0 +1,310 @@
+"""Global production scheduler: admission control, priorities, concurrency caps."""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Builds the production coroutine once a worker picks the request up
+ProductionFactory = Callable[[], Awaitable[Any]]
+# Lifecycle observer: (task_id, event, subject_id, priority), event in queued/started/shed
+SchedulerListener = Callable[[str, str, str, float], None]
+
+# The scheduled production the current task is running (see ProductionScheduler.parked)
+_CURRENT_REQUEST: contextvars.ContextVar[Optional["ScheduledProduction"]] = contextvars.ContextVar(
+    "current_production", default=None
+)
+
+
+class SchedulerOverloaded(RuntimeError):
+    """Raised when a production is shed because the queue is full."""
+
+
+class ScheduledProduction:
+    """A queued production request."""
+
+    __slots__ = ("task_id", "subject_id", "priority", "factory", "enqueued_at", "seq")
+
+    def __init__(self, task_id: str, subject_id: str, priority: float, factory: ProductionFactory, seq: int):
+        self.task_id = task_id
+        self.subject_id = subject_id
+        self.priority = priority
+        self.factory = factory
+        self.enqueued_at = time.monotonic()
+        self.seq = seq
+
+    def sort_key(self):
+        # Highest priority first, FIFO within a priority
+        return (-self.priority, self.seq)
+
+    def __lt__(self, other: "ScheduledProduction") -> bool:
+        return self.sort_key() < other.sort_key()
+
+
+class ProductionScheduler:
+    """Owns every background production launch.
+
+    Requests wait in a priority queue and are started as asyncio tasks while
+    both the global cap (max_workers) and their muse's cap allow it; other
+    muses' requests may overtake them meanwhile. When the queue is full, the
+    lowest-priority request is shed (possibly the new one), so overload
+    degrades predictably instead of exhausting threads, Redis connections
+    and Veo quota.
+
+    A production parked at a HITL gate (see parked) gives its slots back
+    and takes them again, ahead of queued work, once the decision arrives.
+    """
+
+    def __init__(self, max_workers: int = 4, per_muse_limit: int = 1, max_queue: int = 50):
+        if max_workers < 1 or per_muse_limit < 1 or max_queue < 0:
+            raise ValueError("Scheduler limits must be positive.")
+        self.max_workers = max_workers
+        self.per_muse_limit = per_muse_limit
+        self.max_queue = max_queue
+
+        self._queue: List[ScheduledProduction] = []
+        self._running: Dict[str, int] = {}
+        self._active = 0
+        self._parked = 0
+        # Muses of the parked productions waiting to take their slots back
+        self._resuming: List[str] = []
+        self._seq = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Condition] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wait_total = 0.0
+        self._listeners: List[SchedulerListener] = []
+        self.metrics: Dict[str, int] = {
+            "submitted": 0,
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "shed": 0,
+            "max_queue_depth": 0,
+        }
+
+    # --- Public API ---
+
+    async def submit(
+        self,
+        factory: ProductionFactory,
+        subject_id: str,
+        priority: float = 0.0,
+        task_id: Optional[str] = None
+    ) -> str:
+        """Queues a production and returns its task ID.
+
+        Args:
+            factory: Zero-argument callable returning the production coroutine.
+            subject_id: The Muse, for per-muse concurrency accounting.
+            priority: Higher runs first (e.g. the trend's VVS score).
+            task_id: Optional explicit task ID.
+
+        Raises:
+            SchedulerOverloaded: If the queue is full of higher-priority work.
+        """
+        self._ensure_loop()
+        request = ScheduledProduction(task_id or str(uuid.uuid4())[:8], subject_id, priority, factory, next(self._seq))
+
+        async with self._wakeup:
+            if len(self._queue) >= self.max_queue:
+                lowest = max(self._queue) if self._queue else None
+                if lowest is None or not request < lowest:
+                    self.metrics["shed"] += 1
+                    logger.warning(f"SCHEDULER: Queue full ({self.max_queue}). Shedding {request.task_id} "
+                                   f"(muse '{subject_id}', priority {priority}).")
+                    self._notify(request, "shed")
+                    raise SchedulerOverloaded(f"Production queue full; {request.task_id} was shed.")
+                self._queue.remove(lowest)
+                heapq.heapify(self._queue)
+                self.metrics["shed"] += 1
+                logger.warning(f"SCHEDULER: Queue full. Shedding lower-priority {lowest.task_id} "
+                               f"(priority {lowest.priority}) for {request.task_id}.")
+                self._notify(lowest, "shed")
+
+            heapq.heappush(self._queue, request)
+            self.metrics["submitted"] += 1
+            self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], len(self._queue))
+            self._notify(request, "queued")
+            self._wakeup.notify_all()
+
+        logger.info(f"SCHEDULER: Queued {request.task_id} for muse '{subject_id}' "
+                    f"(priority {priority}, depth {len(self._queue)}).")
+        return request.task_id
+
+    def add_listener(self, listener: SchedulerListener) -> None:
+        """Registers a lifecycle observer (e.g. the production registry)."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, running productions and throughput counters."""
+        started = self.metrics["started"]
+        return {
+            **self.metrics,
+            "queue_depth": len(self._queue),
+            "running": self._active,
+            "parked": self._parked,
+            "running_per_muse": {m: n for m, n in self._running.items() if n},
+            "queued_per_muse": self._queued_per_muse(),
+            "max_workers": self.max_workers,
+            "per_muse_limit": self.per_muse_limit,
+            "avg_wait_seconds": round(self._wait_total / started, 3) if started else 0.0,
+        }
+
+    async def shutdown(self) -> None:
+        """Cancels the dispatcher and the running productions."""
+        tasks = list(self._tasks) + ([self._dispatcher] if self._dispatcher else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = set()
+        self._dispatcher = None
+        self._loop = None
+
+    @asynccontextmanager
+    async def parked(self) -> AsyncIterator[None]:
+        """Frees the calling production's slots while it waits (e.g. at a HITL gate).
+
+        On exit the production takes its slots back, before any queued
+        request is started. A no-op outside a production run by this scheduler.
+        """
+        request = _CURRENT_REQUEST.get()
+        if request is None or self._wakeup is None or self._loop is not asyncio.get_running_loop():
+            yield
+            return
+
+        async with self._wakeup:
+            self._release(request)
+            self._parked += 1
+            self._wakeup.notify_all()
+        try:
+            yield
+        finally:
+            async with self._wakeup:
+                self._resuming.append(request.subject_id)
+                try:
+                    while not self._has_slot(request.subject_id):
+                        await self._wakeup.wait()
+                finally:
+                    self._resuming.remove(request.subject_id)
+                    self._parked -= 1
+                self._acquire(request)
+                self._wakeup.notify_all()
+
+    # --- Dispatch ---
+
+    def _ensure_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._queue:
+            logger.warning(f"SCHEDULER: Event loop changed, dropping {len(self._queue)} orphaned request(s).")
+        self._queue = []
+        self._running = {}
+        self._active = 0
+        self._parked = 0
+        self._resuming = []
+        self._tasks = set()
+        self._loop = loop
+        self._wakeup = asyncio.Condition()
+        self._dispatcher = loop.create_task(self._dispatch_forever(), name="production-dispatcher")
+
+    def _notify(self, request: ScheduledProduction, event: str) -> None:
+        for listener in self._listeners:
+            try:
+                listener(request.task_id, event, request.subject_id, request.priority)
+            except Exception as e:
+                logger.warning(f"SCHEDULER: Listener failed on '{event}' for {request.task_id}: {e}")
+
+    def _queued_per_muse(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for request in self._queue:
+            counts[request.subject_id] = counts.get(request.subject_id, 0) + 1
+        return counts
+
+    def _has_slot(self, subject_id: str) -> bool:
+        return self._active < self.max_workers and self._running.get(subject_id, 0) < self.per_muse_limit
+
+    def _acquire(self, request: ScheduledProduction) -> None:
+        self._active += 1
+        self._running[request.subject_id] = self._running.get(request.subject_id, 0) + 1
+
+    def _release(self, request: ScheduledProduction) -> None:
+        self._active -= 1
+        self._running[request.subject_id] -= 1
+
+    def _next_eligible(self) -> Optional[ScheduledProduction]:
+        for request in sorted(self._queue):
+            if self._running.get(request.subject_id, 0) < self.per_muse_limit:
+                self._queue.remove(request)
+                heapq.heapify(self._queue)
+                return request
+        return None
+
+    async def _dispatch_forever(self) -> None:
+        async with self._wakeup:
+            while True:
+                self._dispatch()
+                await self._wakeup.wait()
+
+    def _dispatch(self) -> None:
+        """Starts queued requests into the free slots. Caller holds the condition."""
+        # Resuming productions were admitted earlier: their slots come first
+        if any(self._has_slot(subject_id) for subject_id in self._resuming):
+            return
+        while self._active < self.max_workers:
+            request = self._next_eligible()
+            if request is None:
+                return
+            self._acquire(request)
+            self.metrics["started"] += 1
+            self._wait_total += time.monotonic() - request.enqueued_at
+            self._notify(request, "started")
+            task = self._loop.create_task(self._run(request), name=f"production-{request.task_id}")
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, request: ScheduledProduction) -> None:
+        _CURRENT_REQUEST.set(request)
+        try:
+            await request.factory()
+            self.metrics["completed"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.metrics["failed"] += 1
+            logger.error(f"SCHEDULER: Production {request.task_id} failed: {e}")
+        finally:
+            async with self._wakeup:
+                self._release(request)
+                self._wakeup.notify_all()
+
+
+# Global Singleton
+_SCHEDULER: Optional[ProductionScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_production_scheduler() -> ProductionScheduler:
+    """Returns the process-wide production scheduler configured from settings."""
+    global _SCHEDULER
+
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = ProductionScheduler(
+                max_workers=settings.SCHEDULER_MAX_WORKERS,
+                per_muse_limit=settings.SCHEDULER_PER_MUSE_LIMIT,
+                max_queue=settings.SCHEDULER_MAX_QUEUE
+            )
+    return _SCHEDULER
@@ -4,6 +4,7 @@ import redis
 from redis.backoff import ExponentialBackoff
 from redis.retry import Retry
 from app.core.config import settings
+from app.core.tracing import instrument_redis
 
 # Robust retry logic
 _REDIS_RETRY = Retry(ExponentialBackoff(), 3)
@@ -27,4 +28,4 @@ def get_redis_client() -> redis.Redis:
     Returns:
         redis.Redis: A Redis client instance.
     """
-    return redis.Redis(connection_pool=_REDIS_POOL)
+    return instrument_redis(redis.Redis(connection_pool=_REDIS_POOL))
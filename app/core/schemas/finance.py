@@ -27,6 +27,16 @@ class Transaction(BaseModel):
     description: str
     metadata: Optional[dict] = Field(default_factory=dict)
 
+class LedgerEntry(BaseModel):
+    """A transaction to record (see LedgerService.record_transactions)."""
+    wallet_address: str
+    type: TransactionType
+    category: TransactionCategory
+    amount: float = Field(..., gt=0)
+    description: str
+    metadata: Optional[dict] = Field(default_factory=dict)
+    hold_id: Optional[str] = Field(None, description="Budget hold settled by this transaction")
+
 class SolvencyCheck(BaseModel):
     """Result of the imperative solvency verification."""
     is_authorized: bool = Field(..., description="Is the action financially authorized?")
@@ -34,6 +44,13 @@ class SolvencyCheck(BaseModel):
     reasoning: str = Field(..., description="Justification based on Hard Constraints")
     circuit_breaker_active: bool = False
 
+class BudgetHold(BaseModel):
+    """An amount reserved on a wallet until it is settled, released or expires."""
+    hold_id: str
+    wallet_address: str
+    amount: float = Field(..., ge=0)
+    expires_at: datetime
+
 class LedgerHistory(BaseModel):
     """Represents the financial history of the Muse."""
     transactions: List[Transaction] = Field(default_factory=list)
@@ -0,0 +1,39 @@
+"""Schemas for tracked background productions."""
+
+from typing import Any, Dict, List, Optional
+from enum import Enum
+from datetime import datetime, timezone
+from pydantic import BaseModel, Field
+
+class ProductionState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    AWAITING_APPROVAL = "awaiting_approval"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SHED = "shed"
+
+ACTIVE_STATES = (ProductionState.QUEUED, ProductionState.RUNNING, ProductionState.AWAITING_APPROVAL)
+
+class StageTiming(BaseModel):
+    """Wall-clock timing of one pipeline stage."""
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+
+class ProductionRecord(BaseModel):
+    """Live status of a production, keyed by its task ID."""
+    task_id: str
+    subject_id: str
+    intent: str = ""
+    state: ProductionState = Field(default=ProductionState.QUEUED)
+    priority: float = 0.0
+    current_stages: List[str] = Field(default_factory=list, description="Stages currently executing")
+    stage_timings: Dict[str, StageTiming] = Field(default_factory=dict)
+    cost_so_far: float = Field(0.0, description="Estimated USD spent by completed paid stages")
+    artifacts: Dict[str, Any] = Field(default_factory=dict, description="Final outputs (review path, title, cost)")
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -36,3 +36,14 @@ class QAReport(BaseModel):
     failures: List[QAFailure] = Field(default_factory=list)
     final_decision: str = Field(..., description="'APPROVED', 'REJECTED', or 'REPAIR_REQUIRED'")
 
+
+class ImageArtifacts(BaseModel):
+    """Artifacts found in one image of a batched audit."""
+    image_index: int = Field(..., ge=0, description="0-based position of the image in the request")
+    failures: List[QAFailure] = Field(default_factory=list)
+
+
+class AreaDetection(BaseModel):
+    """Bounding box of one area of a batched mask detection."""
+    area_index: int = Field(..., ge=0, description="0-based position of the area in the request")
+    box_2d: Optional[List[int]] = Field(None, description="[ymin, xmin, ymax, xmax] coordinates normalized 0-1000")
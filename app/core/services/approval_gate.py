@@ -0,0 +1,185 @@
+"""Event-driven HITL approval gate (Redis pub/sub instead of polling)."""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import redis
+
+logger = logging.getLogger(__name__)
+
+APPROVAL_CHANNEL = "smos:swarm:approvals"
+APPROVAL_ACTIONS = ("approve", "reject")
+
+
+def approval_key(task_id: str) -> str:
+    return f"smos:swarm:approve:{task_id}"
+
+
+class ApprovalGate:
+    """Suspends productions at HITL gates as awaitables.
+
+    Decisions are written to the task's approval key and published on
+    APPROVAL_CHANNEL. A single daemon listener resolves the futures of every
+    waiting production, so paused productions hold no thread and an approval
+    resumes its production as soon as the message arrives. The key covers
+    decisions sent before the production reached its gate, and is re-read
+    after each (re)subscription so no signal is lost in between.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        channel: str = APPROVAL_CHANNEL,
+        signal_ttl_seconds: int = 3600
+    ):
+        self.redis = redis_client
+        self.channel = channel
+        self.signal_ttl_seconds = signal_ttl_seconds
+        # task_id -> [(loop, future)]
+        self._waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+
+    def signal(self, task_id: str, action: str) -> None:
+        """Delivers a human decision ('approve' or 'reject') to a paused task."""
+        if action not in APPROVAL_ACTIONS:
+            raise ValueError(f"Unknown HITL action '{action}'. Expected one of {APPROVAL_ACTIONS}.")
+        self.redis.set(approval_key(task_id), action, ex=self.signal_ttl_seconds)
+        self.redis.publish(self.channel, json.dumps({"task_id": task_id, "action": action}))
+        # Same-process waiters do not need the pub/sub round trip
+        self._resolve(task_id, action)
+
+    async def wait(self, task_id: str, timeout: float = 300.0) -> Optional[str]:
+        """Waits for the decision on a task.
+
+        Args:
+            task_id: The paused task.
+            timeout: Maximum wait in seconds.
+
+        Returns:
+            Optional[str]: 'approve' or 'reject', or None on timeout.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._waiters.setdefault(task_id, []).append((loop, future))
+        try:
+            self._ensure_listener()
+            existing = self._decode(await asyncio.to_thread(self.redis.get, approval_key(task_id)))
+            if existing:
+                return existing
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._discard(task_id, future)
+
+    def waiting(self) -> int:
+        """Number of productions currently suspended at a gate."""
+        with self._lock:
+            return sum(len(w) for w in self._waiters.values())
+
+    # --- Internals ---
+
+    @staticmethod
+    def _decode(value: Any) -> Optional[str]:
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value if value in APPROVAL_ACTIONS else None
+
+    def _discard(self, task_id: str, future: asyncio.Future) -> None:
+        with self._lock:
+            waiters = [w for w in self._waiters.get(task_id, []) if w[1] is not future]
+            if waiters:
+                self._waiters[task_id] = waiters
+            else:
+                self._waiters.pop(task_id, None)
+
+    def _resolve(self, task_id: str, action: str) -> None:
+        with self._lock:
+            waiters = list(self._waiters.get(task_id, []))
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(self._set_result, future, action)
+            except RuntimeError:
+                pass  # Waiter's loop already closed
+
+    @staticmethod
+    def _set_result(future: asyncio.Future, action: str) -> None:
+        if not future.done():
+            future.set_result(action)
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name="hitl-approvals", daemon=True)
+            self._listener.start()
+
+    def _listen(self) -> None:
+        """Dispatches published decisions while at least one task is waiting."""
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub()
+                pubsub.subscribe(self.channel)
+                self._await_subscription(pubsub)
+                self._sweep()
+
+                while True:
+                    with self._lock:
+                        if not self._waiters:
+                            self._listener = None
+                            return
+                    message = self._next_message(pubsub, timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._handle_message(message["data"])
+            except Exception as e:
+                logger.warning(f"HITL_GATE: Approval listener error, resubscribing: {e}")
+                time.sleep(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    @staticmethod
+    def _next_message(pubsub: Any, timeout: float) -> Optional[Dict[str, Any]]:
+        """Blocks up to `timeout` for the next pub/sub message."""
+        start = time.monotonic()
+        message = pubsub.get_message(timeout=timeout)
+        if isinstance(message, dict):
+            return message
+        # A read that returned early without a message must not turn into a busy loop
+        time.sleep(max(0.0, min(0.1, timeout - (time.monotonic() - start))))
+        return None
+
+    def _await_subscription(self, pubsub: Any, timeout: float = 5.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            message = self._next_message(pubsub, timeout=0.5)
+            if message and message.get("type") == "subscribe":
+                return
+
+    def _sweep(self) -> None:
+        """Resolves waiters whose decision was written while unsubscribed."""
+        with self._lock:
+            task_ids = list(self._waiters)
+        for task_id in task_ids:
+            action = self._decode(self.redis.get(approval_key(task_id)))
+            if action:
+                self._resolve(task_id, action)
+
+    def _handle_message(self, data: Any) -> None:
+        try:
+            payload = json.loads(data)
+            task_id, action = payload["task_id"], payload["action"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"HITL_GATE: Ignoring malformed approval message: {data!r}")
+            return
+        if action in APPROVAL_ACTIONS:
+            self._resolve(task_id, action)
@@ -0,0 +1,218 @@
+"""Durable per-stage checkpoints of productions (Redis-backed)."""
+
+import base64
+import datetime
+import enum
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+import redis
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+INPUTS_FIELD = "__inputs__"
+
+# Tags of the JSON values that are not plain JSON types
+MODEL_TAG = "__model__"
+BYTES_TAG = "__bytes__"
+DATETIME_TAG = "__datetime__"
+BLOB_TAG = "__blob__"
+
+
+class CheckpointStore:
+    """Persists each completed stage output of a production.
+
+    A production is one Redis hash (`smos:checkpoint:{production_id}`) holding
+    its inputs and one field per completed stage, so a crashed, preempted or
+    timed-out production can resume without paying again for the LLM, Imagen
+    and Veo results it already obtained.
+
+    Values are stored as JSON: bytes are base64-encoded and Pydantic models
+    are dumped with their class name, then re-validated on load. Only the
+    model classes given to the store can be restored, so reading a
+    checkpoint never runs code chosen by whoever wrote it.
+
+    Byte strings above `max_inline_bytes` (renders, Veo videos) are written
+    to `blob_dir`, content-addressed per production, and the hash only holds
+    their digest. A checkpoint whose blob is gone (another host, expired)
+    loses that stage, which then simply runs again.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        ttl_seconds: int = 86400,
+        key_prefix: str = "smos:checkpoint:",
+        models: Iterable[Type[BaseModel]] = (),
+        blob_dir: Optional[str] = None,
+        max_inline_bytes: int = 64 * 1024
+    ):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self.models: Dict[str, Type[BaseModel]] = {model.__name__: model for model in models}
+        self.blob_dir = blob_dir
+        self.max_inline_bytes = max_inline_bytes
+
+        if self.blob_dir:
+            try:
+                os.makedirs(self.blob_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"CHECKPOINT: Blob storage disabled, large outputs stay inline ({e}).")
+                self.blob_dir = None
+
+    def _encode(self, value: Any, production_id: str) -> Any:
+        """Converts a stage output to JSON-compatible data (TypeError if unsupported)."""
+        if isinstance(value, BaseModel):
+            name = type(value).__name__
+            if self.models.get(name) is not type(value):
+                raise TypeError(f"model {name} is not registered")
+            return {MODEL_TAG: name, "data": self._encode(value.model_dump(), production_id)}
+        if isinstance(value, (bytes, bytearray)):
+            if self.blob_dir and len(value) > self.max_inline_bytes:
+                return {BLOB_TAG: self._write_blob(production_id, bytes(value))}
+            return {BYTES_TAG: base64.b64encode(value).decode("ascii")}
+        if isinstance(value, datetime.datetime):
+            return {DATETIME_TAG: value.isoformat()}
+        if isinstance(value, enum.Enum):
+            return self._encode(value.value, production_id)
+        if isinstance(value, dict):
+            return {str(k): self._encode(v, production_id) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._encode(v, production_id) for v in value]
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        raise TypeError(f"{type(value).__name__} is not JSON-serializable")
+
+    def _decode(self, data: Any, production_id: str) -> Any:
+        if isinstance(data, list):
+            return [self._decode(v, production_id) for v in data]
+        if not isinstance(data, dict):
+            return data
+        if MODEL_TAG in data:
+            model = self.models.get(data[MODEL_TAG])
+            if model is None:
+                raise ValueError(f"model {data[MODEL_TAG]} is not registered")
+            return model.model_validate(self._decode(data["data"], production_id))
+        if BYTES_TAG in data:
+            return base64.b64decode(data[BYTES_TAG])
+        if BLOB_TAG in data:
+            return self._read_blob(production_id, data[BLOB_TAG])
+        if DATETIME_TAG in data:
+            return datetime.datetime.fromisoformat(data[DATETIME_TAG])
+        return {k: self._decode(v, production_id) for k, v in data.items()}
+
+    # --- Blob storage ---
+
+    def _production_blob_dir(self, production_id: str) -> str:
+        if not self.blob_dir:
+            raise ValueError("blob storage is disabled")
+        return os.path.join(self.blob_dir, hashlib.sha256(production_id.encode("utf-8")).hexdigest())
+
+    def _blob_path(self, production_id: str, digest: str) -> str:
+        if not digest.isalnum():
+            raise ValueError(f"invalid blob digest {digest!r}")
+        return os.path.join(self._production_blob_dir(production_id), f"{digest}.bin")
+
+    def _write_blob(self, production_id: str, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(production_id, digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def _read_blob(self, production_id: str, digest: str) -> bytes:
+        try:
+            with open(self._blob_path(production_id, digest), "rb") as f:
+                return f.read()
+        except OSError as e:
+            raise ValueError(f"blob {digest} is unavailable: {e}") from e
+
+    def _sweep_blobs(self) -> None:
+        """Removes the blob directories of productions older than the checkpoint TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(self.blob_dir):
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def _key(self, production_id: str) -> str:
+        return f"{self.key_prefix}{production_id}"
+
+    def _write(self, production_id: str, field: str, value: Any) -> bool:
+        try:
+            payload = json.dumps(self._encode(value, production_id))
+        except Exception as e:
+            logger.warning(f"CHECKPOINT: '{field}' of {production_id} cannot be checkpointed, skipping: {e}")
+            return False
+        try:
+            key = self._key(production_id)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(key, field, payload)
+            pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+            return True
+        except redis.RedisError as e:
+            logger.warning(f"CHECKPOINT: Failed to persist '{field}' of {production_id}: {e}")
+            return False
+
+    def save_inputs(self, production_id: str, inputs: Dict[str, Any]) -> bool:
+        """Stores the production inputs (intent, mood, subject...)."""
+        if self.blob_dir:
+            self._sweep_blobs()
+        return self._write(production_id, INPUTS_FIELD, inputs)
+
+    def save_stage(self, production_id: str, stage: str, output: Any) -> bool:
+        """Stores the output of a completed stage. Failures are non-fatal."""
+        saved = self._write(production_id, stage, output)
+        if saved:
+            logger.debug(f"CHECKPOINT: Saved stage '{stage}' of {production_id}")
+        return saved
+
+    def load(self, production_id: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Returns (inputs, completed stage outputs), or None if unknown."""
+        fields = self.redis.hgetall(self._key(production_id))
+        if not fields:
+            return None
+
+        inputs: Optional[Dict[str, Any]] = None
+        stages: Dict[str, Any] = {}
+        for field, payload in fields.items():
+            name = field.decode("utf-8") if isinstance(field, bytes) else field
+            try:
+                value = self._decode(json.loads(payload), production_id)
+            except Exception as e:
+                logger.warning(f"CHECKPOINT: Dropping unreadable '{name}' of {production_id}: {e}")
+                continue
+            if name == INPUTS_FIELD:
+                inputs = value
+            else:
+                stages[name] = value
+
+        if inputs is None:
+            return None
+        return inputs, stages
+
+    def completed_stages(self, production_id: str) -> List[str]:
+        """Names of the checkpointed stages of a production."""
+        fields = self.redis.hkeys(self._key(production_id))
+        names = [f.decode("utf-8") if isinstance(f, bytes) else f for f in fields]
+        return sorted(n for n in names if n != INPUTS_FIELD)
+
+    def discard(self, production_id: str) -> None:
+        """Removes every checkpoint of a production."""
+        self.redis.delete(self._key(production_id))
+        if self.blob_dir:
+            shutil.rmtree(self._production_blob_dir(production_id), ignore_errors=True)
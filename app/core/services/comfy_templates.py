@@ -0,0 +1,175 @@
+"""Compiled ComfyUI workflow templates with typed parameter slots."""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORKFLOWS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "workflows")
+
+# A slot is a JSON string that is exactly "{name}" or "{name:type}"
+_SLOT_PATTERN = re.compile(r"^\{([A-Za-z_][A-Za-z0-9_]*)(?::(str|int|float|bool))?\}$")
+_SLOT_TYPES = {"str": str, "int": int, "float": float, "bool": bool}
+
+
+class TemplateError(ValueError):
+    """Raised when a workflow template is invalid or bound with bad values."""
+
+
+class Slot:
+    """A typed parameter and the node inputs it is bound into."""
+
+    def __init__(self, name: str, type_: type):
+        self.name = name
+        self.type = type_
+        self.targets: List[Tuple[str, str]] = []  # (node_id, input_name)
+
+    def coerce(self, value: Any) -> Any:
+        """Validates a value against the slot type (ints are accepted as floats)."""
+        if self.type is float and isinstance(value, int) and not isinstance(value, bool):
+            return float(value)
+        if not isinstance(value, self.type) or (self.type is not bool and isinstance(value, bool)):
+            raise TemplateError(
+                f"Slot '{self.name}' expects {self.type.__name__}, got {type(value).__name__}."
+            )
+        return value
+
+
+class WorkflowTemplate:
+    """A validated ComfyUI API graph compiled once, bound per render.
+
+    Binding never re-parses JSON or substitutes text: values are type-checked
+    and assigned as Python objects, so a prompt can never alter the graph
+    structure. Only the nodes owning a slot are copied (copy-on-write); all
+    other nodes are shared with the compiled graph and must be treated as
+    read-only by callers.
+    """
+
+    def __init__(self, name: str, graph: Dict[str, Any]):
+        self.name = name
+        self.graph = graph
+        self.slots: Dict[str, Slot] = {}
+        self._compile()
+
+    def _compile(self) -> None:
+        if not isinstance(self.graph, dict) or not self.graph:
+            raise TemplateError(f"Workflow '{self.name}' must be a non-empty node mapping.")
+
+        for node_id, node in self.graph.items():
+            if not isinstance(node, dict) or "class_type" not in node or not isinstance(node.get("inputs"), dict):
+                raise TemplateError(f"Workflow '{self.name}': node {node_id} needs 'class_type' and 'inputs'.")
+            for input_name, value in node["inputs"].items():
+                if isinstance(value, list) and len(value) == 2 and isinstance(value[0], str):
+                    if value[0] not in self.graph:
+                        raise TemplateError(
+                            f"Workflow '{self.name}': node {node_id}.{input_name} links to missing node {value[0]}."
+                        )
+                elif isinstance(value, str):
+                    match = _SLOT_PATTERN.match(value)
+                    if match:
+                        self._declare(match.group(1), _SLOT_TYPES[match.group(2) or "str"], node_id, input_name)
+
+    def _declare(self, name: str, type_: type, node_id: str, input_name: str) -> None:
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = Slot(name, type_)
+        elif slot.type is not type_:
+            raise TemplateError(f"Workflow '{self.name}': slot '{name}' declared as both "
+                                f"{slot.type.__name__} and {type_.__name__}.")
+        slot.targets.append((node_id, input_name))
+
+    def bind(self, **values: Any) -> Dict[str, Any]:
+        """Returns a render-ready graph with every slot bound.
+
+        Raises:
+            TemplateError: On unknown, missing or mistyped slot values.
+        """
+        unknown = set(values) - set(self.slots)
+        if unknown:
+            raise TemplateError(f"Workflow '{self.name}' has no slot(s) {sorted(unknown)}.")
+        missing = set(self.slots) - set(values)
+        if missing:
+            raise TemplateError(f"Workflow '{self.name}' is missing value(s) for {sorted(missing)}.")
+
+        bound = dict(self.graph)
+        copied = set()
+        for name, slot in self.slots.items():
+            value = slot.coerce(values[name])
+            for node_id, input_name in slot.targets:
+                if node_id not in copied:
+                    node = bound[node_id]
+                    bound[node_id] = {**node, "inputs": dict(node["inputs"])}
+                    copied.add(node_id)
+                bound[node_id]["inputs"][input_name] = value
+        return bound
+
+
+class WorkflowTemplateRegistry:
+    """Named, pre-compiled workflow templates shared by the whole process."""
+
+    def __init__(self):
+        self._templates: Dict[str, WorkflowTemplate] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, graph: Dict[str, Any]) -> WorkflowTemplate:
+        """Compiles and registers a graph (replacing any previous version)."""
+        template = WorkflowTemplate(name, graph)
+        with self._lock:
+            self._templates[name] = template
+        return template
+
+    def load_directory(self, directory: str = WORKFLOWS_DIR) -> List[str]:
+        """Compiles every `*.json` workflow of a directory, named by file stem.
+
+        Invalid files are logged and skipped so one bad template cannot take
+        the others down.
+        """
+        loaded = []
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json"):
+                continue
+            name = filename[:-len(".json")]
+            try:
+                with open(os.path.join(directory, filename), "r") as f:
+                    self.register(name, json.load(f))
+                loaded.append(name)
+            except (OSError, ValueError) as e:
+                logger.error(f"COMFY_UI: Invalid workflow template '{filename}': {e}")
+        logger.info(f"COMFY_UI: Compiled workflow templates: {loaded}")
+        return loaded
+
+    def get(self, name: str) -> WorkflowTemplate:
+        with self._lock:
+            template = self._templates.get(name)
+        if template is None:
+            raise KeyError(f"Unknown workflow template '{name}'.")
+        return template
+
+    def render(self, name: str, **values: Any) -> Dict[str, Any]:
+        """Binds values into a registered template."""
+        return self.get(name).bind(**values)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._templates)
+
+
+# Global Singleton
+_REGISTRY: Optional[WorkflowTemplateRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_workflow_registry() -> WorkflowTemplateRegistry:
+    """Returns the process-wide registry, compiling app/core/workflows on first use."""
+    global _REGISTRY
+
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            registry = WorkflowTemplateRegistry()
+            registry.load_directory()
+            _REGISTRY = registry
+    return _REGISTRY
@@ -1,6 +1,7 @@
 """Identity-Locked Workflow implementation using ComfyScript concepts."""
 
 from typing import Dict, Any, List, Optional
+from app.core.services.comfy_templates import WorkflowTemplate
 
 class IdentityLockedWorkflow:
     """Generates ComfyUI workflow JSON for identity-locked production.
@@ -13,30 +14,20 @@ class IdentityLockedWorkflow:
 
     def __init__(self, checkpoint: str = "sdxl_base_v1.0.safetensors"):
         self.checkpoint = checkpoint
+        # Compiled once; each call only binds values (copy-on-write)
+        self._templates = {
+            with_pose: WorkflowTemplate(
+                f"identity_locked{'_pose' if with_pose else ''}", self._graph(with_pose)
+            )
+            for with_pose in (False, True)
+        }
 
-    def build_workflow(
-        self, 
-        prompt: str, 
-        face_master_path: str,
-        pose_ref_path: Optional[str] = None,
-        pulid_weight: float = 0.8,
-        faceid_weight: float = 0.5,
-        parameters: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
-        """Builds the nodal graph for ComfyUI API with dynamic parameters."""
-        
-        # Inject dynamic look and lighting into prompt
-        enhanced_prompt = prompt
-        if parameters:
-            look = parameters.get("look", "")
-            lighting = parameters.get("lighting", "")
-            if look: enhanced_prompt += f", {look} style"
-            if lighting: enhanced_prompt += f", {lighting} lighting"
-
+    def _graph(self, with_pose: bool) -> Dict[str, Any]:
+        """Declares the nodal graph with typed parameter slots."""
         # This is a conceptual mapping of the Python-based ComfyScript 
         workflow = {
             "1": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": self.checkpoint}},
-            "2": {"class_type": "CLIPTextEncode", "inputs": {"text": enhanced_prompt, "clip": ["1", 1]}},
+            "2": {"class_type": "CLIPTextEncode", "inputs": {"text": "{prompt:str}", "clip": ["1", 1]}},
 
             "3": {"class_type": "CLIPTextEncode", "inputs": {"text": "low quality, blurry, distorted", "clip": ["1", 1]}},
             
@@ -45,9 +36,9 @@ class IdentityLockedWorkflow:
                 "class_type": "PuLID_Apply",
                 "inputs": {
                     "model": ["1", 0],
-                    "image": face_master_path,
+                    "image": "{face_master_path:str}",
                     "method": "insightface",
-                    "weight": pulid_weight,
+                    "weight": "{pulid_weight:float}",
                     "gn_weight": 1.0
                 }
             },
@@ -57,8 +48,8 @@ class IdentityLockedWorkflow:
                 "class_type": "IPAdapterFaceID",
                 "inputs": {
                     "model": ["4", 0],
-                    "image": face_master_path,
-                    "weight": faceid_weight,
+                    "image": "{face_master_path:str}",
+                    "weight": "{faceid_weight:float}",
                     "noise": 0.0
                 }
             },
@@ -108,14 +99,13 @@ class IdentityLockedWorkflow:
             }
         }
 
-
-        if pose_ref_path:
+        if with_pose:
             workflow["9"] = {
                 "class_type": "ControlNetApply",
                 "inputs": {
                     "model": ["5", 0],
                     "control_net": "control_openpose.safetensors",
-                    "image": pose_ref_path,
+                    "image": "{pose_ref_path:str}",
                     "strength": 0.7
                 }
             }
@@ -123,3 +113,32 @@ class IdentityLockedWorkflow:
             workflow["6"]["inputs"]["model"] = ["9", 0]
 
         return workflow
+
+    def build_workflow(
+        self, 
+        prompt: str, 
+        face_master_path: str,
+        pose_ref_path: Optional[str] = None,
+        pulid_weight: float = 0.8,
+        faceid_weight: float = 0.5,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Binds dynamic parameters into the compiled nodal graph for ComfyUI API."""
+        
+        # Inject dynamic look and lighting into prompt
+        enhanced_prompt = prompt
+        if parameters:
+            look = parameters.get("look", "")
+            lighting = parameters.get("lighting", "")
+            if look: enhanced_prompt += f", {look} style"
+            if lighting: enhanced_prompt += f", {lighting} lighting"
+
+        values = {
+            "prompt": enhanced_prompt,
+            "face_master_path": face_master_path,
+            "pulid_weight": pulid_weight,
+            "faceid_weight": faceid_weight
+        }
+        if pose_ref_path:
+            values["pose_ref_path"] = pose_ref_path
+        return self._templates[bool(pose_ref_path)].bind(**values)
@@ -1,17 +1,112 @@
 """Service for managing the financial ledger and wallet operations."""
 
+import datetime
 import json
 import logging
+import time
 import uuid
-import redis
 from typing import List, Optional
+from app.core.config import settings
 from app.core.redis_client import get_redis_client
 from app.state.models import Wallet
 from app.state.db_access import StateManager
-from app.core.schemas.finance import Transaction, TransactionType, TransactionCategory
+from app.core.schemas.finance import Transaction, TransactionType, TransactionCategory, BudgetHold, LedgerEntry
+from app.core.finance.spend_tracker import SpendTracker, MINUTE_BUCKET_TTL_SECONDS, DAY_BUCKET_TTL_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# Drops the expired holds of a wallet and sums the others (except `skip`).
+# Holds live in a hash (id -> amount) next to a sorted set of expiry times.
+HELD_AMOUNT_LUA = """
+local function held_amount(holds_key, expiry_key, now, skip)
+    local expired = redis.call('ZRANGEBYSCORE', expiry_key, '-inf', now)
+    if #expired > 0 then
+        redis.call('HDEL', holds_key, unpack(expired))
+        redis.call('ZREMRANGEBYSCORE', expiry_key, '-inf', now)
+    end
+    local total = 0
+    local holds = redis.call('HGETALL', holds_key)
+    for i = 1, #holds, 2 do
+        if holds[i] ~= skip then
+            total = total + tonumber(holds[i + 1])
+        end
+    end
+    return total
+end
+"""
+
+# Seeds the numeric balance key from the wallet document (wallets written
+# before it existed) and returns the balance.
+SEED_BALANCE_LUA = """
+local function seeded_balance(wallet_key, balance_key)
+    if redis.call('EXISTS', balance_key) == 0 then
+        local wallet = cjson.decode(redis.call('GET', wallet_key))
+        redis.call('SET', balance_key, string.format('%.17g', tonumber(wallet['internal_usd_balance']) or 0))
+    end
+    return tonumber(redis.call('GET', balance_key))
+end
+"""
+
+# Applies a batch of transactions (one or many wallets) atomically on the server.
+# KEYS, 7 per transaction: wallet document, numeric USD balance, history list,
+#       minute and day spend buckets, holds hash, holds expiry set
+# ARGV, 4 per transaction: signed amount, transaction JSON, spend (0 for
+#       income), hold id to settle ('' for none); then the minute and day
+#       bucket TTLs
+# Nothing is applied if a wallet is unknown: returns the (1-based) position of
+# its transaction. Otherwise returns the balance after each transaction.
+APPLY_TRANSACTIONS_LUA = SEED_BALANCE_LUA + """
+local count = #KEYS / 7
+for i = 0, count - 1 do
+    if redis.call('EXISTS', KEYS[i * 7 + 1]) == 0 then
+        return i + 1
+    end
+end
+local minute_ttl, day_ttl = ARGV[#ARGV - 1], ARGV[#ARGV]
+local balances = {}
+for i = 0, count - 1 do
+    local k, a = i * 7, i * 4
+    seeded_balance(KEYS[k + 1], KEYS[k + 2])
+    balances[i + 1] = redis.call('INCRBYFLOAT', KEYS[k + 2], ARGV[a + 1])
+    redis.call('RPUSH', KEYS[k + 3], ARGV[a + 2])
+    if tonumber(ARGV[a + 3]) > 0 then
+        redis.call('INCRBYFLOAT', KEYS[k + 4], ARGV[a + 3])
+        redis.call('EXPIRE', KEYS[k + 4], minute_ttl)
+        redis.call('INCRBYFLOAT', KEYS[k + 5], ARGV[a + 3])
+        redis.call('EXPIRE', KEYS[k + 5], day_ttl)
+    end
+    if ARGV[a + 4] ~= '' then
+        redis.call('HDEL', KEYS[k + 6], ARGV[a + 4])
+        redis.call('ZREM', KEYS[k + 7], ARGV[a + 4])
+    end
+end
+return balances
+"""
+
+# Reserves an amount if the balance minus the outstanding holds covers it.
+# KEYS: wallet document, numeric USD balance, holds hash, holds expiry set
+# ARGV: hold id, amount, expiry (epoch seconds), now (epoch seconds)
+# Placing an existing hold id again replaces it. Returns {placed (1/0),
+# available balance after the call}, or false if the wallet is unknown.
+PLACE_HOLD_LUA = HELD_AMOUNT_LUA + SEED_BALANCE_LUA + """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local available = seeded_balance(KEYS[1], KEYS[2]) - held_amount(KEYS[3], KEYS[4], ARGV[4], ARGV[1])
+local amount = tonumber(ARGV[2])
+if available < amount then
+    return {0, string.format('%.17g', available)}
+end
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[4], ARGV[3], ARGV[1])
+return {1, string.format('%.17g', available - amount)}
+"""
+
+# KEYS: holds hash, holds expiry set. ARGV: now. Returns the held total.
+GET_HELD_LUA = HELD_AMOUNT_LUA + """
+return string.format('%.17g', held_amount(KEYS[1], KEYS[2], ARGV[1], ''))
+"""
+
 class LedgerService:
     """Manages financial transactions and ensures atomicity of wallet updates."""
 
@@ -19,6 +114,15 @@ class LedgerService:
         self.redis = get_redis_client()
         self.state_manager = StateManager()
         self.history_key_prefix = "smos:finance:history:"
+        self.holds_key_prefix = "smos:finance:holds:"
+        self.spend = SpendTracker(self.redis)
+        self._apply_transactions = self.redis.register_script(APPLY_TRANSACTIONS_LUA)
+        self._place_hold = self.redis.register_script(PLACE_HOLD_LUA)
+        self._get_held = self.redis.register_script(GET_HELD_LUA)
+
+    def _hold_keys(self, wallet_address: str) -> List[str]:
+        holds_key = f"{self.holds_key_prefix}{wallet_address}"
+        return [holds_key, f"{holds_key}:expiry"]
 
     def record_transaction(
         self,
@@ -27,62 +131,155 @@ class LedgerService:
         category: TransactionCategory,
         amount: float,
         description: str,
-        metadata: Optional[dict] = None
+        metadata: Optional[dict] = None,
+        hold_id: Optional[str] = None
     ) -> Transaction:
-        """Records a transaction and updates the wallet balance atomically."""
-        
-        tx_id = str(uuid.uuid4())[:8]
-        tx = Transaction(
-            transaction_id=tx_id,
+        """Records a transaction and updates the wallet balance atomically.
+
+        The balance increment, the history append and the spend buckets
+        update run in one server-side script, so concurrent writers to the
+        same wallet never conflict or retry. Passing `hold_id` settles that
+        budget hold in the same script (see place_hold).
+        """
+        return self.record_transactions([LedgerEntry(
+            wallet_address=wallet_address,
             type=tx_type,
             category=category,
             amount=amount,
             description=description,
-            metadata=metadata or {}
+            metadata=metadata or {},
+            hold_id=hold_id
+        )])[0]
+
+    def record_transactions(self, entries: List[LedgerEntry]) -> List[Transaction]:
+        """Records a batch of transactions, for one or many wallets, in one atomic script call.
+
+        The whole batch is validated before anything is sent, then every
+        balance delta, history append, spend bucket and hold settlement is
+        applied in a single round trip: either all transactions commit or,
+        if a wallet is unknown, none do.
+
+        Returns:
+            The committed transactions, in the order of `entries`.
+
+        Raises:
+            ValueError: If an entry is invalid or a wallet does not exist.
+        """
+        if not entries:
+            return []
+
+        transactions = [
+            Transaction(
+                transaction_id=str(uuid.uuid4())[:8],
+                type=entry.type,
+                category=entry.category,
+                amount=entry.amount,
+                description=entry.description,
+                metadata=entry.metadata or {}
+            )
+            for entry in entries
+        ]
+
+        keys, args = [], []
+        for entry, tx in zip(entries, transactions):
+            address = entry.wallet_address
+            is_expense = tx.type == TransactionType.EXPENSE
+            keys += [
+                f"{self.state_manager.wallet_key_prefix}{address}",
+                self.state_manager.wallet_balance_key(address),
+                f"{self.history_key_prefix}{address}",
+                *self.spend.bucket_keys(address, tx.timestamp.timestamp()),
+                *self._hold_keys(address)
+            ]
+            args += [
+                repr(-tx.amount if is_expense else tx.amount),
+                tx.model_dump_json(),
+                repr(tx.amount if is_expense else 0.0),
+                entry.hold_id or ""
+            ]
+        args += [MINUTE_BUCKET_TTL_SECONDS, DAY_BUCKET_TTL_SECONDS]
+
+        balances = self._apply_transactions(keys=keys, args=args)
+        if not isinstance(balances, list):
+            missing = entries[int(balances or 1) - 1].wallet_address
+            raise ValueError(f"Wallet with address {missing} not found.")
+
+        for entry, tx, balance in zip(entries, transactions, balances):
+            logger.info(f"Recorded {tx.type} of {tx.amount} for {entry.wallet_address}. New internal balance: {float(balance)}")
+
+        return transactions
+
+    def place_hold(
+        self,
+        wallet_address: str,
+        amount: float,
+        hold_id: Optional[str] = None,
+        ttl_seconds: Optional[int] = None
+    ) -> Optional[BudgetHold]:
+        """Reserves `amount` against the balance not already held.
+
+        The hold is settled by record_transaction(..., hold_id=...) with the
+        actual cost, dropped by release_hold, or expires after `ttl_seconds`
+        (default LEDGER_HOLD_TTL_SECONDS) if its owner died.
+
+        Returns:
+            The hold, or None if the available balance does not cover it.
+
+        Raises:
+            ValueError: If the wallet does not exist.
+        """
+        hold_id = hold_id or str(uuid.uuid4())[:8]
+        ttl = settings.LEDGER_HOLD_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        now = time.time()
+        result = self._place_hold(
+            keys=[
+                f"{self.state_manager.wallet_key_prefix}{wallet_address}",
+                self.state_manager.wallet_balance_key(wallet_address),
+                *self._hold_keys(wallet_address)
+            ],
+            args=[hold_id, repr(amount), repr(now + ttl), repr(now)]
         )
+        if result is None:
+            raise ValueError(f"Wallet with address {wallet_address} not found.")
 
-        # 1. Update Wallet Balance atomically using Redis WATCH
-        wallet_key = f"smos:state:wallet:{wallet_address}"
-        MAX_RETRIES = 5
-        
+        placed, available = int(result[0]), float(result[1])
+        if not placed:
+            logger.warning(f"LEDGER_HOLD: Hold {hold_id} of {amount} refused for {wallet_address}. Available: {available}")
+            return None
+        logger.info(f"LEDGER_HOLD: Held {amount} for {wallet_address} ({hold_id}). Available: {available}")
+        return BudgetHold(
+            hold_id=hold_id,
+            wallet_address=wallet_address,
+            amount=amount,
+            expires_at=datetime.datetime.fromtimestamp(now + ttl, datetime.timezone.utc)
+        )
+
+    def release_hold(self, wallet_address: str, hold_id: str) -> bool:
+        """Drops a hold without spending it. Returns False if it was already gone."""
+        holds_key, expiry_key = self._hold_keys(wallet_address)
         with self.redis.pipeline() as pipe:
-            for attempt in range(MAX_RETRIES):
-                try:
-                    pipe.watch(wallet_key)
-                    
-                    # Get current wallet state
-                    wallet_data = pipe.get(wallet_key)
-                    if not wallet_data:
-                        raise ValueError(f"Wallet with address {wallet_address} not found.")
-                    
-                    wallet = Wallet.model_validate_json(wallet_data)
-                    
-                    # Apply transaction
-                    if tx_type == TransactionType.EXPENSE:
-                        wallet.internal_usd_balance -= amount
-                    else:
-                        wallet.internal_usd_balance += amount
-                    
-                    # Transactional update
-                    pipe.multi()
-                    pipe.set(wallet_key, wallet.model_dump_json())
-                    
-                    # Append to history in the same transaction
-                    history_key = f"{self.history_key_prefix}{wallet_address}"
-                    pipe.rpush(history_key, tx.model_dump_json())
-                    
-                    pipe.execute()
-                    break # Success
-                except redis.WatchError:
-                    # Target key changed, retry
-                    if attempt == MAX_RETRIES - 1:
-                        logger.error(f"LEDGER: Max retries ({MAX_RETRIES}) reached for wallet {wallet_address}. Aborting.")
-                        raise RuntimeError(f"Failed to update wallet {wallet_address} after max retries due to concurrency.")
-                    continue
-
-        logger.info(f"Recorded {tx_type} of {amount} for {wallet_address}. New internal balance: {wallet.internal_usd_balance}")
-        
-        return tx
+            pipe.hdel(holds_key, hold_id)
+            pipe.zrem(expiry_key, hold_id)
+            released, _ = pipe.execute()
+        if released:
+            logger.info(f"LEDGER_HOLD: Released hold {hold_id} for {wallet_address}.")
+        return bool(released)
+
+    def get_held_amount(self, wallet_address: str) -> float:
+        """Total of the wallet's outstanding (unexpired) holds."""
+        return float(self._get_held(keys=self._hold_keys(wallet_address), args=[repr(time.time())]))
+
+    def get_wallet(self, wallet_address: str) -> Optional[Wallet]:
+        """The wallet with its daily spend and outstanding holds filled in."""
+        wallet = self.state_manager.get_wallet(wallet_address)
+        if wallet is not None:
+            wallet.daily_spend = self.spend.spend_today(wallet_address)
+            wallet.held_usd = self.get_held_amount(wallet_address)
+        return wallet
+
+    def get_hourly_spend(self, wallet_address: str) -> float:
+        """Expenses of the trailing hour (circuit breaker window)."""
+        return self.spend.spend_last(wallet_address, 3600)
 
     def get_transaction_history(self, wallet_address: str, count: int = 50) -> List[Transaction]:
         """Retrieves the recent transaction history."""
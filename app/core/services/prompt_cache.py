@@ -0,0 +1,148 @@
+"""Two-level (in-process + Redis) memoization of LLM text rewrites."""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import redis
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a prompt: NFC, collapsed whitespace, trimmed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def instruction_version(system_instruction: str) -> str:
+    """Short fingerprint of a system instruction; editing it invalidates the cache."""
+    return hashlib.sha256(system_instruction.encode("utf-8")).hexdigest()[:12]
+
+
+class PromptCache:
+    """Caches up to `max_variants` rewrites per (input, model, instruction version).
+
+    L1 is a small in-process LRU; L2 is one Redis list per key with a TTL.
+    A sorted set tracks the last access of every L2 key so the cache stays
+    bounded to `max_entries` (least recently used keys are evicted first).
+    Redis failures degrade to L1-only operation, never to an error.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis],
+        ttl_seconds: int = 7 * 86400,
+        max_entries: int = 10000,
+        l1_size: int = 512,
+        key_prefix: str = "smos:prompt_cache:"
+    ):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.l1_size = l1_size
+        self.key_prefix = key_prefix
+        self.index_key = f"{key_prefix}index"
+        self._l1: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, int] = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def make_key(self, text: str, model: str, version: str) -> str:
+        """Digest of the normalized input scoped to a model and instruction version."""
+        material = "\x1f".join((model, version, normalize_text(text)))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> List[str]:
+        """Returns the cached variants of a key (empty on miss)."""
+        variants = self._l1_get(key)
+        if variants:
+            self.metrics["l1_hits"] += 1
+            return variants
+
+        variants = self._l2_get(key)
+        if variants:
+            self.metrics["l2_hits"] += 1
+            self._l1_put(key, variants)
+        else:
+            self.metrics["misses"] += 1
+        return variants
+
+    def add(self, key: str, value: str, max_variants: int = 1) -> List[str]:
+        """Appends a rewrite to a key (ignoring duplicates) and returns its variants."""
+        variants = self._l1_get(key) or self._l2_get(key)
+        if value in variants or len(variants) >= max_variants:
+            return variants
+        variants = variants + [value]
+        self._l1_put(key, variants)
+        self._l2_append(key, value, max_variants)
+        self.metrics["writes"] += 1
+        return variants
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._l1.clear()
+
+    # --- L1 ---
+
+    def _l1_get(self, key: str) -> List[str]:
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return []
+            expires_at, variants = entry
+            if expires_at < time.monotonic():
+                del self._l1[key]
+                return []
+            self._l1.move_to_end(key)
+            return list(variants)
+
+    def _l1_put(self, key: str, variants: List[str]) -> None:
+        with self._lock:
+            self._l1[key] = (time.monotonic() + self.ttl_seconds, list(variants))
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_size:
+                self._l1.popitem(last=False)
+
+    # --- L2 ---
+
+    def _l2_get(self, key: str) -> List[str]:
+        if self.redis is None:
+            return []
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.lrange(f"{self.key_prefix}{key}", 0, -1)
+            pipe.zadd(self.index_key, {key: time.time()}, xx=True)
+            values, _ = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"PROMPT_CACHE: Redis read failed, using L1 only: {e}")
+            return []
+        return [v.decode("utf-8") if isinstance(v, bytes) else v for v in values or []]
+
+    def _l2_append(self, key: str, value: str, max_variants: int) -> None:
+        if self.redis is None:
+            return
+        entry_key = f"{self.key_prefix}{key}"
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.rpush(entry_key, value)
+            pipe.ltrim(entry_key, 0, max_variants - 1)
+            pipe.expire(entry_key, self.ttl_seconds)
+            pipe.zadd(self.index_key, {key: time.time()})
+            pipe.zcard(self.index_key)
+            size = pipe.execute()[-1]
+            if size > self.max_entries:
+                self._evict(size - self.max_entries)
+        except redis.RedisError as e:
+            logger.warning(f"PROMPT_CACHE: Redis write failed: {e}")
+
+    def _evict(self, count: int) -> None:
+        stale = self.redis.zpopmin(self.index_key, count)
+        if stale:
+            keys = [k.decode("utf-8") if isinstance(k, bytes) else k for k, _ in stale]
+            self.redis.delete(*[f"{self.key_prefix}{k}" for k in keys])
+            self.metrics["evictions"] += len(keys)
@@ -0,0 +1,228 @@
+"""Opt-in semantic cache for structured-output agent calls."""
+
+import copy
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Embeds a request text into a vector
+EmbedFunc = Callable[[str], List[float]]
+
+
+class CachePolicy:
+    """Per-agent similarity threshold and time-to-live."""
+
+    __slots__ = ("threshold", "ttl_seconds")
+
+    def __init__(self, threshold: float, ttl_seconds: float):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+
+
+# Trend analyses embed live search context, so they expire fastest.
+# Librarian structures are near-deterministic for a text; be strict on similarity.
+AGENT_CACHE_POLICIES: Dict[str, CachePolicy] = {
+    "trend_scanner": CachePolicy(threshold=0.97, ttl_seconds=6 * 3600),
+    "architect": CachePolicy(threshold=0.95, ttl_seconds=24 * 3600),
+    "stylist": CachePolicy(threshold=0.95, ttl_seconds=24 * 3600),
+    "librarian": CachePolicy(threshold=0.98, ttl_seconds=7 * 86400),
+}
+
+
+def scope_key(*parts: Any) -> str:
+    """Exact-match part of a cache key (model, registry contents, constraints...)."""
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()[:16]
+
+
+class _Bucket:
+    """Embeddings (unit rows) and responses sharing one scope."""
+
+    def __init__(self, dim: int):
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.responses: List[Any] = []
+        self.expires_at: List[float] = []
+
+
+class SemanticCache:
+    """Serves a stored response when a request is close enough to a past one.
+
+    Each request is split into a free-text part, embedded and matched by
+    cosine similarity, and a scope that must match exactly (model, world or
+    wardrobe registry contents, persona constraints...). Entries are kept in
+    a local in-memory vector index with a TTL; the oldest entries are evicted
+    beyond `max_entries`. Embedding failures bypass the cache.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        embed: EmbedFunc,
+        threshold: float = 0.95,
+        ttl_seconds: float = 86400,
+        max_entries: int = 1000
+    ):
+        self.name = name
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "embed_errors": 0}
+
+    def get_or_compute(
+        self,
+        text: str,
+        scope: str,
+        compute: Callable[[], T],
+        should_store: Callable[[T], bool] = lambda response: response is not None
+    ) -> T:
+        """Returns a cached response for a similar request, or computes and stores it.
+
+        Args:
+            text: The free-text part of the request (compared semantically).
+            scope: The exact-match part of the request (see scope_key).
+            compute: Performs the actual model call.
+            should_store: Filters out responses that must not be reused.
+        """
+        try:
+            vector = self._normalize(self.embed(text))
+        except Exception as e:
+            self.metrics["embed_errors"] += 1
+            logger.warning(f"SEMANTIC_CACHE: [{self.name}] Embedding failed, bypassing cache: {e}")
+            return compute()
+
+        cached = self._lookup(vector, scope)
+        if cached is not None:
+            self.metrics["hits"] += 1
+            return cached
+
+        self.metrics["misses"] += 1
+        response = compute()
+        if should_store(response):
+            self._store(vector, scope, response)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        with self._lock:
+            entries = sum(len(b.responses) for b in self._buckets.values())
+        return {
+            **self.metrics,
+            "entries": entries,
+            "threshold": self.threshold,
+            "hit_rate": round(self.metrics["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    # --- Internals ---
+
+    @staticmethod
+    def _normalize(values: List[float]) -> np.ndarray:
+        vector = np.asarray(values, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.ndim != 1 or not norm:
+            raise ValueError("Embedding must be a non-zero 1-D vector.")
+        return vector / norm
+
+    def _lookup(self, vector: np.ndarray, scope: str) -> Optional[Any]:
+        with self._lock:
+            bucket = self._buckets.get(scope)
+            if bucket is None or not bucket.responses or bucket.vectors.shape[1] != vector.shape[0]:
+                return None
+            self._expire(bucket)
+            if not bucket.responses:
+                return None
+            similarities = bucket.vectors @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            logger.debug(f"SEMANTIC_CACHE: [{self.name}] Hit (similarity {similarities[best]:.3f})")
+            # Callers may mutate what they get back
+            return copy.deepcopy(bucket.responses[best])
+
+    def _store(self, vector: np.ndarray, scope: str, response: Any) -> None:
+        with self._lock:
+            bucket = self._buckets.get(scope)
+            if bucket is None or bucket.vectors.shape[1] != vector.shape[0]:
+                bucket = self._buckets[scope] = _Bucket(vector.shape[0])
+            self._expire(bucket)
+            bucket.vectors = np.vstack([bucket.vectors, vector[None, :]])
+            bucket.responses.append(copy.deepcopy(response))
+            bucket.expires_at.append(time.monotonic() + self.ttl_seconds)
+            self.metrics["stores"] += 1
+            self._evict_overflow()
+
+    def _expire(self, bucket: _Bucket) -> None:
+        now = time.monotonic()
+        keep = [i for i, expires in enumerate(bucket.expires_at) if expires > now]
+        if len(keep) != len(bucket.expires_at):
+            self._keep(bucket, keep)
+
+    @staticmethod
+    def _keep(bucket: _Bucket, keep: List[int]) -> None:
+        bucket.vectors = bucket.vectors[keep]
+        bucket.responses = [bucket.responses[i] for i in keep]
+        bucket.expires_at = [bucket.expires_at[i] for i in keep]
+
+    def _evict_overflow(self) -> None:
+        total = sum(len(b.responses) for b in self._buckets.values())
+        while total > self.max_entries:
+            # Entries share one TTL, so the earliest expiry is the oldest entry
+            scope, bucket = min(
+                ((s, b) for s, b in self._buckets.items() if b.responses), key=lambda sb: sb[1].expires_at[0]
+            )
+            self._keep(bucket, list(range(1, len(bucket.responses))))
+            if not bucket.responses:
+                del self._buckets[scope]
+            self.metrics["evictions"] += 1
+            total -= 1
+
+
+def _embed_with_genai(text: str) -> List[float]:
+    from app.core.vertex_init import get_genai_client
+    response = get_genai_client().models.embed_content(
+        model=settings.SEMANTIC_CACHE_EMBEDDING_MODEL,
+        contents=text
+    )
+    return response.embeddings[0].values
+
+
+# Global Singleton (one cache per agent)
+_CACHES: Dict[str, SemanticCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_semantic_cache(agent: str) -> Optional[SemanticCache]:
+    """Returns the agent's semantic cache, or None when the cache is disabled."""
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    with _CACHES_LOCK:
+        if agent not in _CACHES:
+            policy = AGENT_CACHE_POLICIES.get(agent, CachePolicy(threshold=0.97, ttl_seconds=3600))
+            _CACHES[agent] = SemanticCache(
+                agent,
+                _embed_with_genai,
+                threshold=policy.threshold,
+                ttl_seconds=policy.ttl_seconds,
+                max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES
+            )
+        return _CACHES[agent]
+
+
+def semantic_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit-rate metrics of every agent cache created so far."""
+    with _CACHES_LOCK:
+        caches = dict(_CACHES)
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -0,0 +1,348 @@
+"""Lightweight in-process tracing: timed spans, trace files, latency histograms."""
+
+import bisect
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+                      10000, 30000, 60000, 120000, 300000)
+
+# Attributes inherited by every span opened below a trace_context()
+CONTEXT_ATTRIBUTES = ("production_id", "muse_id", "attempt")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("smos_span", default=None)
+_trace_attributes: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("smos_trace", default={})
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """A timed operation (stage, model call, GCS/Redis op, A2A transition)."""
+
+    __slots__ = ("span_id", "parent_id", "name", "kind", "attributes", "start_time",
+                 "_start", "duration_ms", "thread_id", "error")
+
+    def __init__(self, name: str, kind: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.thread_id = threading.get_ident()
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._start) * 1000.0
+
+    def to_event(self) -> Dict[str, Any]:
+        """Chrome trace-event ('X' complete event), loadable in Perfetto."""
+        args = {k: v if isinstance(v, (str, int, float, bool)) or v is None else str(v)
+                for k, v in self.attributes.items()}
+        args.update({"span_id": self.span_id, "parent_id": self.parent_id})
+        if self.error:
+            args["error"] = self.error
+        return {
+            "name": self.name,
+            "cat": self.kind,
+            "ph": "X",
+            "ts": int(self.start_time * 1e6),
+            "dur": int((self.duration_ms or 0.0) * 1000),
+            "pid": os.getpid(),
+            "tid": self.thread_id,
+            "args": args
+        }
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency distribution of one span name."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+
+    def observe(self, duration_ms: float, error: bool = False) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.errors += int(error)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the overflow)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets_ms": dict(zip([*map(str, LATENCY_BUCKETS_MS), "+Inf"], self.counts))
+        }
+
+
+class Tracer:
+    """Collects spans per production and aggregates latencies per span name.
+
+    Spans of an open trace (see open_trace) are buffered, bounded, until the
+    trace is exported. Spans tagged with any other production id (e.g. A2A
+    transitions of a task) are not kept. Every span feeds the `(kind, name)`
+    latency histograms.
+    """
+
+    # Open traces kept before the oldest one is dropped (never exported)
+    MAX_OPEN_TRACES = 256
+
+    def __init__(self, enabled: bool = True, trace_dir: Optional[str] = None, max_spans_per_trace: int = 10000):
+        self.enabled = enabled
+        self.trace_dir = trace_dir
+        self.max_spans_per_trace = max_spans_per_trace
+        # production id -> spans, in opening order
+        self._traces: Dict[str, List[Span]] = {}
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes: Any) -> Iterator[Optional[Span]]:
+        """Times the enclosed block as a child of the current span."""
+        if not self.enabled:
+            yield None
+            return
+
+        inherited = {k: v for k, v in _trace_attributes.get().items() if v is not None}
+        span = Span(name, kind, _current_span.get(), {**inherited, **attributes})
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.finish()
+            self._record(span)
+
+    def _record(self, span: Span) -> None:
+        production_id = span.attributes.get("production_id")
+        with self._lock:
+            histogram = self._histograms.get((span.kind, span.name))
+            if histogram is None:
+                histogram = self._histograms[(span.kind, span.name)] = LatencyHistogram()
+            histogram.observe(span.duration_ms, error=span.error is not None)
+            spans = self._traces.get(str(production_id)) if production_id is not None else None
+            if spans is not None and len(spans) < self.max_spans_per_trace:
+                spans.append(span)
+
+    def open_trace(self, production_id: str) -> None:
+        """Starts buffering the spans of a production until export_trace."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if production_id in self._traces:
+                return
+            if len(self._traces) >= self.MAX_OPEN_TRACES:
+                dropped = next(iter(self._traces))
+                del self._traces[dropped]
+                logger.warning(f"TRACING: Too many open traces, dropping {dropped}")
+            self._traces[production_id] = []
+
+    def spans(self, production_id: str) -> List[Span]:
+        with self._lock:
+            return list(self._traces.get(production_id, []))
+
+    def export_trace(self, production_id: str, directory: Optional[str] = None) -> Optional[str]:
+        """Writes (and releases) a production's spans as a JSON trace file.
+
+        Returns:
+            Optional[str]: The file path, or None if nothing was recorded.
+        """
+        with self._lock:
+            spans = self._traces.pop(production_id, [])
+        directory = directory or self.trace_dir
+        if not spans or not directory:
+            return None
+
+        path = os.path.join(directory, f"{production_id}.trace.json")
+        payload = {
+            "traceEvents": [s.to_event() for s in sorted(spans, key=lambda s: s.start_time)],
+            "displayTimeUnit": "ms",
+            "metadata": {"production_id": production_id}
+        }
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(payload, f)
+        except OSError as e:
+            logger.warning(f"TRACING: Failed to export trace {production_id}: {e}")
+            return None
+        logger.info(f"TRACING: Exported {len(spans)} spans to {path}")
+        return path
+
+    def histograms(self, kind: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Aggregated latency summaries keyed by '<kind>:<name>'."""
+        with self._lock:
+            return {
+                f"{k}:{n}": h.summary() for (k, n), h in sorted(self._histograms.items())
+                if kind is None or k == kind
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._traces.clear()
+            self._histograms.clear()
+
+
+@contextmanager
+def trace_context(**attributes: Any) -> Iterator[None]:
+    """Sets production_id / muse_id / attempt for every span opened inside."""
+    unknown = set(attributes) - set(CONTEXT_ATTRIBUTES)
+    if unknown:
+        raise ValueError(f"Unknown trace attribute(s): {sorted(unknown)}")
+    token = _trace_attributes.set({**_trace_attributes.get(), **attributes})
+    try:
+        yield
+    finally:
+        _trace_attributes.reset(token)
+
+
+def current_trace_attributes() -> Dict[str, Any]:
+    return dict(_trace_attributes.get())
+
+
+# Global Singleton
+_TRACER: Optional[Tracer] = None
+_TRACER_LOCK = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide tracer configured from settings."""
+    global _TRACER
+
+    with _TRACER_LOCK:
+        if _TRACER is None:
+            _TRACER = Tracer(
+                enabled=settings.TRACING_ENABLED,
+                trace_dir=settings.TRACE_DIR or None,
+                max_spans_per_trace=settings.TRACE_MAX_SPANS
+            )
+    return _TRACER
+
+
+def span(name: str, kind: str = "internal", **attributes: Any):
+    """Shortcut for get_tracer().span(...)."""
+    return get_tracer().span(name, kind, **attributes)
+
+
+# --- Client instrumentation ---
+
+def instrument_redis(client: Any) -> Any:
+    """Wraps a Redis client's commands and pipeline executions in spans."""
+    if getattr(client, "_smos_traced", False):
+        return client
+    execute_command = client.execute_command
+    make_pipeline = client.pipeline
+
+    def traced_execute(*args, **options):
+        with span(f"redis.{args[0]}" if args else "redis.command", "redis"):
+            return execute_command(*args, **options)
+
+    def traced_pipeline(*args, **kwargs):
+        pipe = make_pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def traced_pipeline_execute(*e_args, **e_kwargs):
+            with span("redis.pipeline", "redis", commands=len(getattr(pipe, "command_stack", []) or [])):
+                return execute(*e_args, **e_kwargs)
+
+        pipe.execute = traced_pipeline_execute
+        return pipe
+
+    client.execute_command = traced_execute
+    client.pipeline = traced_pipeline
+    client._smos_traced = True
+    return client
+
+
+_MODEL_METHODS = ("generate_content", "generate_images", "edit_image", "generate_videos", "embed_content")
+
+
+class _TracedModels:
+    def __init__(self, models: Any, is_async: bool = False):
+        self._models = models
+        self._is_async = is_async
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._models, name)
+        if name not in _MODEL_METHODS or not callable(attr):
+            return attr
+
+        if self._is_async:
+            async def async_call(*args, **kwargs):
+                with span(f"model.{name}", "model", model=kwargs.get("model")):
+                    return await attr(*args, **kwargs)
+            return async_call
+
+        def call(*args, **kwargs):
+            with span(f"model.{name}", "model", model=kwargs.get("model")):
+                return attr(*args, **kwargs)
+        return call
+
+
+class _TracedAio:
+    def __init__(self, aio: Any):
+        self._aio = aio
+
+    @property
+    def models(self) -> _TracedModels:
+        return _TracedModels(self._aio.models, is_async=True)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._aio, name)
+
+
+class TracedGenAIClient:
+    """GenAI client proxy timing every model call of every agent."""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    @property
+    def models(self) -> _TracedModels:
+        return _TracedModels(self._client.models)
+
+    @property
+    def aio(self) -> _TracedAio:
+        return _TracedAio(self._client.aio)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
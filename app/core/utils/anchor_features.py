@@ -0,0 +1,297 @@
+"""Precomputed identity-anchor features (memory LRU + compact on-disk .npz)."""
+
+import ast
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Optional embedder: image bytes -> feature vector
+ImageEmbedder = Callable[[bytes], List[float]]
+
+# .npz entry name prefix of derived representations (followed by the repr of their key)
+DERIVED_PREFIX = "derived:"
+
+
+def anchor_version(anchor_bytes: bytes) -> str:
+    """Content digest of an anchor image; a re-uploaded anchor gets a new version."""
+    return hashlib.sha256(anchor_bytes).hexdigest()[:24]
+
+
+def decode_rgb(image_bytes: bytes) -> np.ndarray:
+    """Decodes an image into an HxWx3 uint8 array."""
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def grayscale_thumbnail(rgb: np.ndarray, size: int) -> np.ndarray:
+    """size x size luminance in [0, 1] (the normalized downscaled feature)."""
+    img = Image.fromarray(rgb).convert("L").resize((size, size), Image.Resampling.BILINEAR)
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+class AnchorFeatures:
+    """Decoded features of one anchor version.
+
+    `rgb` is the decoded anchor; resized copies and other representations are
+    derived lazily and memoized, so a QA check only decodes the new render.
+    Features restored from disk carry only the compact representations; the
+    full-resolution pixels are decoded on first access, if ever needed.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        rgb: Optional[np.ndarray],
+        thumbnail: np.ndarray,
+        embedding: Optional[np.ndarray] = None,
+        size: Optional[Tuple[int, int]] = None,
+        decode: Optional[Callable[[], np.ndarray]] = None,
+        derived: Optional[Dict[Hashable, np.ndarray]] = None,
+        on_derive: Optional[Callable[["AnchorFeatures"], None]] = None
+    ):
+        if rgb is None and (size is None or decode is None):
+            raise ValueError("Features without pixels need their size and a decoder.")
+        self.version = version
+        self._rgb = rgb
+        self._size = size or (rgb.shape[1], rgb.shape[0])
+        self._decode = decode
+        self.thumbnail = thumbnail
+        self.embedding = embedding
+        self._derived: Dict[Hashable, np.ndarray] = dict(derived or {})
+        self._persisted = set(self._derived)
+        self._on_derive = on_derive
+        self._lock = threading.RLock()
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """The full-resolution HxWx3 anchor (decoded on demand after a disk hit)."""
+        with self._lock:
+            if self._rgb is None:
+                self._rgb = self._decode()
+            return self._rgb
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height), PIL convention."""
+        return self._size
+
+    def rgb_at(self, size: Tuple[int, int]) -> np.ndarray:
+        """The anchor resized to `size` (width, height), as PIL would resize it."""
+        if size == self.size:
+            return self.rgb
+        return self.derive(("rgb", size), lambda rgb: np.asarray(Image.fromarray(rgb).resize(size)), persist=False)
+
+    def derive(self, key: Hashable, compute: Callable[[np.ndarray], np.ndarray], persist: bool = True) -> np.ndarray:
+        """Memoizes a representation computed from the decoded anchor (resize, crop...).
+
+        Persisted representations are written to the disk tier, so another
+        process reuses them without decoding the anchor.
+        """
+        with self._lock:
+            derived = self._derived.get(key)
+            if derived is not None:
+                return derived
+            derived = self._derived[key] = compute(self.rgb)
+            if persist:
+                self._persisted.add(key)
+        if persist and self._on_derive is not None:
+            self._on_derive(self)
+        return derived
+
+    def persisted(self) -> Dict[Hashable, np.ndarray]:
+        """The derived representations that belong in the disk tier."""
+        with self._lock:
+            return {key: self._derived[key] for key in self._persisted}
+
+
+class AnchorFeatureCache:
+    """Featurizes each anchor version once per process (and once per host).
+
+    Memory holds up to `max_entries` AnchorFeatures (LRU). The disk tier
+    stores one .npz per version with the compact features only (float16
+    thumbnail, float32 embedding and the downscaled representations the
+    comparators derive), never the full-resolution pixels. It is capped at
+    `max_disk_bytes`, least recently used files evicted first.
+    """
+
+    def __init__(
+        self,
+        disk_dir: Optional[str] = None,
+        max_entries: int = 64,
+        thumbnail_size: int = 64,
+        embedder: Optional[ImageEmbedder] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024
+    ):
+        self.disk_dir = disk_dir
+        self.max_entries = max_entries
+        self.thumbnail_size = thumbnail_size
+        self.embedder = embedder
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, AnchorFeatures]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+
+        if self.disk_dir:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"ANCHOR_FEATURES: Disk tier disabled ({e}).")
+                self.disk_dir = None
+
+    def get(self, anchor_bytes: bytes) -> AnchorFeatures:
+        """Returns the features of an anchor, computing them on first sight."""
+        version = anchor_version(anchor_bytes)
+        with self._lock:
+            features = self._memory.get(version)
+            if features is not None:
+                self._memory.move_to_end(version)
+                self.metrics["hits"] += 1
+                return features
+
+        features = self._read_disk(version, anchor_bytes)
+        if features is not None:
+            with self._lock:
+                self.metrics["disk_hits"] += 1
+        else:
+            features = self._featurize(version, anchor_bytes)
+            with self._lock:
+                self.metrics["misses"] += 1
+            self._write_disk(features)
+
+        self._store_memory(features)
+        return features
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.metrics, "entries": len(self._memory)}
+
+    def clear(self) -> None:
+        """Empties the memory tier."""
+        with self._lock:
+            self._memory.clear()
+
+    # --- Internals ---
+
+    def _featurize(self, version: str, anchor_bytes: bytes) -> AnchorFeatures:
+        logger.info(f"ANCHOR_FEATURES: Featurizing anchor {version}...")
+        rgb = decode_rgb(anchor_bytes)
+        embedding = None
+        if self.embedder is not None:
+            try:
+                embedding = np.asarray(self.embedder(anchor_bytes), dtype=np.float32)
+            except Exception as e:
+                logger.warning(f"ANCHOR_FEATURES: Embedding of anchor {version} failed: {e}")
+        return AnchorFeatures(
+            version, rgb, grayscale_thumbnail(rgb, self.thumbnail_size), embedding,
+            on_derive=self._write_disk
+        )
+
+    def _store_memory(self, features: AnchorFeatures) -> None:
+        with self._lock:
+            self._memory[features.version] = features
+            self._memory.move_to_end(features.version)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.metrics["evictions"] += 1
+
+    def _disk_path(self, version: str) -> str:
+        return os.path.join(self.disk_dir, f"{version}.npz")
+
+    def _read_disk(self, version: str, anchor_bytes: bytes) -> Optional[AnchorFeatures]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(version)
+        try:
+            with np.load(path) as data:
+                thumbnail = data["thumbnail"].astype(np.float32)
+                if thumbnail.shape != (self.thumbnail_size, self.thumbnail_size):
+                    return None  # Written with another configuration
+                embedding = data["embedding"] if "embedding" in data.files else None
+                width, height = (int(v) for v in data["size"])
+                derived = {
+                    ast.literal_eval(name[len(DERIVED_PREFIX):]): data[name]
+                    for name in data.files if name.startswith(DERIVED_PREFIX)
+                }
+            os.utime(path)  # Refresh recency for disk eviction
+        except (OSError, KeyError, ValueError, SyntaxError):
+            return None
+        return AnchorFeatures(
+            version, None, thumbnail, embedding, size=(width, height),
+            decode=lambda: decode_rgb(anchor_bytes), derived=derived, on_derive=self._write_disk
+        )
+
+    def _write_disk(self, features: AnchorFeatures) -> None:
+        if not self.disk_dir:
+            return
+        arrays = {"size": np.asarray(features.size), "thumbnail": features.thumbnail.astype(np.float16)}
+        if features.embedding is not None:
+            arrays["embedding"] = features.embedding
+        for key, value in features.persisted().items():
+            if _is_literal(key):
+                arrays[f"{DERIVED_PREFIX}{key!r}"] = value
+        path = self._disk_path(features.version)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, path)
+            self._enforce_disk_budget()
+        except OSError as e:
+            logger.warning(f"ANCHOR_FEATURES: Failed to persist anchor {features.version}: {e}")
+
+    def _enforce_disk_budget(self) -> None:
+        files = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                with self._lock:
+                    self.metrics["disk_evictions"] += 1
+            except OSError:
+                pass
+
+
+def _is_literal(key: Hashable) -> bool:
+    """Whether a derive key survives a repr() / literal_eval() round trip."""
+    try:
+        return ast.literal_eval(repr(key)) == key
+    except (ValueError, SyntaxError):
+        return False
+
+
+# Global Singleton
+_ANCHOR_FEATURE_CACHE: Optional[AnchorFeatureCache] = None
+_ANCHOR_FEATURE_CACHE_LOCK = threading.Lock()
+
+
+def get_anchor_feature_cache() -> AnchorFeatureCache:
+    """Returns the process-wide anchor feature cache configured from settings."""
+    global _ANCHOR_FEATURE_CACHE
+
+    with _ANCHOR_FEATURE_CACHE_LOCK:
+        if _ANCHOR_FEATURE_CACHE is None:
+            _ANCHOR_FEATURE_CACHE = AnchorFeatureCache(
+                disk_dir=settings.ANCHOR_FEATURE_DIR or None,
+                max_entries=settings.ANCHOR_FEATURE_CACHE_SIZE,
+                thumbnail_size=settings.ANCHOR_THUMBNAIL_SIZE,
+                max_disk_bytes=settings.ANCHOR_FEATURE_MAX_DISK_BYTES
+            )
+    return _ANCHOR_FEATURE_CACHE
@@ -0,0 +1,154 @@
+"""Vectorized structural image similarity (SSIM, MS-SSIM, RMSE) with NumPy."""
+
+import io
+import logging
+from typing import List, Optional, Sequence, Tuple, Union
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+ImageInput = Union[bytes, np.ndarray]
+
+METRICS = ("ssim", "ms_ssim", "rmse")
+
+# Wang et al. 2003 scale weights (finest first)
+MS_SSIM_WEIGHTS = (0.0448, 0.2856, 0.3001, 0.2363, 0.1333)
+
+# Stabilizers for a [0, 1] data range
+_C1 = 0.01 ** 2
+_C2 = 0.03 ** 2
+
+
+def to_grayscale(image: ImageInput, size: Tuple[int, int], region: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Decodes, optionally crops, converts to luminance and downsamples an image.
+
+    Args:
+        image: Encoded image bytes or an HxWx3 uint8 array.
+        size: Output (width, height).
+        region: Optional [ymin, xmin, ymax, xmax] box normalized 0-1000
+            (e.g. a face crop), the same convention as the Critic's boxes.
+
+    Returns:
+        np.ndarray: (height, width) float64 array in [0, 1].
+    """
+    img = Image.open(io.BytesIO(image)) if isinstance(image, bytes) else Image.fromarray(image)
+    with img:
+        if region is not None:
+            ymin, xmin, ymax, xmax = region
+            width, height = img.size
+            img = img.crop((xmin * width // 1000, ymin * height // 1000,
+                            max(xmax * width // 1000, xmin * width // 1000 + 1),
+                            max(ymax * height // 1000, ymin * height // 1000 + 1)))
+        gray = img.convert("L").resize(size, Image.Resampling.BOX)
+        return np.asarray(gray, dtype=np.float64) / 255.0
+
+
+def _box_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Mean over every window x window patch ('valid' mode) of the last two axes."""
+    c = np.cumsum(np.cumsum(x, axis=-2), axis=-1)
+    c = np.pad(c, [(0, 0)] * (x.ndim - 2) + [(1, 0), (1, 0)])
+    s = c[..., window:, window:] - c[..., :-window, window:] - c[..., window:, :-window] + c[..., :-window, :-window]
+    return s / (window * window)
+
+
+def _ssim_terms(x: np.ndarray, y: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean SSIM and mean contrast-structure term over the last two axes."""
+    n = window * window
+    cov_norm = n / (n - 1)  # Unbiased local (co)variances
+    mx, my = _box_mean(x, window), _box_mean(y, window)
+    sxx = (_box_mean(x * x, window) - mx * mx) * cov_norm
+    syy = (_box_mean(y * y, window) - my * my) * cov_norm
+    sxy = (_box_mean(x * y, window) - mx * my) * cov_norm
+
+    cs_map = (2 * sxy + _C2) / (sxx + syy + _C2)
+    ssim_map = (2 * mx * my + _C1) / (mx * mx + my * my + _C1) * cs_map
+    return ssim_map.mean(axis=(-2, -1)), cs_map.mean(axis=(-2, -1))
+
+
+def _halve(x: np.ndarray) -> np.ndarray:
+    """2x2 average pooling of the last two axes (odd edges dropped)."""
+    h, w = x.shape[-2] // 2 * 2, x.shape[-1] // 2 * 2
+    x = x[..., :h, :w]
+    return (x[..., 0::2, 0::2] + x[..., 1::2, 0::2] + x[..., 0::2, 1::2] + x[..., 1::2, 1::2]) / 4.0
+
+
+def ssim(x: np.ndarray, y: np.ndarray, window: int = 7) -> np.ndarray:
+    """SSIM of broadcastable (..., H, W) stacks, e.g. (H, W) against (N, H, W)."""
+    x, y = np.broadcast_arrays(x, y)
+    return _ssim_terms(x, y, window)[0]
+
+
+def ms_ssim(x: np.ndarray, y: np.ndarray, window: int = 7, weights: Sequence[float] = MS_SSIM_WEIGHTS) -> np.ndarray:
+    """Multi-scale SSIM of broadcastable (..., H, W) stacks.
+
+    Scales that would be smaller than the window are dropped and the
+    remaining weights renormalized.
+    """
+    x, y = np.broadcast_arrays(x, y)
+    scales = 1
+    side = min(x.shape[-2:])
+    while scales < len(weights) and side // 2 >= window:
+        scales += 1
+        side //= 2
+    w = np.asarray(weights[:scales], dtype=np.float64)
+    w /= w.sum()
+
+    result = np.ones(x.shape[:-2])
+    for i in range(scales):
+        full, cs = _ssim_terms(x, y, window)
+        term = full if i == scales - 1 else cs
+        # Negative structure correlation counts as no similarity
+        result = result * np.maximum(term, 0.0) ** w[i]
+        if i < scales - 1:
+            x, y = _halve(x), _halve(y)
+    return result
+
+
+def rmse_similarity(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """1 - RMSE of broadcastable (..., H, W) stacks in [0, 1]."""
+    x, y = np.broadcast_arrays(x, y)
+    return 1.0 - np.sqrt(np.mean((x - y) ** 2, axis=(-2, -1)))
+
+
+class SimilarityEngine:
+    """Compares images on downsampled grayscale (or face-crop) representations.
+
+    Every comparison is vectorized over a stack, so ranking N Best-of-N
+    renders against an anchor, or one render against all of a muse's
+    anchors, is a single NumPy call.
+    """
+
+    def __init__(self, size: Tuple[int, int] = (128, 128), metric: str = "ms_ssim", window: int = 7):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown similarity metric '{metric}'. Expected one of {METRICS}.")
+        if min(size) < window:
+            raise ValueError(f"Comparison size {size} is smaller than the SSIM window ({window}).")
+        self.size = tuple(size)
+        self.metric = metric
+        self.window = window
+
+    def prepare(self, image: ImageInput, region: Optional[Sequence[int]] = None) -> np.ndarray:
+        """The (height, width) representation compared by this engine."""
+        return to_grayscale(image, self.size, region)
+
+    def score(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Similarity of prepared, broadcastable stacks (1.0 is identical)."""
+        if self.metric == "ssim":
+            result = ssim(x, y, self.window)
+        elif self.metric == "ms_ssim":
+            result = ms_ssim(x, y, self.window)
+        else:
+            result = rmse_similarity(x, y)
+        return np.clip(result, 0.0, 1.0)
+
+    def one_to_many(self, image: ImageInput, others: List[ImageInput], region: Optional[Sequence[int]] = None) -> List[float]:
+        """Scores one image (e.g. a render) against many (e.g. all anchors)."""
+        if not others:
+            return []
+        stack = np.stack([self.prepare(o, region) for o in others])
+        return self.score(self.prepare(image, region), stack).round(4).tolist()
+
+    def many_to_one(self, images: List[ImageInput], reference: ImageInput, region: Optional[Sequence[int]] = None) -> List[float]:
+        """Scores many images (e.g. Best-of-N renders) against one reference."""
+        return self.one_to_many(reference, images, region)
@@ -0,0 +1,266 @@
+"""Perceptual hashes of renders and a per-muse near-duplicate index."""
+
+import hashlib
+import io
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+import numpy as np
+from PIL import Image
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ImageInput = Union[bytes, np.ndarray]
+
+HASH_BITS = 64
+
+# Recent fingerprints kept by content digest, so a render is decoded and hashed once
+FINGERPRINT_MEMO_SIZE = 64
+
+
+def _grayscale(image: ImageInput, size: Tuple[int, int]) -> np.ndarray:
+    img = Image.open(io.BytesIO(image)) if isinstance(image, bytes) else Image.fromarray(image)
+    with img:
+        return np.asarray(img.convert("L").resize(size, Image.Resampling.LANCZOS), dtype=np.float64)
+
+
+def _pack(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def dhash(image: ImageInput) -> int:
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 thumbnail."""
+    pixels = _grayscale(image, (9, 8))
+    return _pack(pixels[:, 1:] > pixels[:, :-1])
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * k * (2 * np.arange(n)[None, :] + 1) / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix * np.sqrt(2 / n)
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def phash(image: ImageInput) -> int:
+    """64-bit DCT hash: low-frequency 8x8 DCT coefficients of a 32x32 thumbnail vs their median."""
+    pixels = _grayscale(image, (32, 32))
+    low = (_DCT_32 @ pixels @ _DCT_32.T)[:8, :8]
+    return _pack(low > np.median(low))
+
+
+HASH_FUNCTIONS: Dict[str, Callable[[ImageInput], int]] = {"phash": phash, "dhash": dhash}
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class MultiIndexHashTable:
+    """Hamming-radius search over 64-bit hashes (multi-index hashing).
+
+    Each hash is split into `chunks` substrings, each indexed in its own
+    table. By the pigeonhole principle, a hash within radius r of the query
+    matches the query within r // chunks bits on at least one substring, so
+    only a few exact bucket probes are needed instead of a full scan.
+    """
+
+    def __init__(self, chunks: int = 4):
+        if HASH_BITS % chunks:
+            raise ValueError(f"{HASH_BITS} bits cannot be split into {chunks} chunks.")
+        self.chunks = chunks
+        self.chunk_bits = HASH_BITS // chunks
+        self._mask = (1 << self.chunk_bits) - 1
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in range(chunks)]
+        self._hashes: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def _split(self, value: int) -> Iterator[int]:
+        for i in range(self.chunks):
+            yield (value >> (i * self.chunk_bits)) & self._mask
+
+    def add(self, item_id: int, value: int) -> None:
+        self._hashes[item_id] = value
+        for table, chunk in zip(self._tables, self._split(value)):
+            table.setdefault(chunk, set()).add(item_id)
+
+    def remove(self, item_id: int) -> None:
+        value = self._hashes.pop(item_id, None)
+        if value is None:
+            return
+        for table, chunk in zip(self._tables, self._split(value)):
+            bucket = table.get(chunk)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del table[chunk]
+
+    def _probes(self, chunk: int, radius: int) -> Iterator[int]:
+        yield chunk
+        for r in range(1, radius + 1):
+            for bits in itertools.combinations(range(self.chunk_bits), r):
+                flipped = chunk
+                for bit in bits:
+                    flipped ^= 1 << bit
+                yield flipped
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, int]]:
+        """Returns (item_id, distance) pairs within `radius`, nearest first."""
+        sub_radius = radius // self.chunks
+        candidates: Set[int] = set()
+        for table, chunk in zip(self._tables, self._split(value)):
+            for probe in self._probes(chunk, sub_radius):
+                bucket = table.get(probe)
+                if bucket:
+                    candidates.update(bucket)
+        matches = [(i, hamming(value, self._hashes[i])) for i in candidates]
+        return sorted((m for m in matches if m[1] <= radius), key=lambda m: m[1])
+
+
+class HashEntry:
+    """A hashed image and what the pipeline learned about it."""
+
+    __slots__ = ("entry_id", "value", "label", "metadata", "created_at")
+
+    def __init__(self, entry_id: int, value: int, label: str, metadata: Dict[str, Any]):
+        self.entry_id = entry_id
+        self.value = value
+        self.label = label
+        self.metadata = metadata
+        self.created_at = time.time()
+
+
+class RenderHashIndex:
+    """Per-muse perceptual-hash index of generated, edited, QA'd and staged images.
+
+    Labels record provenance ('generated', 'edited', 'staged') or a verdict
+    ('approved', 'rejected'); metadata carries whatever the caller wants
+    back on a near-duplicate hit (QA report, review path...). Each muse keeps
+    at most `max_entries_per_muse` entries (oldest evicted first).
+    """
+
+    def __init__(self, algorithm: str = "phash", radius: int = 4, max_entries_per_muse: int = 5000):
+        if algorithm not in HASH_FUNCTIONS:
+            raise ValueError(f"Unknown hash algorithm '{algorithm}'. Expected one of {sorted(HASH_FUNCTIONS)}.")
+        self.hash_image = HASH_FUNCTIONS[algorithm]
+        self.radius = radius
+        self.max_entries_per_muse = max_entries_per_muse
+        self._tables: Dict[str, MultiIndexHashTable] = {}
+        self._entries: Dict[str, "OrderedDict[int, HashEntry]"] = {}
+        self._ids = itertools.count(1)
+        self._fingerprints: "OrderedDict[bytes, Optional[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fingerprint(self, image: ImageInput) -> Optional[int]:
+        """The image hash, or None if the bytes are not a decodable image.
+
+        Hashes of encoded images are memoized by content digest: the same
+        render is fingerprinted by generation, visual QA and staging, but
+        only decoded once.
+        """
+        digest = hashlib.blake2b(image, digest_size=16).digest() if isinstance(image, bytes) else None
+        if digest is not None:
+            with self._lock:
+                if digest in self._fingerprints:
+                    self._fingerprints.move_to_end(digest)
+                    return self._fingerprints[digest]
+        try:
+            value = self.hash_image(image)
+        except Exception as e:
+            logger.debug(f"PHASH: Cannot hash image: {e}")
+            value = None
+        if digest is not None:
+            with self._lock:
+                self._fingerprints[digest] = value
+                while len(self._fingerprints) > FINGERPRINT_MEMO_SIZE:
+                    self._fingerprints.popitem(last=False)
+        return value
+
+    def add(
+        self,
+        muse_id: str,
+        image: ImageInput,
+        label: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        value: Optional[int] = None
+    ) -> Optional[int]:
+        """Indexes an image (or a precomputed hash). Returns the hash, or None if not hashable."""
+        value = self.fingerprint(image) if value is None else value
+        if value is None:
+            return None
+        with self._lock:
+            table = self._tables.setdefault(muse_id, MultiIndexHashTable())
+            entries = self._entries.setdefault(muse_id, OrderedDict())
+            entry = HashEntry(next(self._ids), value, label, metadata or {})
+            table.add(entry.entry_id, value)
+            entries[entry.entry_id] = entry
+            while len(entries) > self.max_entries_per_muse:
+                evicted, _ = entries.popitem(last=False)
+                table.remove(evicted)
+        return value
+
+    def find(
+        self,
+        muse_id: str,
+        image: Optional[ImageInput] = None,
+        labels: Optional[Tuple[str, ...]] = None,
+        radius: Optional[int] = None,
+        value: Optional[int] = None
+    ) -> List[Tuple[HashEntry, int]]:
+        """Near-duplicates of an image for a muse, as (entry, distance), nearest first."""
+        value = self.fingerprint(image) if value is None else value
+        if value is None:
+            return []
+        with self._lock:
+            table = self._tables.get(muse_id)
+            if table is None:
+                return []
+            entries = self._entries[muse_id]
+            matches = table.search(value, self.radius if radius is None else radius)
+            return [
+                (entries[i], d) for i, d in matches
+                if labels is None or entries[i].label in labels
+            ]
+
+    def nearest(self, muse_id: str, image: Optional[ImageInput] = None, labels: Optional[Tuple[str, ...]] = None,
+                value: Optional[int] = None) -> Optional[HashEntry]:
+        """The closest near-duplicate with one of `labels`, if any (newest wins ties)."""
+        matches = self.find(muse_id, image, labels, value=value)
+        if not matches:
+            return None
+        best = matches[0][1]
+        return max((e for e, d in matches if d == best), key=lambda e: e.entry_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {muse_id: len(entries) for muse_id, entries in self._entries.items()}
+
+
+# Global Singleton
+_RENDER_HASH_INDEX: Optional[RenderHashIndex] = None
+_RENDER_HASH_INDEX_LOCK = threading.Lock()
+
+
+def get_render_hash_index() -> RenderHashIndex:
+    """Returns the process-wide render hash index configured from settings."""
+    global _RENDER_HASH_INDEX
+
+    with _RENDER_HASH_INDEX_LOCK:
+        if _RENDER_HASH_INDEX is None:
+            _RENDER_HASH_INDEX = RenderHashIndex(
+                algorithm=settings.PHASH_ALGORITHM,
+                radius=settings.PHASH_DUPLICATE_RADIUS,
+                max_entries_per_muse=settings.PHASH_MAX_ENTRIES_PER_MUSE
+            )
+    return _RENDER_HASH_INDEX
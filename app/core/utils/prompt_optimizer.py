@@ -1,8 +1,14 @@
 """Utility for optimizing and expanding prompts for image generation."""
 
+import logging
+from typing import List, Optional
 from google.genai import types
 from app.core.config import settings
 from app.core.vertex_init import get_genai_client
+from app.core.redis_client import get_redis_client
+from app.core.services.prompt_cache import PromptCache, instruction_version
+
+logger = logging.getLogger(__name__)
 
 OPTIMIZER_SYSTEM_INSTRUCTION = """You are a Prompt Engineering expert for Imagen 3.
 Your task is to take a simple scene description and expand it into a highly detailed, technical, and photorealistic prompt.
@@ -17,27 +23,74 @@ Follow these rules:
 7. Output ONLY the optimized prompt text.
 """
 
+# Part of every cache key: editing the instruction invalidates cached rewrites
+OPTIMIZER_INSTRUCTION_VERSION = instruction_version(OPTIMIZER_SYSTEM_INSTRUCTION)
+
 class PromptOptimizer:
     """Uses Gemini to transform simple descriptions into optimized image generation prompts."""
 
-    def __init__(self, model_name: str = "gemini-3-flash-preview"):
+    def __init__(self, model_name: str = "gemini-3-flash-preview", cache: Optional[PromptCache] = None):
         """Initializes the PromptOptimizer.
 
         Args:
             model_name: The Gemini model to use for rewriting.
+            cache: Optional rewrite cache. Defaults to the Redis-backed cache
+                when PROMPT_CACHE_ENABLED is set.
         """
         self.client = get_genai_client()
         self.model_name = model_name
+        if cache is None and settings.PROMPT_CACHE_ENABLED:
+            cache = PromptCache(
+                get_redis_client(),
+                ttl_seconds=settings.PROMPT_CACHE_TTL_SECONDS,
+                max_entries=settings.PROMPT_CACHE_MAX_ENTRIES,
+                l1_size=settings.PROMPT_CACHE_L1_SIZE
+            )
+        self.cache = cache
 
-    def optimize(self, simple_prompt: str) -> str:
+    def optimize(self, simple_prompt: str, variant: int = 0) -> str:
         """Expands a simple prompt into an optimized technical prompt.
 
+        Identical inputs (after whitespace normalization) are served from the
+        cache instead of calling the model again.
+
         Args:
             simple_prompt: The original simple description.
+            variant: Index of the rewrite to return. Distinct indexes map to
+                distinct cached rewrites of the same input (variant mode).
 
         Returns:
             str: The expanded technical prompt.
         """
+        return self.optimize_variants(simple_prompt, variant + 1)[variant]
+
+    def optimize_variants(self, simple_prompt: str, n: int) -> List[str]:
+        """Returns `n` diverse rewrites of a prompt, generating only the missing ones.
+
+        Args:
+            simple_prompt: The original simple description.
+            n: Number of rewrites wanted.
+
+        Returns:
+            List[str]: The rewrites (fewer than `n` only if the model keeps
+                returning duplicates).
+        """
+        if self.cache is None:
+            return [self._generate(simple_prompt) for _ in range(n)]
+
+        key = self.cache.make_key(simple_prompt, self.model_name, OPTIMIZER_INSTRUCTION_VERSION)
+        variants = self.cache.get(key)
+        attempts = 0
+        # Temperature 0.7 makes repeated calls diverge; duplicates get one extra try each
+        while len(variants) < n and attempts < 2 * n:
+            attempts += 1
+            variants = self.cache.add(key, self._generate(simple_prompt), max_variants=n)
+        if len(variants) < n:
+            logger.warning(f"PROMPT_OPTIMIZER: Only {len(variants)}/{n} distinct rewrites obtained.")
+            variants = variants + [variants[-1]] * (n - len(variants))
+        return variants[:n]
+
+    def _generate(self, simple_prompt: str) -> str:
         response = self.client.models.generate_content(
             model=self.model_name,
             contents=[
@@ -6,6 +6,8 @@ import google.genai as genai
 from google.genai import types
 from pydantic import BaseModel, Field
 from app.core.config import settings
+from app.core.utils.anchor_features import get_anchor_feature_cache, decode_rgb
+from app.core.utils.image_similarity import SimilarityEngine
 
 logger = logging.getLogger(__name__)
 
@@ -15,9 +17,7 @@ class SimilarityResult(BaseModel):
     identity_match: bool = Field(..., description="Whether the identity is preserved")
     deviation_details: str = Field(..., description="Detailed explanation of differences")
 
-import io
-import math
-from PIL import Image, ImageChops, ImageStat
+import numpy as np
 
 class VisualComparator:
     """Engine for comparing renders against identity anchors."""
@@ -29,6 +29,11 @@ class VisualComparator:
             location=settings.LOCATION
         )
         self.model_name = model_name
+        self.anchor_cache = get_anchor_feature_cache()
+        self.similarity = SimilarityEngine(
+            size=(settings.SIMILARITY_SIZE, settings.SIMILARITY_SIZE),
+            metric=settings.SIMILARITY_METRIC
+        )
 
     def compare_identity(self, anchor_image: bytes, render_image: bytes) -> SimilarityResult:
         """Uses Gemini Vision to perform high-level identity comparison."""
@@ -69,28 +74,73 @@ class VisualComparator:
 
     def calculate_pixel_similarity(self, image1_bytes: bytes, image2_bytes: bytes) -> float:
         """Calculates pixel-level similarity using RMSE.
+
+        `image2_bytes` is the anchor: its decoded (and resized) pixels come
+        from the anchor feature cache, so only the render is decoded here.
         
         Returns:
             float: 0.0 to 1.0 (1.0 is identical).
         """
-        img1 = Image.open(io.BytesIO(image1_bytes)).convert("RGB")
-        img2 = Image.open(io.BytesIO(image2_bytes)).convert("RGB")
-        
+        render = decode_rgb(image1_bytes)
         # Ensure same size
-        if img1.size != img2.size:
-            img2 = img2.resize(img1.size)
-            
-        diff = ImageChops.difference(img1, img2)
-        stat = ImageStat.Stat(diff)
-        
-        # Root Mean Square error
-        rms = stat.rms[0] # Average across channels
+        anchor = self.anchor_cache.get(image2_bytes).rgb_at((render.shape[1], render.shape[0]))
+
+        # Root Mean Square error of the first band
+        diff = render[..., 0].astype(np.float64) - anchor[..., 0]
+        rms = float(np.sqrt(np.mean(diff * diff)))
         
         # Normalize to 0-1. Max RMS for 8-bit is 255.
         # Higher RMS means more deviation.
         similarity = 1.0 - (rms / 255.0)
         return round(max(0.0, similarity), 4)
 
+    def calculate_structural_similarity(
+        self,
+        render_bytes: bytes,
+        anchor_bytes: bytes,
+        region: Optional[List[int]] = None
+    ) -> float:
+        """Structural similarity (SSIM family) of a render against an anchor.
+
+        Args:
+            render_bytes: The new render.
+            anchor_bytes: The identity anchor (features cached per version).
+            region: Optional [ymin, xmin, ymax, xmax] crop (0-1000), e.g. the face.
+
+        Returns:
+            float: 0.0 to 1.0 (1.0 is identical).
+        """
+        return self.rank_renders([render_bytes], anchor_bytes, region)[0]
+
+    def rank_renders(
+        self,
+        renders: List[bytes],
+        anchor_bytes: bytes,
+        region: Optional[List[int]] = None
+    ) -> List[float]:
+        """Scores many renders (e.g. Best-of-N candidates) against one anchor in one vectorized call."""
+        if not renders:
+            return []
+        anchor = self._prepared_anchor(anchor_bytes, region)
+        stack = np.stack([self.similarity.prepare(r, region) for r in renders])
+        return self.similarity.score(anchor, stack).round(4).tolist()
+
+    def compare_to_anchors(
+        self,
+        render_bytes: bytes,
+        anchors: List[bytes],
+        region: Optional[List[int]] = None
+    ) -> List[float]:
+        """Scores one render against several anchors in one vectorized call."""
+        if not anchors:
+            return []
+        stack = np.stack([self._prepared_anchor(a, region) for a in anchors])
+        return self.similarity.score(self.similarity.prepare(render_bytes, region), stack).round(4).tolist()
+
+    def _prepared_anchor(self, anchor_bytes: bytes, region: Optional[List[int]]) -> np.ndarray:
+        key = ("similarity", self.similarity.size, tuple(region) if region else None)
+        return self.anchor_cache.get(anchor_bytes).derive(key, lambda rgb: self.similarity.prepare(rgb, region))
+
     def calculate_face_similarity(self, image1_bytes: bytes, image2_bytes: bytes) -> float:
         """Calculates biometric face similarity (InsightFace simulation).
         
@@ -2,6 +2,7 @@
 
 import google.genai as genai
 from app.core.config import settings
+from app.core.tracing import TracedGenAIClient
 
 # Global Singleton
 _GENAI_CLIENT = None
@@ -10,7 +11,7 @@ def get_genai_client() -> genai.Client:
     """Initializes and returns the GenAI client singleton.
     
     Dynamically switches between Vertex AI (GCP) and standard API Key 
-    based on the presence of GOOGLE_API_KEY.
+    based on the presence of GOOGLE_API_KEY. Model calls are traced.
     """
     global _GENAI_CLIENT
     
@@ -19,13 +20,13 @@ def get_genai_client() -> genai.Client:
 
     if settings.GOOGLE_API_KEY and "AIza" in settings.GOOGLE_API_KEY:
         # Standard AI Studio Mode (Simpler for local/hybrid tests)
-        _GENAI_CLIENT = genai.Client(api_key=settings.GOOGLE_API_KEY)
+        _GENAI_CLIENT = TracedGenAIClient(genai.Client(api_key=settings.GOOGLE_API_KEY))
     else:
         # Industrial Vertex AI Mode (GCP Native)
-        _GENAI_CLIENT = genai.Client(
+        _GENAI_CLIENT = TracedGenAIClient(genai.Client(
             vertexai=True,
             project=settings.PROJECT_ID,
             location=settings.LOCATION
-        )
+        ))
     
     return _GENAI_CLIENT
\ No newline at end of file
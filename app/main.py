@@ -20,8 +20,12 @@ from app.agents.finance_agent import CFOAgent
 from app.core.schemas.trend import IntentObject, TrendType
 from app.core.schemas.genesis import MuseProposal, GenesisDNA
 from app.matrix.assets_manager import SignatureAssetsManager
+from app.matrix.anchor_index import get_anchor_index
+from app.matrix.models import IdentityAnchor
 from app.core.config import settings
 from app.core.redis_client import get_redis_client
+from app.core.services.comfy_templates import get_workflow_registry
+from app.core.production_scheduler import SchedulerOverloaded
 from app.state.models import Mood
 
 # Global Logger
@@ -144,6 +148,12 @@ async def launch_genesis(request: GenesisRequest):
         face_bytes = visual_agent.generate_image(prompt=prompt, aspect_ratio="1:1")
         
         assets.upload_asset(f"muses/{muse_id}/face_master.png", face_bytes)
+        get_anchor_index().add(IdentityAnchor(
+            anchor_id=f"{muse_id}:face_master",
+            muse_id=muse_id,
+            asset_path=f"muses/{muse_id}/face_master.png",
+            asset_type="face_master"
+        ), face_bytes)
         
         logger.info(f"GENESIS: Muse '{muse_id}' materialized in GCS.")
         return {"status": "materialized", "muse_id": muse_id, "gcs_path": f"gs://{settings.GCS_BUCKET_NAME}/muses/{muse_id}/"}
@@ -195,25 +205,28 @@ async def trend_scout_daemon():
                         logger.info(f"DAEMON: Triggering production for Muse: {subject_id}")
                         
                         est_cost = calc.estimate_video_cost("veo-3.1", 5.0)
-                        wallet = engine.ledger_service.state_manager.get_wallet(subject_id)
-                        history = engine.ledger_service.get_transaction_history(subject_id)
+                        wallet = engine.ledger_service.get_wallet(subject_id)
                         
                         if not wallet:
                             logger.warning(f"DAEMON: No wallet for {subject_id}, skipping.")
                             continue
 
-                        solvency = cfo.verify_solvency(wallet, history, est_cost)
+                        solvency = cfo.verify_solvency(wallet, None, est_cost)
                         
                         if not solvency.is_authorized:
                             logger.warning(f"DAEMON: Financial block for Muse '{subject_id}' on trend '{insight.topic}': {solvency.reasoning}")
                             continue
 
-                        # 4. Trigger Production Loop
-                        await engine.produce_video_content_async(
-                            intent=insight.suggested_intent,
-                            mood=Mood(), # Default neutral mood
-                            subject_id=subject_id
-                        )
+                        # 4. Queue Production (the scheduler caps concurrency and sheds overload)
+                        try:
+                            await engine.produce_video_content_async(
+                                intent=insight.suggested_intent,
+                                mood=Mood(), # Default neutral mood
+                                subject_id=subject_id,
+                                priority=insight.vvs_score
+                            )
+                        except SchedulerOverloaded as e:
+                            logger.warning(f"DAEMON: Production for '{subject_id}' shed: {e}")
                     
         except Exception as e:
             logger.error(f"DAEMON: TrendScout loop failed: {e}")
@@ -224,6 +237,9 @@ async def trend_scout_daemon():
 async def startup_event():
     """Initializes the system and starts autonomous daemons."""
     
+    # 0. Compile ComfyUI workflow templates once (invalid graphs are reported at boot)
+    get_workflow_registry()
+    
     # 1. Wait for Redis (Resilience)
     redis_client = get_redis_client()
     max_retries = 5
@@ -268,14 +284,34 @@ async def produce_content(topic: str):
         print(f"--- SMOS: Production FAILED: {e} ---")
         logger.error(f"CLI: Production failure: {e}")
 
+async def resume_content(production_id: str):
+    """Resumes an interrupted production from its last completed stage."""
+    from app.core.workflow_engine import WorkflowEngine
+    
+    print(f"--- SMOS: Resuming Production {production_id} ---")
+    engine = WorkflowEngine()
+    
+    try:
+        result = await engine.resume_production(production_id)
+        print(f"--- SMOS: Production SUCCESS ({result.get('title')}) ---")
+        print(f"Review Path: {result.get('review_path')}")
+        print(f"Total Cost: {result.get('production_cost')} USD")
+    except Exception as e:
+        print(f"--- SMOS: Resume FAILED: {e} ---")
+        logger.error(f"CLI: Resume failure for {production_id}: {e}")
+
 def main():
     parser = argparse.ArgumentParser(description="Sovereign Muse OS CLI")
     subparsers = parser.add_subparsers(dest="command")
     produce_parser = subparsers.add_parser("produce", help="Trigger content production")
     produce_parser.add_argument("--intent", required=True, help="The topic or intent for production")
+    resume_parser = subparsers.add_parser("resume", help="Resume a production from its checkpoints")
+    resume_parser.add_argument("--production-id", required=True, help="The production (task) ID to resume")
     args = parser.parse_args()
     if args.command == "produce":
         asyncio.run(produce_content(args.intent))
+    elif args.command == "resume":
+        asyncio.run(resume_content(args.production_id))
     else:
         parser.print_help()
 
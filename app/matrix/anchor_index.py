@@ -0,0 +1,236 @@
+"""In-memory vector index over Identity Anchor embeddings."""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+from app.core.config import settings
+from app.matrix.models import IdentityAnchor
+
+logger = logging.getLogger(__name__)
+
+# Image bytes -> feature vector (None if the image has nothing to embed)
+ImageEmbedder = Callable[[bytes], Optional[List[float]]]
+
+
+def thumbnail_embedder(size: int = 32) -> ImageEmbedder:
+    """Local default embedder: the zero-mean size x size luminance thumbnail.
+
+    Cosine similarity between two such vectors is their normalized
+    cross-correlation, a cheap appearance match that needs no model call.
+    """
+    def embed(image_bytes: bytes) -> Optional[List[float]]:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            pixels = np.asarray(img.convert("L").resize((size, size), Image.Resampling.BOX), dtype=np.float32)
+        if not pixels.size:
+            return None
+        return (pixels - pixels.mean()).ravel().tolist()
+    return embed
+
+
+class _MuseMatrix:
+    """Unit-normalized embeddings (one row per anchor) of one Muse."""
+
+    def __init__(self, anchors: List[IdentityAnchor], vectors: np.ndarray):
+        self.anchors = anchors
+        self.vectors = vectors
+
+
+class AnchorVectorIndex:
+    """Cosine top-k search over a Muse's identity anchors.
+
+    Each Muse's embeddings live in one contiguous float32 matrix, so scoring
+    a render against every anchor is a single matrix-vector product. With a
+    `persist_dir`, each matrix is saved as .npy (plus a JSON sidecar of the
+    anchors) and memory-mapped on first use, so startup reads no pixels and
+    runs no embedder.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[ImageEmbedder] = None,
+        embedder_name: str = "thumbnail32",
+        persist_dir: Optional[str] = None
+    ):
+        self.embedder = embedder or thumbnail_embedder()
+        self.embedder_name = embedder_name
+        self.persist_dir = persist_dir
+        self._muses: Dict[str, _MuseMatrix] = {}
+        self._lock = threading.Lock()
+
+        if self.persist_dir:
+            try:
+                os.makedirs(self.persist_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"ANCHOR_INDEX: Persistence disabled ({e}).")
+                self.persist_dir = None
+
+    def embed(self, image_bytes: bytes) -> Optional[np.ndarray]:
+        """Unit embedding of an image, or None if it cannot be embedded."""
+        try:
+            raw = self.embedder(image_bytes)
+            if raw is None:
+                return None
+            with np.errstate(all="ignore"):
+                vector = np.asarray(raw, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+        except Exception as e:
+            logger.debug(f"ANCHOR_INDEX: Cannot embed image: {e}")
+            return None
+        if vector.ndim != 1 or not np.isfinite(norm) or not norm:
+            return None
+        return vector / norm
+
+    def add(self, anchor: IdentityAnchor, image_bytes: Optional[bytes] = None) -> bool:
+        """Indexes an anchor, embedding its image when it has no embedding yet.
+
+        A re-registered anchor id replaces the previous entry. Returns False
+        when there is nothing to index (no embedding and no usable image).
+        """
+        if anchor.embedding_vector:
+            vector = np.asarray(anchor.embedding_vector, dtype=np.float32)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+        elif image_bytes is not None:
+            vector = self.embed(image_bytes)
+            if vector is None:
+                logger.warning(f"ANCHOR_INDEX: Anchor {anchor.anchor_id} could not be embedded; not indexed.")
+                return False
+            anchor.embedding_vector = vector.tolist()
+        else:
+            return False
+
+        with self._lock:
+            muse = self._load(anchor.muse_id)
+            if muse is not None and muse.vectors.shape[1] != vector.shape[0]:
+                logger.warning(f"ANCHOR_INDEX: Embedding size changed for {anchor.muse_id}; rebuilding its index.")
+                muse = None
+            if muse is None:
+                muse = _MuseMatrix([], np.empty((0, vector.shape[0]), dtype=np.float32))
+            keep = [i for i, a in enumerate(muse.anchors) if a.anchor_id != anchor.anchor_id]
+            self._muses[anchor.muse_id] = muse = _MuseMatrix(
+                [muse.anchors[i] for i in keep] + [anchor],
+                np.vstack([muse.vectors[keep], vector[None, :]])
+            )
+            self._save(anchor.muse_id, muse)
+        return True
+
+    def remove(self, muse_id: str, anchor_id: str) -> None:
+        with self._lock:
+            muse = self._load(muse_id)
+            if muse is None:
+                return
+            keep = [i for i, a in enumerate(muse.anchors) if a.anchor_id != anchor_id]
+            self._muses[muse_id] = muse = _MuseMatrix([muse.anchors[i] for i in keep], np.asarray(muse.vectors[keep]))
+            self._save(muse_id, muse)
+
+    def anchors(self, muse_id: str) -> List[IdentityAnchor]:
+        with self._lock:
+            muse = self._load(muse_id)
+            return list(muse.anchors) if muse else []
+
+    def search(
+        self,
+        muse_id: str,
+        image_bytes: Optional[bytes] = None,
+        k: int = 1,
+        asset_types: Optional[Iterable[str]] = None,
+        vector: Optional[np.ndarray] = None
+    ) -> List[Tuple[IdentityAnchor, float]]:
+        """The k anchors most similar to an image (or a unit vector), best first.
+
+        Returns an empty list when the Muse has no indexed anchors or the
+        query cannot be embedded.
+        """
+        if vector is None:
+            if image_bytes is None:
+                return []
+            vector = self.embed(image_bytes)
+            if vector is None:
+                return []
+        with self._lock:
+            muse = self._load(muse_id)
+        if muse is None or not muse.anchors or muse.vectors.shape[1] != vector.shape[0]:
+            return []
+
+        scores = muse.vectors @ vector
+        if asset_types is not None:
+            allowed = set(asset_types)
+            scores = np.where([a.asset_type in allowed for a in muse.anchors], scores, -np.inf)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(muse.anchors[i], round(float(scores[i]), 4)) for i in top if np.isfinite(scores[i])]
+
+    # --- Persistence ---
+
+    def _paths(self, muse_id: str) -> Tuple[str, str]:
+        stem = os.path.join(self.persist_dir, hashlib.sha256(muse_id.encode("utf-8")).hexdigest()[:16])
+        return f"{stem}.npy", f"{stem}.json"
+
+    def _load(self, muse_id: str) -> Optional[_MuseMatrix]:
+        """The Muse's matrix, memory-mapped from disk on first access. Caller holds the lock."""
+        muse = self._muses.get(muse_id)
+        if muse is not None or not self.persist_dir:
+            return muse
+        matrix_path, meta_path = self._paths(muse_id)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("embedder") != self.embedder_name:
+                return None  # Embedded by another model: re-register to rebuild
+            vectors = np.load(matrix_path, mmap_mode="r")
+            anchors = [IdentityAnchor.model_validate(a) for a in meta["anchors"]]
+            if vectors.shape[0] != len(anchors):
+                return None
+        except (OSError, KeyError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"ANCHOR_INDEX: Ignoring unreadable index of {muse_id}: {e}")
+            return None
+        muse = self._muses[muse_id] = _MuseMatrix(anchors, vectors)
+        return muse
+
+    def _save(self, muse_id: str, muse: _MuseMatrix) -> None:
+        if not self.persist_dir:
+            return
+        matrix_path, meta_path = self._paths(muse_id)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        meta = {
+            "muse_id": muse_id,
+            "embedder": self.embedder_name,
+            # Vectors live in the matrix file only
+            "anchors": [a.model_dump(mode="json", exclude={"embedding_vector"}) for a in muse.anchors],
+        }
+        try:
+            with open(matrix_path + suffix, "wb") as f:
+                np.save(f, np.ascontiguousarray(muse.vectors, dtype=np.float32))
+            with open(meta_path + suffix, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(matrix_path + suffix, matrix_path)
+            os.replace(meta_path + suffix, meta_path)
+        except OSError as e:
+            logger.warning(f"ANCHOR_INDEX: Failed to persist index of {muse_id}: {e}")
+
+
+# Global Singleton
+_ANCHOR_INDEX: Optional[AnchorVectorIndex] = None
+_ANCHOR_INDEX_LOCK = threading.Lock()
+
+
+def get_anchor_index() -> AnchorVectorIndex:
+    """Returns the process-wide anchor index configured from settings."""
+    global _ANCHOR_INDEX
+
+    with _ANCHOR_INDEX_LOCK:
+        if _ANCHOR_INDEX is None:
+            size = settings.ANCHOR_EMBEDDING_SIZE
+            _ANCHOR_INDEX = AnchorVectorIndex(
+                embedder=thumbnail_embedder(size),
+                embedder_name=f"thumbnail{size}",
+                persist_dir=settings.ANCHOR_INDEX_DIR or None
+            )
+    return _ANCHOR_INDEX
@@ -1,25 +1,48 @@
 """Management of Identity Anchors for visual regression testing."""
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from app.matrix.models import IdentityAnchor
+from app.matrix.anchor_index import AnchorVectorIndex
 
 class AnchorRegistry:
-    """Registry for managing 'Day 0' identity anchors."""
+    """Registry for managing 'Day 0' identity anchors.
 
-    def __init__(self):
+    Anchors are indexed by Muse and by (Muse, asset type). With a vector
+    index, registered anchors are also embedded and can be matched against
+    a render (see best_anchors).
+    """
+
+    def __init__(self, index: Optional[AnchorVectorIndex] = None):
         self.anchors: List[IdentityAnchor] = []
+        self.index = index
+        self._by_muse: Dict[str, List[IdentityAnchor]] = {}
+        # First registered anchor of each type wins, as with a list scan
+        self._by_type: Dict[Tuple[str, str], IdentityAnchor] = {}
 
-    def register_anchor(self, anchor: IdentityAnchor):
-        """Registers a new identity anchor."""
+    def register_anchor(self, anchor: IdentityAnchor, image_bytes: Optional[bytes] = None):
+        """Registers a new identity anchor (embedding its image when indexed)."""
         self.anchors.append(anchor)
+        self._by_muse.setdefault(anchor.muse_id, []).append(anchor)
+        self._by_type.setdefault((anchor.muse_id, anchor.asset_type), anchor)
+        if self.index is not None:
+            self.index.add(anchor, image_bytes)
 
     def get_anchors_for_muse(self, muse_id: str) -> List[IdentityAnchor]:
         """Retrieves all anchors associated with a specific Muse."""
-        return [a for a in self.anchors if a.muse_id == muse_id]
+        return list(self._by_muse.get(muse_id, ()))
 
     def get_anchor_by_type(self, muse_id: str, asset_type: str) -> Optional[IdentityAnchor]:
         """Retrieves a specific type of anchor for a Muse."""
-        for a in self.anchors:
-            if a.muse_id == muse_id and a.asset_type == asset_type:
-                return a
-        return None
+        return self._by_type.get((muse_id, asset_type))
+
+    def best_anchors(
+        self,
+        muse_id: str,
+        image_bytes: bytes,
+        k: int = 1,
+        asset_types: Optional[List[str]] = None
+    ) -> List[Tuple[IdentityAnchor, float]]:
+        """The k anchors of a Muse most similar to an image, with cosine scores."""
+        if self.index is None:
+            return []
+        return self.index.search(muse_id, image_bytes, k=k, asset_types=asset_types)
@@ -0,0 +1,208 @@
+"""Tiered read-through cache for Signature Assets (memory LRU + local disk)."""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AssetCache:
+    """Content-addressed asset cache shared by every assets manager.
+
+    Entries are keyed by object path plus its GCS version token (generation or
+    etag), so a re-uploaded blob never serves stale bytes. A memory entry that
+    was validated less than `revalidate_seconds` ago is served without any GCS
+    round trip; older entries only cost a metadata lookup.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int = 256 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 2 * 1024 * 1024 * 1024,
+        revalidate_seconds: float = 300.0
+    ):
+        """Initializes the cache tiers.
+
+        Args:
+            max_memory_bytes: Byte budget of the in-process LRU tier.
+            disk_dir: Directory of the local-disk tier. None disables it.
+            max_disk_bytes: Byte budget of the disk tier.
+            revalidate_seconds: How long a memory entry is trusted without
+                checking its version against GCS.
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.revalidate_seconds = revalidate_seconds
+
+        # key -> (version, data, validated_at)
+        self._memory: "OrderedDict[str, Tuple[str, bytes, float]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, int] = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+            "revalidations": 0,
+        }
+
+        if self.disk_dir:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"ASSET_CACHE: Disk tier disabled ({e}).")
+                self.disk_dir = None
+
+    # --- Memory tier ---
+
+    def get_fresh(self, key: str) -> Optional[bytes]:
+        """Returns bytes for a memory entry still inside its revalidation window."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and time.monotonic() - entry[2] < self.revalidate_seconds:
+                self._memory.move_to_end(key)
+                self.metrics["hits"] += 1
+                return entry[1]
+        return None
+
+    def get(self, key: str, version: str) -> Optional[bytes]:
+        """Returns cached bytes for an exact (key, version) pair from any tier."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] == version:
+                self._memory[key] = (version, entry[1], time.monotonic())
+                self._memory.move_to_end(key)
+                self.metrics["hits"] += 1
+                self.metrics["revalidations"] += 1
+                return entry[1]
+
+        data = self._read_disk(key, version)
+        if data is not None:
+            with self._lock:
+                self.metrics["disk_hits"] += 1
+            self._store_memory(key, version, data)
+            return data
+
+        with self._lock:
+            self.metrics["misses"] += 1
+        return None
+
+    def put(self, key: str, version: str, data: bytes) -> None:
+        """Stores freshly downloaded bytes in both tiers."""
+        self._store_memory(key, version, data)
+        self._write_disk(key, version, data)
+
+    def invalidate(self, key: str) -> None:
+        """Drops the memory entry of a key (e.g. after a local upload)."""
+        with self._lock:
+            entry = self._memory.pop(key, None)
+            if entry:
+                self._memory_bytes -= len(entry[1])
+
+    def clear(self) -> None:
+        """Empties the memory tier."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss/eviction counters and current memory usage."""
+        with self._lock:
+            return {**self.metrics, "entries": len(self._memory), "memory_bytes": self._memory_bytes}
+
+    def _store_memory(self, key: str, version: str, data: bytes) -> None:
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous:
+                self._memory_bytes -= len(previous[1])
+            self._memory[key] = (version, data, time.monotonic())
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (_, evicted, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                self.metrics["evictions"] += 1
+
+    # --- Disk tier ---
+
+    def _disk_path(self, key: str, version: str) -> str:
+        digest = hashlib.sha256(f"{key}@{version}".encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, digest)
+
+    def _read_disk(self, key: str, version: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key, version)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Refresh recency for disk eviction
+            return data
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, version: str, data: bytes) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key, version)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._enforce_disk_budget()
+        except OSError as e:
+            logger.warning(f"ASSET_CACHE: Failed to persist {key} to disk: {e}")
+
+    def _enforce_disk_budget(self) -> None:
+        files = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                with self._lock:
+                    self.metrics["disk_evictions"] += 1
+            except OSError:
+                pass
+
+
+# Global Singleton
+_ASSET_CACHE: Optional[AssetCache] = None
+_ASSET_CACHE_LOCK = threading.Lock()
+
+
+def get_asset_cache() -> Optional[AssetCache]:
+    """Returns the process-wide asset cache, or None when disabled in settings."""
+    global _ASSET_CACHE
+
+    if not settings.ASSET_CACHE_ENABLED:
+        return None
+
+    with _ASSET_CACHE_LOCK:
+        if _ASSET_CACHE is None:
+            _ASSET_CACHE = AssetCache(
+                max_memory_bytes=settings.ASSET_CACHE_MAX_BYTES,
+                disk_dir=settings.ASSET_CACHE_DIR or None,
+                max_disk_bytes=settings.ASSET_CACHE_MAX_DISK_BYTES,
+                revalidate_seconds=settings.ASSET_CACHE_REVALIDATE_SECONDS
+            )
+    return _ASSET_CACHE
@@ -1,8 +1,11 @@
 """Module for managing Signature Assets in Google Cloud Storage."""
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from google.api_core.exceptions import PreconditionFailed
 from google.cloud import storage
 from app.core.config import settings
+from app.matrix.asset_cache import get_asset_cache
+from app.core.tracing import span
 
 class MockBlob:
     def __init__(self, name):
@@ -49,6 +52,9 @@ class SignatureAssetsManager:
             self.client = MockStorageClient()
             self.bucket = self.client.bucket(bucket_name)
 
+        # Shared read-through cache (None when disabled in settings)
+        self.cache = get_asset_cache()
+
     def upload_asset(
         self,
         destination_name: str,
@@ -69,7 +75,10 @@ class SignatureAssetsManager:
             blob = self.bucket.blob(destination_name)
             if metadata:
                 blob.metadata = metadata
-            blob.upload_from_string(data)
+            with span("gcs.upload", "gcs", path=destination_name, bytes=len(data)):
+                blob.upload_from_string(data)
+            if self.cache:
+                self.cache.invalidate(self._cache_key(destination_name))
             return True
         except Exception:
             return False
@@ -95,8 +104,9 @@ class SignatureAssetsManager:
         Returns:
             List[str]: A list of asset names.
         """
-        blobs = self.client.list_blobs(self.bucket_name, prefix=prefix)
-        return [blob.name for blob in blobs]
+        with span("gcs.list", "gcs", prefix=prefix):
+            blobs = self.client.list_blobs(self.bucket_name, prefix=prefix)
+            return [blob.name for blob in blobs]
 
     def list_muses(self) -> List[str]:
         """Lists all active Muse IDs based on GCS directory structure."""
@@ -128,7 +138,7 @@ class SignatureAssetsManager:
         return sorted(list(muses))
 
     def download_asset(self, asset_name: str) -> bytes:
-        """Downloads the binary data of an asset.
+        """Downloads the binary data of an asset, through the tiered cache.
 
         Args:
             asset_name: The name/path of the asset in the bucket.
@@ -136,8 +146,57 @@ class SignatureAssetsManager:
         Returns:
             bytes: The binary data of the asset.
         """
-        blob = self.bucket.blob(asset_name)
-        return blob.download_as_bytes()
+        with span("gcs.download", "gcs", path=asset_name) as current:
+            blob = self.bucket.blob(asset_name)
+            if not self.cache:
+                return blob.download_as_bytes()
+
+            key = self._cache_key(asset_name)
+            data = self.cache.get_fresh(key)
+            if data is not None:
+                if current:
+                    current.set("cache", "hit")
+                return data
+
+            resolved = self._resolve_version(blob)
+            if resolved is None:
+                # No version token to address the content by: bypass the cache
+                return blob.download_as_bytes()
+
+            version, precondition = resolved
+            data = self.cache.get(key, version)
+            if current:
+                current.set("cache", "revalidated" if data is not None else "miss")
+            if data is None:
+                try:
+                    # Only the resolved version may be cached under its token
+                    data = blob.download_as_bytes(**precondition)
+                except PreconditionFailed:
+                    # Overwritten since the version lookup: serve the new content uncached
+                    return blob.download_as_bytes()
+                self.cache.put(key, version, data)
+            return data
+
+    def _cache_key(self, asset_name: str) -> str:
+        return f"{self.bucket_name}/{asset_name}"
+
+    def _resolve_version(self, blob) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Fetches the blob's generation (or etag) with a metadata-only request.
+
+        Returns the version token and the download precondition pinning that
+        version, or None when the blob has no usable token. Raises the storage
+        error (e.g. NotFound) when the asset does not exist.
+        """
+        if not hasattr(blob, "reload"):
+            return None
+        blob.reload()
+        generation = getattr(blob, "generation", None)
+        if isinstance(generation, (int, str)) and generation != "":
+            return str(generation), {"if_generation_match": int(generation)}
+        etag = getattr(blob, "etag", None)
+        if isinstance(etag, str) and etag != "":
+            return etag, {"if_etag_match": etag}
+        return None
 
     def upload_identity_anchor(
         self,
@@ -62,7 +62,7 @@ class IdentityAnchor(BaseModel):
     muse_id: str
     asset_path: str  # GCS path
     asset_type: str  # e.g., 'face_front', 'full_body', 'signature_style'
-    embedding_vector: List[float] = Field(default_factory=list) # Conceptual for future Vector Search
+    embedding_vector: List[float] = Field(default_factory=list) # Filled by the anchor index (app/matrix/anchor_index.py)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
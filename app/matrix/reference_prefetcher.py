@@ -0,0 +1,162 @@
+"""Concurrent prefetching of the reference assets needed by a production."""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from google.api_core.exceptions import NotFound
+from pydantic import BaseModel, Field
+from app.core.schemas.look import LookSelection
+from app.core.schemas.world import SceneLayout
+from app.matrix.assets_manager import SignatureAssetsManager
+
+logger = logging.getLogger(__name__)
+
+
+def subject_face_path(subject_id: str) -> str:
+    return f"muses/{subject_id}/face.png"
+
+
+def master_face_path(subject_id: str) -> str:
+    return f"muses/{subject_id}/face_master.png"
+
+
+def location_reference_path(location_id: str) -> str:
+    return f"world/locations/{location_id}/reference.png"
+
+
+def object_reference_path(object_id: str) -> str:
+    return f"world/objects/{object_id}/reference.png"
+
+
+def wardrobe_reference_path(item_id: str) -> str:
+    return f"wardrobe/items/{item_id}/reference.png"
+
+
+class ReferenceBundle(BaseModel):
+    """Resolved reference assets of a production, keyed by GCS path."""
+    assets: Dict[str, bytes] = Field(default_factory=dict)
+    missing: List[str] = Field(default_factory=list, description="Paths known to be unavailable")
+
+    def covers(self, path: str) -> bool:
+        """Whether the bundle knows the outcome for a path (found or missing)."""
+        return path in self.assets or path in self.missing
+
+    def has(self, path: str) -> bool:
+        return path in self.assets
+
+    def get(self, path: str) -> Optional[bytes]:
+        return self.assets.get(path)
+
+    def images(self) -> List[bytes]:
+        """All resolved reference images, in fetch order."""
+        return list(self.assets.values())
+
+    def merge(self, *others: "ReferenceBundle") -> "ReferenceBundle":
+        """Returns a new bundle combining this one with others."""
+        merged = ReferenceBundle(assets=dict(self.assets), missing=list(self.missing))
+        for other in others:
+            merged.assets.update(other.assets)
+            merged.missing.extend(p for p in other.missing if p not in merged.missing)
+        return merged
+
+
+class ReferencePrefetcher:
+    """Fetches Identity, World and Wardrobe references concurrently.
+
+    Downloads run on a bounded thread pool. Paths reported as missing by GCS
+    are negatively cached for `negative_ttl_seconds` so optional references
+    that do not exist stop costing a failed round trip per production.
+    """
+
+    def __init__(
+        self,
+        world_assets: SignatureAssetsManager,
+        wardrobe_assets: SignatureAssetsManager,
+        max_workers: int = 8,
+        negative_ttl_seconds: float = 300.0
+    ):
+        self.world_assets = world_assets
+        self.wardrobe_assets = wardrobe_assets
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ref-prefetch")
+        self._missing: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def is_known_missing(self, path: str) -> bool:
+        with self._lock:
+            expiry = self._missing.get(path)
+            if expiry is None:
+                return False
+            if time.monotonic() >= expiry:
+                del self._missing[path]
+                return False
+            return True
+
+    def _mark_missing(self, path: str) -> None:
+        with self._lock:
+            self._missing[path] = time.monotonic() + self.negative_ttl_seconds
+
+    async def fetch(
+        self,
+        requests: Iterable[Tuple[SignatureAssetsManager, str]],
+        required: Iterable[str] = ()
+    ) -> ReferenceBundle:
+        """Downloads the requested paths concurrently.
+
+        Args:
+            requests: (assets manager, path) pairs to resolve.
+            required: Paths whose absence must abort the production.
+
+        Returns:
+            ReferenceBundle: Found assets plus the optional paths that are missing.
+
+        Raises:
+            Exception: The download error of a missing required path.
+        """
+        required = set(required)
+        loop = asyncio.get_running_loop()
+        bundle = ReferenceBundle()
+
+        pending = []
+        for manager, path in requests:
+            if path not in required and self.is_known_missing(path):
+                bundle.missing.append(path)
+                continue
+            # Carry the trace context (production / muse ids) into the pool thread
+            download = functools.partial(contextvars.copy_context().run, manager.download_asset, path)
+            pending.append((path, loop.run_in_executor(self._executor, download)))
+
+        outcomes = await asyncio.gather(*(future for _, future in pending), return_exceptions=True)
+        for (path, _), outcome in zip(pending, outcomes):
+            if not isinstance(outcome, BaseException):
+                bundle.assets[path] = outcome
+                continue
+            if isinstance(outcome, NotFound):
+                self._mark_missing(path)
+            if path in required:
+                raise outcome
+            logger.debug(f"PREFETCH: Optional reference unavailable ({path}): {outcome}")
+            bundle.missing.append(path)
+
+        return bundle
+
+    async def prefetch_identity(self, subject_id: str) -> ReferenceBundle:
+        """Fetches the Muse's face and master face (both mandatory)."""
+        paths = [subject_face_path(subject_id), master_face_path(subject_id)]
+        return await self.fetch([(self.world_assets, p) for p in paths], required=paths)
+
+    async def prefetch_world(self, layout: SceneLayout) -> ReferenceBundle:
+        """Fetches the location and recurring object references of a layout."""
+        paths = [location_reference_path(layout.location_id)]
+        paths += [object_reference_path(obj_id) for obj_id in layout.selected_objects]
+        return await self.fetch([(self.world_assets, p) for p in paths])
+
+    async def prefetch_look(self, look: LookSelection) -> ReferenceBundle:
+        """Fetches the wardrobe references of a look."""
+        paths = [wardrobe_reference_path(item_id) for item_id in look.item_ids]
+        return await self.fetch([(self.wardrobe_assets, p) for p in paths])
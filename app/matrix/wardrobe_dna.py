@@ -1,20 +1,47 @@
 """Registry for the Muse's Wardrobe and Props."""
 
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 from app.matrix.models import WardrobeItem, SceneProp
 
 class WardrobeRegistry:
-    """Manages the Muse's persistent look and tools."""
+    """Manages the Muse's persistent look and tools.
+
+    Items are indexed by tag (in registration order), and the catalog and
+    look context strings are memoized until the next registration.
+    Re-register a model after mutating it.
+    """
+
+    # Distinct looks kept before the look-context memo is reset
+    MAX_LOOK_CONTEXTS = 256
 
     def __init__(self):
         self.items: Dict[str, WardrobeItem] = {}
         self.props: Dict[str, SceneProp] = {}
+        # tag -> item ids (a dict keeps registration order)
+        self._items_by_tag: Dict[str, Dict[str, None]] = {}
+        self._look_contexts: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], str] = {}
+        self._wardrobe_context: Optional[str] = None
+        self._lock = threading.Lock()
 
     def register_item(self, item: WardrobeItem):
-        self.items[item.item_id] = item
+        with self._lock:
+            previous = self.items.get(item.item_id)
+            if previous is not None:
+                for tag in previous.tags:
+                    tagged = self._items_by_tag.get(tag, {})
+                    tagged.pop(item.item_id, None)
+                    if not tagged:
+                        self._items_by_tag.pop(tag, None)
+            self.items[item.item_id] = item
+            for tag in item.tags:
+                self._items_by_tag.setdefault(tag, {})[item.item_id] = None
+            self._invalidate()
 
     def register_prop(self, prop: SceneProp):
-        self.props[prop.prop_id] = prop
+        with self._lock:
+            self.props[prop.prop_id] = prop
+            self._invalidate()
 
     def get_item(self, item_id: str) -> Optional[WardrobeItem]:
         return self.items.get(item_id)
@@ -24,23 +51,55 @@ class WardrobeRegistry:
 
     def list_by_tag(self, tag: str) -> List[WardrobeItem]:
         """Returns items matching a specific style tag."""
-        return [item for item in self.items.values() if tag in item.tags]
+        return [self.items[item_id] for item_id in self._items_by_tag.get(tag, ())]
+
+    def list_tags(self) -> List[str]:
+        return list(self._items_by_tag)
+
+    def get_wardrobe_context(self) -> str:
+        """The catalog of items and props, as given to the Stylist."""
+        with self._lock:
+            if self._wardrobe_context is None:
+                items_info = [
+                    f"- {item.item_id}: {item.name} ({', '.join(item.tags)}). {item.description}"
+                    for item in self.items.values()
+                ]
+                props_info = [f"- {prop.prop_id}: {prop.name}. {prop.description}" for prop in self.props.values()]
+                self._wardrobe_context = (
+                    "AVAILABLE ITEMS:\n" + "\n".join(items_info) + "\n\nAVAILABLE PROPS:\n" + "\n".join(props_info)
+                )
+            return self._wardrobe_context
 
     def get_look_context(self, item_ids: List[str], prop_ids: List[str]) -> str:
         """Generates a descriptive context for the selected look."""
+        key = (tuple(item_ids), tuple(prop_ids))
+        with self._lock:
+            context = self._look_contexts.get(key)
+            if context is None:
+                if len(self._look_contexts) >= self.MAX_LOOK_CONTEXTS:
+                    self._look_contexts.clear()
+                context = self._look_contexts[key] = self._build_look_context(item_ids, prop_ids)
+            return context
+
+    def _build_look_context(self, item_ids: List[str], prop_ids: List[str]) -> str:
         items_desc = []
         for i_id in item_ids:
             item = self.get_item(i_id)
             if item:
                 items_desc.append(f"- {item.name}: {item.description}")
-        
+
         props_desc = []
         for p_id in prop_ids:
             prop = self.get_prop(p_id)
             if prop:
                 props_desc.append(f"- {prop.name}: {prop.description}")
-                
+
         return (
             f"Outfit: {', '.join(items_desc) if items_desc else 'Default'}\n"
             f"Props: {', '.join(props_desc) if props_desc else 'None'}"
         )
+
+    def _invalidate(self) -> None:
+        """Drops memoized contexts. Caller holds the lock."""
+        self._look_contexts.clear()
+        self._wardrobe_context = None
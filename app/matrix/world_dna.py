@@ -1,22 +1,46 @@
 """Registry and loader for the Muse's World DNA (Locations and Objects)."""
 
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Set
 from app.matrix.models import WorldLocation, WorldObject
 
 class WorldRegistry:
-    """Manages the persistent environmental assets of the Muse."""
+    """Manages the persistent environmental assets of the Muse.
+
+    Keeps an object -> locations adjacency next to the locations' own
+    object lists, and memoizes the context strings fed to the Architect.
+    Registering a location or object only invalidates the contexts that
+    mention it. Re-register a model after mutating it.
+    """
 
     def __init__(self):
         self.locations: Dict[str, WorldLocation] = {}
         self.objects: Dict[str, WorldObject] = {}
+        self._locations_by_object: Dict[str, Set[str]] = {}
+        self._contexts: Dict[str, str] = {}
+        self._world_context: Optional[str] = None
+        self._lock = threading.Lock()
 
     def register_location(self, location: WorldLocation):
         """Adds a location to the registry."""
-        self.locations[location.location_id] = location
+        with self._lock:
+            previous = self.locations.get(location.location_id)
+            if previous is not None:
+                for obj_id in previous.recurring_objects:
+                    self._locations_by_object.get(obj_id, set()).discard(previous.location_id)
+            self.locations[location.location_id] = location
+            for obj_id in location.recurring_objects:
+                self._locations_by_object.setdefault(obj_id, set()).add(location.location_id)
+            self._contexts.pop(location.location_id, None)
+            self._world_context = None
 
     def register_object(self, obj: WorldObject):
         """Adds a persistent object to the registry."""
-        self.objects[obj.object_id] = obj
+        with self._lock:
+            self.objects[obj.object_id] = obj
+            for location_id in self._locations_by_object.get(obj.object_id, ()):
+                self._contexts.pop(location_id, None)
+            self._world_context = None
 
     def get_location(self, location_id: str) -> Optional[WorldLocation]:
         """Retrieves a location by its ID."""
@@ -30,20 +54,48 @@ class WorldRegistry:
         """Returns all registered locations."""
         return list(self.locations.values())
 
+    def get_location_objects(self, location_id: str) -> List[WorldObject]:
+        """The registered recurring objects of a location."""
+        loc = self.get_location(location_id)
+        if not loc:
+            return []
+        return [self.objects[obj_id] for obj_id in loc.recurring_objects if obj_id in self.objects]
+
+    def get_object_locations(self, object_id: str) -> List[WorldLocation]:
+        """The locations an object recurs in."""
+        return [self.locations[loc_id] for loc_id in sorted(self._locations_by_object.get(object_id, ()))]
+
     def get_location_context(self, location_id: str) -> str:
         """Generates a descriptive context for a location, including its recurring objects."""
+        with self._lock:
+            context = self._contexts.get(location_id)
+            if context is None:
+                context = self._build_location_context(location_id)
+                if context:
+                    self._contexts[location_id] = context
+            return context
+
+    def get_world_context(self) -> str:
+        """The context of every location, as given to the Architect."""
+        with self._lock:
+            if self._world_context is None:
+                contexts = []
+                for location_id in self.locations:
+                    context = self._contexts.get(location_id)
+                    if context is None:
+                        context = self._contexts[location_id] = self._build_location_context(location_id)
+                    contexts.append(context)
+                self._world_context = "\n\n".join(contexts)
+            return self._world_context
+
+    def _build_location_context(self, location_id: str) -> str:
         loc = self.get_location(location_id)
         if not loc:
             return ""
-        
-        objects_desc = []
-        for obj_id in loc.recurring_objects:
-            obj = self.get_object(obj_id)
-            if obj:
-                objects_desc.append(f"- {obj.name}: {obj.description}")
-        
+
+        objects_desc = [f"- {obj.name}: {obj.description}" for obj in self.get_location_objects(location_id)]
         objs_str = "\n".join(objects_desc) if objects_desc else "None"
-        
+
         return (
             f"Location: {loc.name}\n"
             f"Description: {loc.description}\n"
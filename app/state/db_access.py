@@ -32,21 +32,31 @@ class StateManager:
         mood.last_updated = datetime.now(timezone.utc)
         self.redis.set(self.mood_key, mood.model_dump_json())
 
+    def wallet_balance_key(self, address: str) -> str:
+        """Numeric key holding the live internal USD balance (incremented by the ledger)."""
+        return f"{self.wallet_key_prefix}{address}:usd"
+
     def get_wallet(self, address: str) -> Optional[Wallet]:
         """Retrieves wallet information for a given address."""
         key = f"{self.wallet_key_prefix}{address}"
-        data = self.redis.get(key)
+        data, usd_balance = self.redis.mget(key, self.wallet_balance_key(address))
         if not data:
             return None
         
         json_data = json.loads(data.decode('utf-8'))
+        if usd_balance is not None:
+            # The ledger mutates the balance in place; the document value is its seed
+            json_data["internal_usd_balance"] = float(usd_balance)
         return Wallet(**json_data)
 
     def update_wallet(self, wallet: Wallet) -> None:
-        """Updates the wallet state."""
+        """Updates the wallet state (document and numeric balance together)."""
         key = f"{self.wallet_key_prefix}{wallet.address}"
         wallet.last_updated = datetime.now(timezone.utc)
-        self.redis.set(key, wallet.model_dump_json())
+        self.redis.mset({
+            key: wallet.model_dump_json(),
+            self.wallet_balance_key(wallet.address): repr(wallet.internal_usd_balance)
+        })
 
     # --- HITL & Swarm Persistence ---
 
@@ -20,4 +20,5 @@ class Wallet(BaseModel):
     internal_usd_balance: float = Field(0.0, ge=0.0, description="Internal balance for API cost tracking")
     daily_spend: float = Field(0.0, ge=0.0, description="Amount spent today in USD")
     daily_budget: float = Field(50.0, ge=0.0, description="Daily spending limit in USD")
+    held_usd: float = Field(0.0, ge=0.0, description="Outstanding budget holds in USD")
     last_updated: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,134 @@
+"""Benchmarks for LedgerService transaction recording.
+
+1. Contention: many threads settle small expenses against ONE wallet (like
+   the CFO settling every production on `main-wallet`) and the sustained
+   throughput is compared with the previous WATCH/MULTI optimistic-locking
+   implementation.
+2. Batching: per-transaction latency of record_transaction called in a loop
+   versus record_transactions settling the same batch (spread over a few
+   wallets, like a Best-of-N burst) in one script call.
+
+Usage: PYTHONPATH=. python scripts/benchmark_ledger.py [--writers 32] [--seconds 5] [--batch 50] [--rounds 20]
+(needs the Redis configured by REDIS_HOST / REDIS_PORT)
+"""
+
+import argparse
+import threading
+import time
+import uuid
+import redis
+from app.core.services.ledger_service import LedgerService
+from app.core.schemas.finance import Transaction, TransactionType, TransactionCategory, LedgerEntry
+from app.state.models import Wallet
+
+
+def watch_multi_record(service: LedgerService, address: str, amount: float) -> None:
+    """The pre-Lua implementation: WATCH, GET, parse, MULTI, SET, RPUSH, 5 retries."""
+    tx = Transaction(
+        transaction_id=str(uuid.uuid4())[:8], type=TransactionType.EXPENSE,
+        category=TransactionCategory.API_COST, amount=amount, description="bench"
+    )
+    wallet_key = f"smos:state:wallet:{address}"
+    with service.redis.pipeline() as pipe:
+        for attempt in range(5):
+            try:
+                pipe.watch(wallet_key)
+                wallet = Wallet.model_validate_json(pipe.get(wallet_key))
+                wallet.internal_usd_balance -= amount
+                pipe.multi()
+                pipe.set(wallet_key, wallet.model_dump_json())
+                pipe.rpush(f"{service.history_key_prefix}{address}", tx.model_dump_json())
+                pipe.execute()
+                return
+            except redis.WatchError:
+                continue
+    raise RuntimeError("max retries")
+
+
+def lua_record(service: LedgerService, address: str, amount: float) -> None:
+    service.record_transaction(address, TransactionType.EXPENSE, TransactionCategory.API_COST, amount, "bench")
+
+
+def run(name, record, writers: int, seconds: float) -> None:
+    service = LedgerService()
+    address = f"bench-{uuid.uuid4().hex[:8]}"
+    # No numeric balance key: both implementations start from the document
+    service.redis.set(f"smos:state:wallet:{address}", Wallet(address=address, internal_usd_balance=1e9).model_dump_json())
+
+    done, failed = [0] * writers, [0] * writers
+    deadline = time.perf_counter() + seconds
+
+    def writer(i: int) -> None:
+        while time.perf_counter() < deadline:
+            try:
+                record(service, address, 0.01)
+                done[i] += 1
+            except RuntimeError:
+                failed[i] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    history = service.redis.llen(f"{service.history_key_prefix}{address}")
+    print(f"{name:<12} {sum(done) / elapsed:>10.1f} tx/s   committed={sum(done):<7} "
+          f"failed(max retries)={sum(failed):<6} history={history}")
+    service.redis.delete(
+        f"smos:state:wallet:{address}", f"smos:state:wallet:{address}:usd", f"{service.history_key_prefix}{address}"
+    )
+
+
+def run_batch(batch: int, rounds: int, wallets: int = 4) -> None:
+    service = LedgerService()
+    addresses = [f"bench-{uuid.uuid4().hex[:8]}" for _ in range(wallets)]
+    for address in addresses:
+        service.redis.set(f"smos:state:wallet:{address}", Wallet(address=address, internal_usd_balance=1e9).model_dump_json())
+    entries = [
+        LedgerEntry(
+            wallet_address=addresses[i % wallets], type=TransactionType.EXPENSE,
+            category=TransactionCategory.API_COST, amount=0.01, description=f"bench {i}"
+        )
+        for i in range(batch)
+    ]
+
+    def single() -> None:
+        for e in entries:
+            service.record_transaction(e.wallet_address, e.type, e.category, e.amount, e.description)
+
+    def batched() -> None:
+        service.record_transactions(entries)
+
+    for name, settle in (("single", single), ("batched", batched)):
+        settle()  # warm-up (script load, connections)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            settle()
+        per_tx = (time.perf_counter() - start) / (rounds * batch)
+        print(f"{name:<12} {per_tx * 1e6:>10.1f} us/tx   {1 / per_tx:>10.1f} tx/s")
+
+    for address in addresses:
+        service.redis.delete(
+            f"smos:state:wallet:{address}", f"smos:state:wallet:{address}:usd", f"{service.history_key_prefix}{address}"
+        )
+        for key in service.redis.scan_iter(f"{service.spend.key_prefix}{address}:*"):
+            service.redis.delete(key)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"--- Ledger contention: {args.writers} writers on one wallet, {args.seconds}s each ---")
+    run("watch/multi", watch_multi_record, args.writers, args.seconds)
+    run("lua", lua_record, args.writers, args.seconds)
+
+    print(f"--- Batch settlement: {args.batch} transactions over 4 wallets, {args.rounds} rounds ---")
+    run_batch(args.batch, args.rounds)
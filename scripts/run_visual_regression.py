@@ -15,7 +15,7 @@ logger = logging.getLogger(__name__)
 
 # Thresholds
 MIN_SIMILARITY_SCORE = 0.90 # High level identity
-MAX_PIXEL_DEVIATION = 0.05  # SSIM/RMSE proxy (1.0 - score)
+MAX_PIXEL_DEVIATION = 0.05  # 1.0 - structural similarity
 
 async def run_regression(muse_id: str = "genesis"):
     """Triggers a render and compares it against the Genesis anchor."""
@@ -43,13 +43,13 @@ async def run_regression(muse_id: str = "genesis"):
     logger.info("Performing identity analysis...")
     id_result = comparator.compare_identity(anchor_bytes, render_bytes)
     
-    # 4. Compare Pixels
-    pixel_score = comparator.calculate_pixel_similarity(anchor_bytes, render_bytes)
+    # 4. Compare Structure (MS-SSIM on downsampled grayscale)
+    pixel_score = comparator.calculate_structural_similarity(render_bytes, anchor_bytes)
     
     # --- LOG RESULTS ---
     logger.info(f"Similarity Score: {id_result.similarity_score}")
     logger.info(f"Identity Match: {id_result.identity_match}")
-    logger.info(f"Pixel Similarity: {pixel_score}")
+    logger.info(f"Structural Similarity: {pixel_score}")
     
     # --- ENFORCE THRESHOLDS ---
     failed = False
@@ -37,4 +37,4 @@ def test_wallet_roundtrip(real_redis):
     assert retrieved.internal_usd_balance == 150.0
     
     # Cleanup
-    real_redis.delete(f"smos:state:wallet:test-wallet-real")
\ No newline at end of file
+    real_redis.delete(f"smos:state:wallet:test-wallet-real", f"smos:state:wallet:test-wallet-real:usd")
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""Tests for the AnchorFeatureCache."""
+
+import io
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from PIL import Image
+from app.core.utils.anchor_features import AnchorFeatureCache, anchor_version, decode_rgb
+
+def png(color, size=(32, 24)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color=color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def test_anchor_is_featurized_once():
+    cache = AnchorFeatureCache(thumbnail_size=8)
+    anchor = png("red")
+    with patch("app.core.utils.anchor_features.decode_rgb", wraps=decode_rgb) as m_decode:
+        first = cache.get(anchor)
+        second = cache.get(anchor)
+
+    assert first is second
+    m_decode.assert_called_once()
+    assert first.thumbnail.shape == (8, 8) and first.thumbnail.max() <= 1.0
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_new_anchor_version_is_featurized_again():
+    cache = AnchorFeatureCache()
+    assert cache.get(png("red")).version != cache.get(png("blue")).version
+    assert cache.stats()["misses"] == 2
+
+def test_resized_anchor_is_memoized_per_size():
+    features = AnchorFeatureCache().get(png("red", size=(32, 24)))
+    resized = features.rgb_at((16, 12))
+    assert resized.shape == (12, 16, 3)
+    assert features.rgb_at((16, 12)) is resized
+    assert features.rgb_at((32, 24)) is features.rgb
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    embedder = MagicMock(return_value=[0.1, 0.2, 0.3])
+    anchor = png("green")
+    AnchorFeatureCache(disk_dir=str(tmp_path), embedder=embedder).get(anchor)
+    assert (tmp_path / f"{anchor_version(anchor)}.npz").exists()
+
+    restarted = AnchorFeatureCache(disk_dir=str(tmp_path), embedder=embedder)
+    features = restarted.get(anchor)
+    assert restarted.stats()["disk_hits"] == 1
+    embedder.assert_called_once()
+    np.testing.assert_allclose(features.embedding, [0.1, 0.2, 0.3], rtol=1e-6)
+    assert features.rgb[0, 0].tolist() == [0, 128, 0]
+
+def test_memory_tier_is_bounded():
+    cache = AnchorFeatureCache(max_entries=1)
+    cache.get(png("red"))
+    cache.get(png("blue"))
+    assert cache.stats()["entries"] == 1 and cache.stats()["evictions"] == 1
+
+def test_disk_tier_stores_compact_features_only(tmp_path):
+    anchor = png("green", size=(640, 480))
+    features = AnchorFeatureCache(disk_dir=str(tmp_path), thumbnail_size=8).get(anchor)
+    features.derive(("gray", 16), lambda rgb: np.full((16, 16), 0.5, dtype=np.float32))
+    features.rgb_at((32, 24))
+    with np.load(tmp_path / f"{anchor_version(anchor)}.npz") as data:
+        assert "rgb" not in data.files
+        assert "derived:('gray', 16)" in data.files
+        assert not any("rgb" in name for name in data.files)
+
+    restarted = AnchorFeatureCache(disk_dir=str(tmp_path), thumbnail_size=8)
+    with patch("app.core.utils.anchor_features.decode_rgb", wraps=decode_rgb) as m_decode:
+        restored = restarted.get(anchor)
+        assert restored.size == (640, 480)
+        assert restored.derive(("gray", 16), lambda rgb: pytest.fail("recomputed")).mean() == 0.5
+        m_decode.assert_not_called()
+        assert restored.rgb[0, 0].tolist() == [0, 128, 0]  # Full pixels decoded on demand
+        m_decode.assert_called_once()
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    import os
+    import time
+    cache = AnchorFeatureCache(disk_dir=str(tmp_path))
+    red, blue = png("red"), png("blue")
+    cache.get(red)
+    red_path = tmp_path / f"{anchor_version(red)}.npz"
+    os.utime(red_path, (time.time() - 60, time.time() - 60))
+    cache.max_disk_bytes = int(red_path.stat().st_size * 1.5)
+
+    cache.get(blue)
+    assert not red_path.exists()
+    assert (tmp_path / f"{anchor_version(blue)}.npz").exists()
+    assert cache.stats()["disk_evictions"] == 1
@@ -0,0 +1,107 @@
+"""Tests for the Identity Anchor vector index."""
+
+import io
+import numpy as np
+import pytest
+from unittest.mock import patch
+from PIL import Image
+from app.matrix.anchor_index import AnchorVectorIndex, thumbnail_embedder
+from app.matrix.models import IdentityAnchor
+
+
+def _image(seed: int, noise: float = 0.0) -> bytes:
+    rng = np.random.default_rng(seed)
+    pixels = np.kron(rng.integers(0, 256, (8, 8, 3)), np.ones((16, 16, 1)))
+    if noise:
+        pixels = pixels + rng.normal(0, noise, pixels.shape)
+    buf = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _anchor(anchor_id: str, muse_id: str = "genesis", asset_type: str = "face_front") -> IdentityAnchor:
+    return IdentityAnchor(
+        anchor_id=anchor_id, muse_id=muse_id, asset_type=asset_type,
+        asset_path=f"muses/{muse_id}/anchors/{anchor_id}.png"
+    )
+
+
+def test_search_returns_best_matching_anchors():
+    index = AnchorVectorIndex()
+    for seed in range(5):
+        assert index.add(_anchor(f"a{seed}"), _image(seed))
+
+    matches = index.search("genesis", _image(3, noise=10.0), k=2)
+
+    assert [a.anchor_id for a, _ in matches][0] == "a3"
+    assert matches[0][1] > 0.9 > matches[1][1]
+    assert index.search("other", _image(3)) == []
+
+
+def test_add_populates_embedding_vector_and_replaces_same_id():
+    index = AnchorVectorIndex()
+    anchor = _anchor("a1")
+    index.add(anchor, _image(1))
+    assert len(anchor.embedding_vector) == 32 * 32
+
+    index.add(_anchor("a1"), _image(2))
+    assert len(index.anchors("genesis")) == 1
+    assert index.search("genesis", _image(2))[0][1] == pytest.approx(1.0, abs=1e-4)
+
+
+def test_search_filters_by_asset_type():
+    index = AnchorVectorIndex()
+    index.add(_anchor("face", asset_type="face_front"), _image(1))
+    index.add(_anchor("body", asset_type="full_body"), _image(2))
+
+    matches = index.search("genesis", _image(2), k=2, asset_types=["face_front"])
+    assert [a.anchor_id for a, _ in matches] == ["face"]
+
+
+def test_unembeddable_inputs_are_skipped():
+    index = AnchorVectorIndex()
+    assert not index.add(_anchor("a1"), b"not an image")
+    assert not index.add(_anchor("a2"))
+    index.add(_anchor("a3"), _image(3))
+    assert index.search("genesis", b"not an image") == []
+
+
+def test_index_persists_to_memory_mapped_matrix(tmp_path):
+    index = AnchorVectorIndex(persist_dir=str(tmp_path))
+    index.add(_anchor("a1"), _image(1))
+    index.add(_anchor("a2"), _image(2))
+    index.remove("genesis", "a1")
+
+    def failing_embedder(image_bytes):
+        raise AssertionError("anchors must not be re-embedded")
+
+    reloaded = AnchorVectorIndex(persist_dir=str(tmp_path))
+    matches = reloaded.search("genesis", vector=index.embed(_image(2)))
+
+    assert [a.anchor_id for a, _ in matches] == ["a2"]
+    assert isinstance(reloaded._muses["genesis"].vectors, np.memmap)
+
+    # Another embedder ignores the persisted vectors
+    other = AnchorVectorIndex(embedder=failing_embedder, embedder_name="other", persist_dir=str(tmp_path))
+    assert other.anchors("genesis") == []
+
+
+def test_thumbnail_embedder_is_brightness_invariant():
+    embed = thumbnail_embedder(16)
+    index = AnchorVectorIndex(embedder=embed)
+    with Image.open(io.BytesIO(_image(1))) as img:
+        brighter = np.clip(np.asarray(img, dtype=np.int16) + 20, 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(brighter).save(buf, format="PNG")
+
+    assert float(index.embed(_image(1)) @ index.embed(buf.getvalue())) > 0.98
+
+
+def test_thumbnail_embedder_skips_empty_images():
+    import warnings
+    # A mocked/undecodable image converts to an empty pixel array
+    with patch("PIL.Image.open"):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert thumbnail_embedder(16)(_image(1)) is None
+    assert AnchorVectorIndex(embedder=lambda image_bytes: None).embed(_image(1)) is None
@@ -26,3 +26,39 @@ def test_anchor_registry():
 def test_get_anchor_none():
     registry = AnchorRegistry()
     assert registry.get_anchor_by_type("none", "none") is None
+
+def test_indexed_registry_matches_best_anchor():
+    import io
+    from PIL import Image
+    from app.matrix.anchor_index import AnchorVectorIndex
+
+    def image(color):
+        buf = io.BytesIO()
+        img = Image.linear_gradient("L").convert("RGB")
+        Image.blend(img, Image.new("RGB", img.size, color), 0.5).rotate(0 if color == "red" else 90).save(buf, format="PNG")
+        return buf.getvalue()
+
+    registry = AnchorRegistry(index=AnchorVectorIndex())
+    for anchor_id, color in (("front", "red"), ("side", "blue")):
+        registry.register_anchor(IdentityAnchor(
+            anchor_id=anchor_id, muse_id="genesis", asset_path=f"{anchor_id}.png", asset_type="face_front"
+        ), image(color))
+
+    best, score = registry.best_anchors("genesis", image("blue"))[0]
+    assert best.anchor_id == "side"
+    assert score == pytest.approx(1.0, abs=1e-4)
+    assert AnchorRegistry().best_anchors("genesis", image("blue")) == []
+
+def test_registry_indexes_by_muse_and_type():
+    registry = AnchorRegistry()
+    for anchor_id, muse_id, asset_type in (
+        ("a1", "genesis", "face_front"), ("a2", "genesis", "face_front"), ("a3", "other", "full_body")
+    ):
+        registry.register_anchor(IdentityAnchor(
+            anchor_id=anchor_id, muse_id=muse_id, asset_path=f"{anchor_id}.png", asset_type=asset_type
+        ))
+
+    assert [a.anchor_id for a in registry.get_anchors_for_muse("genesis")] == ["a1", "a2"]
+    assert registry.get_anchor_by_type("genesis", "face_front").anchor_id == "a1"
+    assert registry.get_anchor_by_type("genesis", "full_body") is None
+    assert registry.get_anchors_for_muse("nobody") == []
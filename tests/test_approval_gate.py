@@ -0,0 +1,77 @@
+"""Tests for the event-driven HITL ApprovalGate."""
+
+import asyncio
+import time
+import uuid
+import pytest
+from unittest.mock import MagicMock
+from app.core.services.approval_gate import ApprovalGate, approval_key
+
+@pytest.fixture
+def mock_redis():
+    client = MagicMock()
+    client.get.return_value = None
+    return client
+
+@pytest.mark.asyncio
+async def test_signal_resumes_waiter_without_polling(mock_redis):
+    gate = ApprovalGate(mock_redis)
+    waiter = asyncio.create_task(gate.wait("t1", timeout=5.0))
+    while gate.waiting() == 0:
+        await asyncio.sleep(0)
+
+    start = time.monotonic()
+    gate.signal("t1", "approve")
+    assert await waiter == "approve"
+    assert time.monotonic() - start < 0.5
+    assert gate.waiting() == 0
+    mock_redis.set.assert_called_once_with(approval_key("t1"), "approve", ex=3600)
+    mock_redis.publish.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_decision_sent_before_the_gate_is_honoured(mock_redis):
+    mock_redis.get.return_value = b"reject"
+    gate = ApprovalGate(mock_redis)
+    assert await gate.wait("t2", timeout=5.0) == "reject"
+
+@pytest.mark.asyncio
+async def test_many_waiters_and_timeout(mock_redis):
+    gate = ApprovalGate(mock_redis)
+    waiters = [asyncio.create_task(gate.wait(f"task-{i}", timeout=5.0)) for i in range(200)]
+    while gate.waiting() < 200:
+        await asyncio.sleep(0)
+
+    for i in range(200):
+        gate.signal(f"task-{i}", "approve" if i % 2 == 0 else "reject")
+    results = await asyncio.gather(*waiters)
+    assert results.count("approve") == 100
+
+    assert await gate.wait("orphan", timeout=0.05) is None
+
+def test_invalid_action_is_rejected(mock_redis):
+    with pytest.raises(ValueError, match="Unknown HITL action"):
+        ApprovalGate(mock_redis).signal("t3", "maybe")
+
+@pytest.mark.asyncio
+async def test_cross_process_delivery_via_pubsub(real_redis):
+    """A decision published by another process (separate gate) wakes the waiter."""
+    task_id = f"test-{uuid.uuid4().hex[:8]}"
+    waiting_gate = ApprovalGate(real_redis)
+    waiter = asyncio.create_task(waiting_gate.wait(task_id, timeout=10.0))
+    await asyncio.sleep(0.3)
+
+    await asyncio.to_thread(ApprovalGate(real_redis).signal, task_id, "approve")
+    try:
+        assert await asyncio.wait_for(waiter, 5.0) == "approve"
+    finally:
+        real_redis.delete(approval_key(task_id))
+
+def test_listener_does_not_spin_on_empty_reads():
+    """A pub/sub read that returns early without a message still waits out its timeout."""
+    pubsub = MagicMock()
+    pubsub.get_message.return_value = None
+    start = time.monotonic()
+    for _ in range(5):
+        assert ApprovalGate._next_message(pubsub, timeout=0.02) is None
+    assert time.monotonic() - start >= 0.09
+    assert pubsub.get_message.call_count == 5
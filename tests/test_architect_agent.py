@@ -46,3 +46,22 @@ def test_plan_scene_layout(mock_genai, world_registry):
     assert layout.location_id == "paris_studio"
     assert "blue_sofa" in layout.selected_objects
     mock_client.models.generate_content.assert_called_once()
+
+def test_similar_intents_reuse_the_cached_layout(mock_genai, world_registry):
+    """Test that the semantic cache serves near-identical intents without a model call."""
+    from app.core.services.semantic_cache import SemanticCache
+    mock_genai.models.generate_content.return_value = MagicMock(parsed=SceneLayout(
+        location_id="paris_studio", selected_objects=[], scene_description="Studio."
+    ))
+    vectors = {"She is relaxing in her studio": [1.0, 0.0], "She relaxes in her studio": [0.99, 0.05],
+               "A rooftop party": [0.0, 1.0]}
+    
+    agent = ArchitectAgent()
+    agent.semantic_cache = SemanticCache("architect", vectors.__getitem__, threshold=0.95)
+    agent.plan_scene_layout("She is relaxing in her studio", world_registry)
+    cached = agent.plan_scene_layout("She relaxes in her studio", world_registry)
+    agent.plan_scene_layout("A rooftop party", world_registry)
+    
+    assert cached.location_id == "paris_studio"
+    assert mock_genai.models.generate_content.call_count == 2
+    assert agent.semantic_cache.stats()["hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
@@ -0,0 +1,93 @@
+"""Tests for the tiered AssetCache and the cached download path."""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from app.matrix.asset_cache import AssetCache
+from app.matrix.assets_manager import SignatureAssetsManager
+
+def test_memory_lru_respects_byte_budget():
+    cache = AssetCache(max_memory_bytes=10, disk_dir=None)
+    cache.put("b/a.png", "1", b"aaaaa")
+    cache.put("b/b.png", "1", b"bbbbb")
+    cache.put("b/c.png", "1", b"ccccc")  # Evicts a.png (least recently used)
+
+    assert cache.get("b/a.png", "1") is None
+    assert cache.get("b/c.png", "1") == b"ccccc"
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_bytes"] == 10
+
+def test_version_mismatch_is_a_miss():
+    cache = AssetCache(disk_dir=None)
+    cache.put("b/face.png", "1", b"old")
+    assert cache.get("b/face.png", "2") is None
+    assert cache.stats()["misses"] == 1
+
+def test_disk_tier_survives_memory_eviction(tmp_path):
+    cache = AssetCache(max_memory_bytes=4, disk_dir=str(tmp_path))
+    cache.put("b/a.png", "7", b"aaaa")
+    cache.put("b/b.png", "7", b"bbbb")  # a.png leaves memory, stays on disk
+
+    assert cache.get("b/a.png", "7") == b"aaaa"
+    assert cache.stats()["disk_hits"] == 1
+
+    # A fresh process (empty memory) reuses the disk tier
+    cold = AssetCache(disk_dir=str(tmp_path))
+    assert cold.get("b/b.png", "7") == b"bbbb"
+
+def test_revalidation_window():
+    cache = AssetCache(disk_dir=None, revalidate_seconds=60)
+    cache.put("b/face.png", "1", b"face")
+    assert cache.get_fresh("b/face.png") == b"face"
+
+    cache.revalidate_seconds = 0
+    assert cache.get_fresh("b/face.png") is None
+
+@pytest.fixture
+def manager():
+    with patch("google.cloud.storage.Client") as mock_client:
+        blob = MagicMock()
+        blob.generation = 1712
+        blob.download_as_bytes.return_value = b"anchor"
+        mock_client.return_value.bucket.return_value.blob.return_value = blob
+        manager = SignatureAssetsManager(bucket_name="test-bucket")
+        manager.cache = AssetCache(disk_dir=None)
+        yield manager, blob
+
+def test_download_asset_steady_state_skips_gcs(manager):
+    manager, blob = manager
+
+    assert manager.download_asset("muses/genesis/face.png") == b"anchor"
+    assert manager.download_asset("muses/genesis/face.png") == b"anchor"
+
+    blob.download_as_bytes.assert_called_once()
+    blob.reload.assert_called_once()
+    assert manager.cache.stats()["hits"] == 1
+
+def test_download_asset_refetches_new_generation(manager):
+    manager, blob = manager
+    manager.cache.revalidate_seconds = 0
+
+    manager.download_asset("muses/genesis/face.png")
+    blob.generation = 1713
+    blob.download_as_bytes.return_value = b"new_anchor"
+
+    assert manager.download_asset("muses/genesis/face.png") == b"new_anchor"
+    assert blob.download_as_bytes.call_count == 2
+
+def test_download_is_pinned_to_the_resolved_generation(manager):
+    """A blob overwritten between the version lookup and the download is not cached under the old version."""
+    from google.api_core.exceptions import PreconditionFailed
+    manager, blob = manager
+    blob.download_as_bytes.side_effect = [PreconditionFailed("generation changed"), b"new_anchor"]
+
+    assert manager.download_asset("muses/genesis/face.png") == b"new_anchor"
+    assert blob.download_as_bytes.call_args_list[0].kwargs == {"if_generation_match": 1712}
+    assert manager.cache.get("test-bucket/muses/genesis/face.png", "1712") is None
+
+def test_upload_invalidates_cached_entry(manager):
+    manager, blob = manager
+    manager.download_asset("muses/genesis/face.png")
+
+    manager.upload_asset("muses/genesis/face.png", b"replacement")
+    assert manager.cache.get_fresh("test-bucket/muses/genesis/face.png") is None
@@ -5,7 +5,7 @@ import datetime
 from unittest.mock import MagicMock, patch
 from app.agents.finance_agent import CFOAgent
 from app.state.models import Wallet
-from app.core.schemas.finance import Transaction, TransactionType, TransactionCategory
+from app.core.schemas.finance import Transaction, TransactionType, TransactionCategory, SolvencyCheck
 
 @pytest.fixture
 def mock_genai():
@@ -72,4 +72,129 @@ def test_cfo_authorized_production(mock_genai):
     report = agent.verify_solvency(wallet, [], 0.5)
     
     assert report.is_authorized is True
-    assert report.projected_balance == 9.5
\ No newline at end of file
+    assert report.projected_balance == 9.5
+@pytest.mark.parametrize("vvs,expected", [(95.0, (10, 3)), (85.0, (5, 2)), (70.0, (2, 1)), (10.0, (1, 1))])
+def test_allocate_tournament(mock_genai, vvs, expected):
+    """Tests that the tournament promotes ceil(N/4) keyframes to video."""
+    agent = CFOAgent()
+    assert agent.allocate_tournament(vvs) == expected
+
+def test_cfo_reads_windowed_spend_when_no_history_is_given(mock_genai):
+    """Tests that the circuit breaker uses the ledger's hourly spend counters."""
+    agent = CFOAgent()
+    agent.ledger_service = MagicMock()
+    agent.ledger_service.get_hourly_spend.return_value = 4.5
+    wallet = Wallet(address="muse-01", balance=1000.0, internal_usd_balance=10.0)
+
+    report = agent.verify_solvency(wallet, None, 1.0)
+
+    assert report.circuit_breaker_active is True
+    agent.ledger_service.get_hourly_spend.assert_called_once_with("muse-01")
+    mock_genai.models.generate_content.assert_not_called()
+
+def test_cfo_daily_budget(mock_genai):
+    """Tests that production is blocked once today's spend would exceed the daily budget."""
+    agent = CFOAgent()
+    wallet = Wallet(address="muse-01", balance=1000.0, internal_usd_balance=100.0, daily_spend=49.5, daily_budget=50.0)
+
+    report = agent.verify_solvency(wallet, [], 1.0, hourly_spend=0.0)
+
+    assert report.is_authorized is False
+    assert report.circuit_breaker_active is False
+    assert "DAILY BUDGET" in report.reasoning
+    mock_genai.models.generate_content.assert_not_called()
+
+def test_cfo_fast_path_approves_minor_costs_locally(mock_genai):
+    """Tests that a cost that is a small share of a healthy balance skips the LLM."""
+    agent = CFOAgent()
+    wallet = Wallet(address="muse-01", balance=1000.0, internal_usd_balance=100.0)
+
+    report = agent.verify_solvency(wallet, [], 1.0, hourly_spend=0.0)
+
+    assert report.is_authorized is True
+    assert report.projected_balance == 99.0
+    assert "FAST PATH" in report.reasoning
+    assert agent.metrics["fast_approved"] == 1
+    mock_genai.models.generate_content.assert_not_called()
+
+def test_cfo_fast_path_denies_negative_projection_locally(mock_genai):
+    """Tests that a negative projected balance is prohibited without the LLM."""
+    agent = CFOAgent()
+    wallet = Wallet(address="muse-01", balance=1000.0, internal_usd_balance=0.5)
+
+    report = agent.verify_solvency(wallet, [], 1.0, hourly_spend=0.0)
+
+    assert report.is_authorized is False
+    assert report.projected_balance == -0.5
+    assert agent.metrics["fast_denied"] == 1
+    mock_genai.models.generate_content.assert_not_called()
+
+def test_cfo_caches_borderline_decisions(mock_genai):
+    """Tests that borderline cases ask the LLM once per balance/cost bucket."""
+    agent = CFOAgent()
+    mock_genai.models.generate_content.return_value.parsed = SolvencyCheck(
+        is_authorized=True, projected_balance=8.0, reasoning="Strategic alignment"
+    )
+
+    first = agent.verify_solvency(Wallet(address="muse-01", internal_usd_balance=10.0), [], 2.0, hourly_spend=0.0)
+    second = agent.verify_solvency(Wallet(address="muse-01", internal_usd_balance=10.2), [], 2.0, hourly_spend=0.0)
+
+    assert first.is_authorized is second.is_authorized is True
+    assert second.projected_balance == pytest.approx(8.2)
+    assert agent.metrics == {"fast_approved": 0, "fast_denied": 0, "cache_hits": 1, "llm_calls": 1}
+    mock_genai.models.generate_content.assert_called_once()
+
+    # Another cost bucket is a new decision
+    agent.verify_solvency(Wallet(address="muse-01", internal_usd_balance=10.0), [], 4.0, hourly_spend=0.0)
+    assert mock_genai.models.generate_content.call_count == 2
+
+def test_cfo_cache_is_scoped_to_the_wallet(mock_genai):
+    """Tests that one muse's cached decision is never reused for another muse."""
+    agent = CFOAgent()
+    mock_genai.models.generate_content.return_value.parsed = SolvencyCheck(
+        is_authorized=True, projected_balance=8.0, reasoning="Strategic alignment"
+    )
+
+    agent.verify_solvency(Wallet(address="muse-01", internal_usd_balance=10.0), [], 2.0, hourly_spend=0.0)
+    agent.verify_solvency(Wallet(address="muse-02", internal_usd_balance=10.0), [], 2.0, hourly_spend=0.0)
+
+    assert mock_genai.models.generate_content.call_count == 2
+    assert agent.metrics["cache_hits"] == 0
+
+def test_cfo_cache_hit_still_enforces_negative_projection(mock_genai):
+    """Tests that a cached approval from a neighbouring bucket value never authorizes an overdraft."""
+    agent = CFOAgent()
+    mock_genai.models.generate_content.return_value.parsed = SolvencyCheck(
+        is_authorized=True, projected_balance=0.09, reasoning="Strategic alignment"
+    )
+
+    with patch("app.agents.finance_agent.settings.CFO_FAST_PATH_ENABLED", False):
+        first = agent.verify_solvency(Wallet(address="muse-01", internal_usd_balance=1.09), [], 1.0, hourly_spend=0.0)
+        second = agent.verify_solvency(Wallet(address="muse-01", internal_usd_balance=1.0), [], 1.09, hourly_spend=0.0)
+
+    assert agent._bucket(1.09) == agent._bucket(1.0)
+    assert first.is_authorized is True
+    assert agent.metrics["cache_hits"] == 1
+    assert second.is_authorized is False
+    assert second.projected_balance == pytest.approx(-0.09)
+    assert "PROHIBITION" in second.reasoning
+
+def test_cfo_counts_outstanding_holds(mock_genai):
+    """Tests that balance held by in-flight productions is not spendable."""
+    agent = CFOAgent()
+    wallet = Wallet(address="muse-01", balance=1000.0, internal_usd_balance=10.0, held_usd=9.8)
+
+    report = agent.verify_solvency(wallet, [], 0.5, hourly_spend=0.0)
+
+    assert report.is_authorized is False
+    assert report.projected_balance == pytest.approx(-0.3)
+    mock_genai.models.generate_content.assert_not_called()
+
+def test_cfo_rollback_releases_the_hold(mock_genai):
+    agent = CFOAgent()
+    agent.ledger_service = MagicMock()
+    agent.ledger_service.release_hold.return_value = True
+
+    assert agent.rollback_production_cost(1.5, "task-1") is True
+    agent.ledger_service.release_hold.assert_called_once_with("main-wallet", "task-1")
+    agent.ledger_service.record_transaction.assert_not_called()
@@ -0,0 +1,96 @@
+"""Tests for the Redis-backed production CheckpointStore."""
+
+import uuid
+import pytest
+from unittest.mock import MagicMock
+from app.core.services.checkpoint_store import CheckpointStore
+from app.core.schemas.world import SceneLayout
+from app.state.models import Mood
+
+def test_checkpoint_roundtrip(real_redis):
+    store = CheckpointStore(real_redis, ttl_seconds=60, models=[Mood, SceneLayout])
+    production_id = f"test-{uuid.uuid4().hex[:8]}"
+    try:
+        store.save_inputs(production_id, {"intent": "i", "mood": Mood(valence=0.3), "task_id": production_id})
+        store.save_stage(production_id, "layout", SceneLayout(location_id="loc", scene_description="d"))
+        store.save_stage(production_id, "render", b"\x89PNG\xff")
+        store.save_stage(production_id, "visual_qa", {"image": b"\x00img", "scores": [0.5, 1.0]})
+
+        inputs, stages = store.load(production_id)
+        assert inputs["mood"].valence == 0.3
+        assert stages["layout"].location_id == "loc"
+        assert stages["render"] == b"\x89PNG\xff"
+        assert stages["visual_qa"] == {"image": b"\x00img", "scores": [0.5, 1.0]}
+        assert inputs["mood"].last_updated.tzinfo is not None
+        assert store.completed_stages(production_id) == ["layout", "render", "visual_qa"]
+        assert 0 < real_redis.ttl(f"smos:checkpoint:{production_id}") <= 60
+    finally:
+        store.discard(production_id)
+    assert store.load(production_id) is None
+
+def test_unserializable_output_is_skipped():
+    client = MagicMock()
+    store = CheckpointStore(client)
+    assert store.save_stage("p1", "narrative", lambda: None) is False
+    client.pipeline.assert_not_called()
+
+def test_stages_without_inputs_are_not_resumable(real_redis):
+    store = CheckpointStore(real_redis, ttl_seconds=60)
+    production_id = f"test-{uuid.uuid4().hex[:8]}"
+    try:
+        store.save_stage(production_id, "render", b"image")
+        assert store.load(production_id) is None
+    finally:
+        store.discard(production_id)
+
+def test_unregistered_models_are_not_stored_or_restored(real_redis):
+    """Only the store's model classes round-trip: a checkpoint can never name arbitrary types."""
+    writer = CheckpointStore(real_redis, ttl_seconds=60, models=[Mood, SceneLayout])
+    reader = CheckpointStore(real_redis, ttl_seconds=60, models=[Mood])
+    production_id = f"test-{uuid.uuid4().hex[:8]}"
+    try:
+        assert writer.save_stage(production_id, "look", Mood()) is True
+        assert CheckpointStore(real_redis, models=[SceneLayout]).save_stage(production_id, "x", Mood()) is False
+        writer.save_inputs(production_id, {"intent": "i"})
+        writer.save_stage(production_id, "layout", SceneLayout(location_id="loc", scene_description="d"))
+
+        _, stages = reader.load(production_id)
+        assert "layout" not in stages
+        assert isinstance(stages["look"], Mood)
+    finally:
+        writer.discard(production_id)
+
+def test_checkpoints_are_json(real_redis):
+    import json
+    store = CheckpointStore(real_redis, ttl_seconds=60)
+    production_id = f"test-{uuid.uuid4().hex[:8]}"
+    try:
+        store.save_stage(production_id, "render", b"image")
+        raw = real_redis.hget(f"smos:checkpoint:{production_id}", "render")
+        assert json.loads(raw) == {"__bytes__": "aW1hZ2U="}
+    finally:
+        store.discard(production_id)
+
+def test_large_outputs_are_stored_outside_redis(real_redis, tmp_path):
+    store = CheckpointStore(real_redis, ttl_seconds=60, blob_dir=str(tmp_path), max_inline_bytes=8)
+    production_id = f"test-{uuid.uuid4().hex[:8]}"
+    video = b"\x00veo" * 1000
+    try:
+        store.save_inputs(production_id, {"task_id": production_id})
+        store.save_stage(production_id, "video", video)
+        store.save_stage(production_id, "render", b"tiny")
+
+        payload = real_redis.hget(f"smos:checkpoint:{production_id}", "video")
+        assert len(payload) < 200
+        _, stages = store.load(production_id)
+        assert stages == {"video": video, "render": b"tiny"}
+
+        # A lost blob only drops its stage, which then runs again
+        for blob in tmp_path.rglob("*.bin"):
+            blob.unlink()
+        _, stages = store.load(production_id)
+        assert stages == {"render": b"tiny"}
+    finally:
+        store.save_stage(production_id, "video", video)
+        store.discard(production_id)
+    assert list(tmp_path.iterdir()) == []
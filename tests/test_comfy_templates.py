@@ -0,0 +1,56 @@
+"""Tests for the compiled ComfyUI workflow template registry."""
+
+import json
+import pytest
+from app.core.services.comfy_templates import WorkflowTemplate, WorkflowTemplateRegistry, TemplateError
+
+GRAPH = {
+    "3": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "sd_xl_base_1.0.safetensors"}},
+    "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "{prompt:str}", "clip": ["3", 1]}},
+    "10": {"class_type": "DepthAnythingV2", "inputs": {"strength": "{depth_strength:float}", "blur": "{blur_radius:float}"}}
+}
+
+def test_bind_is_typed_and_copy_on_write():
+    template = WorkflowTemplate("render", GRAPH)
+    assert set(template.slots) == {"prompt", "depth_strength", "blur_radius"}
+
+    bound = template.bind(prompt="Muse", depth_strength=0.65, blur_radius=3)
+    assert bound["10"]["inputs"] == {"strength": 0.65, "blur": 3.0}
+    # Untouched nodes are shared, bound nodes never leak into the template
+    assert bound["3"] is template.graph["3"]
+    assert template.graph["6"]["inputs"]["text"] == "{prompt:str}"
+
+def test_prompt_cannot_inject_into_the_graph():
+    template = WorkflowTemplate("render", GRAPH)
+    hostile = 'x", "clip": ["99", 0]}, "99": {"class_type": "SaveImage'
+    bound = template.bind(prompt=hostile, depth_strength=1.0, blur_radius=0.0)
+
+    assert set(bound) == {"3", "6", "10"}
+    assert json.loads(json.dumps(bound))["6"]["inputs"]["text"] == hostile
+
+def test_invalid_bindings_are_rejected():
+    template = WorkflowTemplate("render", GRAPH)
+    with pytest.raises(TemplateError, match="expects float"):
+        template.bind(prompt="p", depth_strength="0.5", blur_radius=1.0)
+    with pytest.raises(TemplateError, match="missing"):
+        template.bind(prompt="p")
+    with pytest.raises(TemplateError, match="no slot"):
+        template.bind(prompt="p", depth_strength=1.0, blur_radius=1.0, seed=4)
+
+def test_invalid_templates_fail_at_compile_time():
+    with pytest.raises(TemplateError, match="missing node"):
+        WorkflowTemplate("broken", {"1": {"class_type": "VAEDecode", "inputs": {"samples": ["7", 0]}}})
+    with pytest.raises(TemplateError, match="both"):
+        WorkflowTemplate("conflict", {"1": {"class_type": "X", "inputs": {"a": "{v:int}", "b": "{v:str}"}}})
+
+def test_registry_loads_shipped_workflows_once(tmp_path):
+    (tmp_path / "good.json").write_text(json.dumps(GRAPH))
+    (tmp_path / "bad.json").write_text("{not json")
+
+    registry = WorkflowTemplateRegistry()
+    assert registry.load_directory(str(tmp_path)) == ["good"]
+    graph = registry.render("good", prompt="p", depth_strength=0.3, blur_radius=7.0)
+    assert graph["6"]["inputs"]["text"] == "p"
+
+    shipped = WorkflowTemplateRegistry()
+    assert "default_render" in shipped.load_directory()
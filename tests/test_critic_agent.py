@@ -52,3 +52,88 @@ def test_detect_mask_area(mock_genai):
     assert box == [100, 200, 300, 400]
     call_args = mock_client.models.generate_content.call_args
     assert "Detect the bounding box" in call_args.kwargs["contents"][0].parts[1].text
+
+def test_verify_consistency_overlaps_checks(mock_genai):
+    """Tests that the biometric check and the artifact call run concurrently."""
+    import threading
+    both_running = threading.Barrier(2, timeout=5)
+    
+    def face_similarity(image, face):
+        both_running.wait()
+        return 0.5
+    
+    def artifacts(*args, **kwargs):
+        both_running.wait()
+        return MagicMock(parsed=[QAFailure(area="hands", severity=0.3, description="d", action_type="inpaint")])
+    
+    mock_genai.models.generate_content.side_effect = artifacts
+    agent = CriticAgent()
+    agent.state_manager = MagicMock()
+    with patch.object(agent.comparator, "calculate_face_similarity", side_effect=face_similarity):
+        report = agent.verify_consistency(b"img", b"face")
+    
+    assert report.final_decision == "REPAIR_REQUIRED"
+    assert [f.area for f in report.failures] == ["hands", "face"]
+    assert agent.state_manager.publish_event.call_count == 2
+
+def test_verify_consistency_survives_event_failures(mock_genai):
+    """Tests that a failing vitrine publish does not fail the audit."""
+    mock_genai.models.generate_content.return_value = MagicMock(parsed=[])
+    agent = CriticAgent()
+    agent.state_manager = MagicMock()
+    agent.state_manager.publish_event.side_effect = ConnectionError("redis down")
+    with patch.object(agent.comparator, "calculate_face_similarity", return_value=0.9):
+        report = agent.verify_consistency(b"img", b"face")
+    assert report.final_decision == "APPROVED"
+
+async def test_verify_consistency_async_runs_off_the_loop(mock_genai):
+    """Tests that the async audit returns the same report without blocking the loop."""
+    mock_genai.models.generate_content.return_value = MagicMock(parsed=[])
+    agent = CriticAgent()
+    agent.state_manager = MagicMock()
+    with patch.object(agent.comparator, "calculate_face_similarity", return_value=0.9):
+        report = await agent.verify_consistency_async(b"img", b"face")
+    assert report.final_decision == "APPROVED"
+
+async def test_verify_batch_uses_one_artifact_call(mock_genai):
+    """Tests that a batch audit issues one Gemini call and one report per image."""
+    from app.core.schemas.qa import ImageArtifacts
+    mock_genai.models.generate_content.return_value = MagicMock(parsed=[
+        ImageArtifacts(image_index=1, failures=[QAFailure(area="hands", severity=0.9, description="d", action_type="regenerate")]),
+        ImageArtifacts(image_index=0, failures=[]),
+    ])
+    agent = CriticAgent()
+    agent.state_manager = MagicMock()
+    scores = {b"a": 0.9, b"b": 0.95}
+    with patch.object(agent.comparator, "calculate_face_similarity", side_effect=lambda image, face: scores[image]):
+        reports = await agent.verify_batch([b"a", b"b"], b"face")
+    
+    assert [r.final_decision for r in reports] == ["APPROVED", "REPAIR_REQUIRED"]
+    mock_genai.models.generate_content.assert_called_once()
+
+def test_batch_falls_back_to_single_audits_for_missing_images(mock_genai):
+    """Tests that images missing from the batched answer are audited one by one."""
+    from app.core.schemas.qa import ImageArtifacts
+    mock_genai.models.generate_content.side_effect = [
+        MagicMock(parsed=[ImageArtifacts(image_index=0, failures=[])]),
+        MagicMock(parsed=[]),
+    ]
+    agent = CriticAgent()
+    assert agent.detect_physical_artifacts_batch([b"a", b"b"]) == [[], []]
+    assert mock_genai.models.generate_content.call_count == 2
+
+def test_detect_mask_areas_in_one_call(mock_genai):
+    """Tests that all areas are located by one call, with single detections for the missed ones."""
+    from app.core.schemas.qa import AreaDetection
+    mock_genai.models.generate_content.side_effect = [
+        MagicMock(parsed=[AreaDetection(area_index=1, box_2d=[5, 6, 7, 8]), AreaDetection(area_index=0, box_2d=[1, 2, 3, 4])]),
+        MagicMock(parsed=[AreaDetection(area_index=0, box_2d=None)]),
+        MagicMock(parsed=MagicMock(box_2d=[9, 9, 10, 10])),
+    ]
+    agent = CriticAgent()
+
+    assert agent.detect_mask_areas(b"img", ["face", "hands"]) == [[1, 2, 3, 4], [5, 6, 7, 8]]
+    assert mock_genai.models.generate_content.call_count == 1
+
+    assert agent.detect_mask_areas(b"img", ["face", "hands"]) == [None, [9, 9, 10, 10]]
+    assert mock_genai.models.generate_content.call_count == 3
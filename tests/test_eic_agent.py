@@ -33,3 +33,51 @@ def test_stage_for_review(mock_assets_manager):
     metadata_call = next(c for c in calls if "metadata.json" in c.args[0])
     uploaded_json = json.loads(metadata_call.args[1].decode("utf-8"))
     assert uploaded_json["title"] == "My Awesome Post"
+
+def test_stage_for_review_skips_already_staged_productions(mock_assets_manager):
+    """The same production staged twice for a muse is not uploaded again."""
+    import io
+    from PIL import Image
+    from app.core.utils.perceptual_hash import RenderHashIndex
+
+    agent = EICAgent()
+    agent.render_index = RenderHashIndex()
+    buf = io.BytesIO()
+    Image.radial_gradient("L").convert("RGB").save(buf, format="PNG")
+    production_data = {
+        "title": "Post", "caption": "", "video_bytes": b"video_data", "poster_image_bytes": buf.getvalue()
+    }
+
+    first = agent.stage_for_review(production_data, "genesis")
+    second = agent.stage_for_review(production_data, "genesis")
+    other_muse = agent.stage_for_review(production_data, "other")
+
+    assert second == first
+    assert other_muse != first
+    assert mock_assets_manager.upload_asset.call_count == 6
+
+def test_stage_for_review_flags_new_content_with_a_near_duplicate_poster(mock_assets_manager):
+    """A new video/caption behind a known poster is staged, flagged for the reviewer."""
+    import io
+    from PIL import Image
+    from app.core.utils.perceptual_hash import RenderHashIndex
+
+    agent = EICAgent()
+    agent.render_index = RenderHashIndex()
+    buf = io.BytesIO()
+    Image.radial_gradient("L").convert("RGB").save(buf, format="PNG")
+    production_data = {
+        "title": "Post", "caption": "", "video_bytes": b"video_data", "poster_image_bytes": buf.getvalue()
+    }
+
+    first = agent.stage_for_review(production_data, "genesis")
+    second = agent.stage_for_review(
+        dict(production_data, video_bytes=b"new_video", caption="New caption"), "genesis"
+    )
+
+    assert second != first
+    uploads = {c.args[0]: c.args[1] for c in mock_assets_manager.upload_asset.call_args_list}
+    assert uploads[f"{second}/video.mp4"] == b"new_video"
+    metadata = json.loads(uploads[f"{second}/metadata.json"].decode("utf-8"))
+    assert metadata["caption"] == "New caption"
+    assert metadata["near_duplicate_of"] == first
@@ -0,0 +1,68 @@
+"""Tests for the vectorized SimilarityEngine."""
+
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from app.core.utils.image_similarity import SimilarityEngine, ssim, ms_ssim, rmse_similarity, to_grayscale
+
+@pytest.fixture
+def base():
+    return np.random.default_rng(0).random((64, 64))
+
+def naive_ssim(x, y, window=7):
+    values = []
+    for i in range(x.shape[0] - window + 1):
+        for j in range(x.shape[1] - window + 1):
+            a, b = x[i:i + window, j:j + window], y[i:i + window, j:j + window]
+            mx, my = a.mean(), b.mean()
+            sxy = ((a - mx) * (b - my)).sum() / (window * window - 1)
+            values.append((2 * mx * my + 1e-4) * (2 * sxy + 9e-4) /
+                          ((mx * mx + my * my + 1e-4) * (a.var(ddof=1) + b.var(ddof=1) + 9e-4)))
+    return np.mean(values)
+
+def test_ssim_matches_the_reference_definition(base):
+    noisy = np.clip(base + np.random.default_rng(1).normal(0, 0.1, base.shape), 0, 1)
+    assert ssim(base[:24, :24], noisy[:24, :24]) == pytest.approx(naive_ssim(base[:24, :24], noisy[:24, :24]))
+    assert ssim(base, base) == pytest.approx(1.0)
+
+def test_metrics_broadcast_one_against_many(base):
+    rng = np.random.default_rng(2)
+    stack = np.stack([np.clip(base + rng.normal(0, s, base.shape), 0, 1) for s in (0.0, 0.05, 0.3)])
+    for metric in (ssim, ms_ssim, rmse_similarity):
+        scores = metric(base, stack)
+        assert scores.shape == (3,)
+        assert scores[0] == pytest.approx(1.0)
+        assert scores[0] > scores[1] > scores[2]
+        np.testing.assert_allclose(scores, [float(metric(base, s)) for s in stack])
+
+def test_ms_ssim_drops_scales_smaller_than_the_window(base):
+    assert ms_ssim(base[:10, :10], base[:10, :10]) == pytest.approx(1.0)
+
+def test_engine_ranks_renders_against_an_anchor():
+    def png(array):
+        buffer = io.BytesIO()
+        Image.fromarray(array).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    rng = np.random.default_rng(3)
+    anchor = rng.integers(0, 255, (96, 96, 3), dtype=np.uint8)
+    close = np.clip(anchor.astype(int) + rng.integers(-10, 10, anchor.shape), 0, 255).astype(np.uint8)
+    far = rng.integers(0, 255, (96, 96, 3), dtype=np.uint8)
+
+    engine = SimilarityEngine(size=(48, 48), metric="ms_ssim")
+    scores = engine.many_to_one([png(far), png(close), png(anchor)], png(anchor))
+    assert scores[2] == 1.0 and scores[1] > scores[0]
+    assert engine.one_to_many(png(anchor), [png(close)]) == [scores[1]]
+
+def test_region_crops_before_downsampling():
+    image = np.zeros((100, 100, 3), dtype=np.uint8)
+    image[:50, :50] = 255
+    face = to_grayscale(image, (8, 8), region=[0, 0, 500, 500])
+    assert face.min() == 1.0
+
+def test_invalid_configuration_is_rejected():
+    with pytest.raises(ValueError):
+        SimilarityEngine(metric="psnr")
+    with pytest.raises(ValueError):
+        SimilarityEngine(size=(4, 4))
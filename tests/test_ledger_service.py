@@ -2,6 +2,7 @@
 
 import pytest
 import json
+import uuid
 from unittest.mock import MagicMock, patch
 from app.core.services.ledger_service import LedgerService
 from app.core.schemas.finance import TransactionType, TransactionCategory
@@ -19,17 +20,13 @@ def mock_deps():
 def test_record_expense(mock_deps):
     service = LedgerService()
     addr = "test_wallet"
-    
-    # Setup mock wallet
-    initial_wallet = Wallet(address=addr, balance=1.0, internal_usd_balance=10.0)
-    
-    # Mock Redis pipeline for WATCH/MULTI
-    mock_pipeline = MagicMock()
-    mock_deps["redis"].pipeline.return_value.__enter__.return_value = mock_pipeline
-    mock_pipeline.get.return_value = initial_wallet.model_dump_json().encode('utf-8')
+    mock_deps["state"].wallet_key_prefix = "smos:state:wallet:"
+    mock_deps["state"].wallet_balance_key.return_value = f"smos:state:wallet:{addr}:usd"
+    apply_script = mock_deps["redis"].register_script.return_value
+    apply_script.return_value = [b"9.5"]
     
     # Record expense
-    service.record_transaction(
+    tx = service.record_transaction(
         wallet_address=addr,
         tx_type=TransactionType.EXPENSE,
         category=TransactionCategory.API_COST,
@@ -37,15 +34,170 @@ def test_record_expense(mock_deps):
         description="Test cost"
     )
     
-    # Verify pipeline execution
-    mock_pipeline.multi.assert_called_once()
-    mock_pipeline.execute.assert_called_once()
-    
-    # Verify balance update
-    set_args = mock_pipeline.set.call_args.args
-    assert addr in set_args[0]
-    updated_wallet = Wallet.model_validate_json(set_args[1])
-    assert updated_wallet.internal_usd_balance == 9.50
+    # One server-side script call: balance key decremented, history appended
+    apply_script.assert_called_once()
+    kwargs = apply_script.call_args.kwargs
+    assert kwargs["keys"][:3] == [
+        f"smos:state:wallet:{addr}", f"smos:state:wallet:{addr}:usd", f"smos:finance:history:{addr}"
+    ]
+    assert list(kwargs["keys"][3:5]) == list(service.spend.bucket_keys(addr, tx.timestamp.timestamp()))
+    assert float(kwargs["args"][0]) == -0.50
+    assert json.loads(kwargs["args"][1])["transaction_id"] == tx.transaction_id
+    assert float(kwargs["args"][2]) == 0.50
+    assert kwargs["args"][3] == ""
+
+def test_record_transaction_unknown_wallet(mock_deps):
+    service = LedgerService()
+    mock_deps["redis"].register_script.return_value.return_value = None
+    with pytest.raises(ValueError):
+        service.record_transaction("ghost", TransactionType.EXPENSE, TransactionCategory.API_COST, 1.0, "x")
+
+@pytest.fixture
+def live_wallet(real_redis):
+    from app.state.db_access import StateManager
+    addr = f"test-ledger-{uuid.uuid4().hex[:8]}"
+    StateManager().update_wallet(Wallet(address=addr, balance=1.0, internal_usd_balance=100.0))
+    yield addr
+    real_redis.delete(
+        f"smos:state:wallet:{addr}", f"smos:state:wallet:{addr}:usd", f"smos:finance:history:{addr}",
+        f"smos:finance:holds:{addr}", f"smos:finance:holds:{addr}:expiry"
+    )
+    for key in real_redis.scan_iter(f"smos:finance:spend:{addr}:*"):
+        real_redis.delete(key)
+
+def test_concurrent_writers_never_conflict(live_wallet):
+    """Many threads settling against one wallet all land, with an exact balance."""
+    from concurrent.futures import ThreadPoolExecutor
+    from app.state.db_access import StateManager
+    service = LedgerService()
+
+    def settle(i):
+        tx_type = TransactionType.INCOME if i % 4 == 0 else TransactionType.EXPENSE
+        return service.record_transaction(live_wallet, tx_type, TransactionCategory.API_COST, 0.25, f"tx {i}")
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(settle, range(200)))
+
+    # 50 incomes, 150 expenses of 0.25
+    assert StateManager().get_wallet(live_wallet).internal_usd_balance == pytest.approx(75.0)
+    assert len(service.get_transaction_history(live_wallet, count=500)) == 200
+
+def test_spend_buckets_follow_expenses(live_wallet, real_redis):
+    """Expenses (not income) land in the minute and day buckets, with a TTL."""
+    service = LedgerService()
+    tx = service.record_transaction(live_wallet, TransactionType.EXPENSE, TransactionCategory.API_COST, 1.25, "a")
+    service.record_transaction(live_wallet, TransactionType.EXPENSE, TransactionCategory.API_COST, 0.5, "b")
+    service.record_transaction(live_wallet, TransactionType.INCOME, TransactionCategory.OTHER, 3.0, "refund")
+
+    assert service.get_hourly_spend(live_wallet) == pytest.approx(1.75)
+    wallet = service.get_wallet(live_wallet)
+    assert wallet.daily_spend == pytest.approx(1.75)
+    assert wallet.internal_usd_balance == pytest.approx(101.25)
+
+    minute_key, day_key = service.spend.bucket_keys(live_wallet, tx.timestamp.timestamp())
+    assert 0 < real_redis.ttl(minute_key) <= 2 * 3600
+    assert 0 < real_redis.ttl(day_key) <= 2 * 86400
+
+def test_legacy_wallet_document_seeds_the_balance(live_wallet, real_redis):
+    """Wallets stored before the numeric balance key existed keep their balance."""
+    from app.state.db_access import StateManager
+    real_redis.delete(f"smos:state:wallet:{live_wallet}:usd")
+    LedgerService().record_transaction(live_wallet, TransactionType.EXPENSE, TransactionCategory.API_COST, 0.5, "x")
+    assert StateManager().get_wallet(live_wallet).internal_usd_balance == pytest.approx(99.5)
+
+def test_holds_reserve_the_available_balance(live_wallet):
+    """Holds cannot jointly exceed the balance, and settling debits the actual cost."""
+    service = LedgerService()
+    assert service.place_hold(live_wallet, 60.0, hold_id="a").amount == 60.0
+    assert service.place_hold(live_wallet, 50.0, hold_id="b") is None
+    assert service.place_hold(live_wallet, 40.0, hold_id="b") is not None
+    assert service.get_wallet(live_wallet).held_usd == pytest.approx(100.0)
+
+    # Settle a below its estimate, release b
+    service.record_transaction(live_wallet, TransactionType.EXPENSE, TransactionCategory.API_COST, 45.0, "a", hold_id="a")
+    assert service.release_hold(live_wallet, "b") is True
+    assert service.release_hold(live_wallet, "b") is False
+
+    wallet = service.get_wallet(live_wallet)
+    assert wallet.internal_usd_balance == pytest.approx(55.0)
+    assert wallet.held_usd == 0.0
+
+def test_replacing_a_hold_does_not_count_it_twice(live_wallet):
+    service = LedgerService()
+    service.place_hold(live_wallet, 80.0, hold_id="task")
+    assert service.place_hold(live_wallet, 90.0, hold_id="task") is not None
+    assert service.get_held_amount(live_wallet) == pytest.approx(90.0)
+
+def test_expired_holds_free_the_balance(live_wallet):
+    service = LedgerService()
+    service.place_hold(live_wallet, 100.0, hold_id="stale", ttl_seconds=-1)
+    assert service.get_held_amount(live_wallet) == 0.0
+    assert service.place_hold(live_wallet, 100.0, hold_id="fresh") is not None
+
+def test_concurrent_holds_never_overcommit(live_wallet):
+    from concurrent.futures import ThreadPoolExecutor
+    service = LedgerService()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        holds = list(pool.map(lambda i: service.place_hold(live_wallet, 7.0, hold_id=f"p{i}"), range(40)))
+    assert sum(h is not None for h in holds) == 14
+    assert service.get_held_amount(live_wallet) == pytest.approx(98.0)
+
+def test_place_hold_unknown_wallet(mock_deps):
+    mock_deps["redis"].register_script.return_value.return_value = None
+    with pytest.raises(ValueError):
+        LedgerService().place_hold("ghost", 1.0)
+
+@pytest.fixture
+def second_wallet(real_redis):
+    from app.state.db_access import StateManager
+    addr = f"test-ledger-{uuid.uuid4().hex[:8]}"
+    StateManager().update_wallet(Wallet(address=addr, balance=1.0, internal_usd_balance=10.0))
+    yield addr
+    real_redis.delete(f"smos:state:wallet:{addr}", f"smos:state:wallet:{addr}:usd", f"smos:finance:history:{addr}")
+    for key in real_redis.scan_iter(f"smos:finance:spend:{addr}:*"):
+        real_redis.delete(key)
+
+def test_record_transactions_spans_wallets(live_wallet, second_wallet):
+    """A batch lands for every wallet in one script call, in order."""
+    from app.core.schemas.finance import LedgerEntry
+    service = LedgerService()
+    service.place_hold(live_wallet, 5.0, hold_id="burst")
+
+    txs = service.record_transactions([
+        LedgerEntry(wallet_address=live_wallet, type=TransactionType.EXPENSE,
+                    category=TransactionCategory.API_COST, amount=4.0, description="variants", hold_id="burst"),
+        LedgerEntry(wallet_address=second_wallet, type=TransactionType.INCOME,
+                    category=TransactionCategory.SPONSORSHIP, amount=2.5, description="gift"),
+        LedgerEntry(wallet_address=live_wallet, type=TransactionType.EXPENSE,
+                    category=TransactionCategory.STORAGE_COST, amount=1.0, description="storage"),
+    ])
+
+    assert [tx.description for tx in txs] == ["variants", "gift", "storage"]
+    first, second = service.get_wallet(live_wallet), service.get_wallet(second_wallet)
+    assert first.internal_usd_balance == pytest.approx(95.0)
+    assert first.daily_spend == pytest.approx(5.0)
+    assert first.held_usd == 0.0
+    assert second.internal_usd_balance == pytest.approx(12.5)
+    assert [tx.transaction_id for tx in service.get_transaction_history(live_wallet)] == [txs[0].transaction_id, txs[2].transaction_id]
+
+def test_record_transactions_is_all_or_nothing(live_wallet):
+    from app.core.schemas.finance import LedgerEntry
+    service = LedgerService()
+    batch = [
+        LedgerEntry(wallet_address=live_wallet, type=TransactionType.EXPENSE,
+                    category=TransactionCategory.API_COST, amount=1.0, description="ok"),
+        LedgerEntry(wallet_address=f"ghost-{uuid.uuid4().hex[:8]}", type=TransactionType.EXPENSE,
+                    category=TransactionCategory.API_COST, amount=1.0, description="ghost"),
+    ]
+    with pytest.raises(ValueError, match="ghost-"):
+        service.record_transactions(batch)
+
+    assert service.get_wallet(live_wallet).internal_usd_balance == pytest.approx(100.0)
+    assert service.get_transaction_history(live_wallet) == []
+
+def test_record_transactions_empty_batch(mock_deps):
+    assert LedgerService().record_transactions([]) == []
+    mock_deps["redis"].register_script.return_value.assert_not_called()
 
 def test_get_history(mock_deps):
     service = LedgerService()
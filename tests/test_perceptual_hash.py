@@ -0,0 +1,98 @@
+"""Tests for the perceptual-hash render index."""
+
+import io
+import random
+import numpy as np
+import pytest
+from PIL import Image
+from app.core.utils.perceptual_hash import (
+    MultiIndexHashTable, RenderHashIndex, dhash, hamming, phash
+)
+
+
+def _render(seed: int, noise: float = 0.0) -> bytes:
+    rng = np.random.default_rng(seed)
+    base = np.kron(rng.integers(0, 256, (8, 8, 3)), np.ones((32, 32, 1)))
+    if noise:
+        base = base + np.random.default_rng(seed + 1000).normal(0, noise, base.shape)
+    buf = io.BytesIO()
+    Image.fromarray(np.clip(base, 0, 255).astype(np.uint8)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("hash_func", [phash, dhash])
+def test_hash_is_stable_under_small_changes(hash_func):
+    original = hash_func(_render(1))
+    assert hamming(original, hash_func(_render(1, noise=4.0))) <= 4
+    assert hamming(original, hash_func(_render(2))) > 10
+
+
+def test_multi_index_search_matches_brute_force():
+    rnd = random.Random(7)
+    table = MultiIndexHashTable()
+    hashes = {i: rnd.getrandbits(64) for i in range(500)}
+    query = hashes[0]
+    # Plant near neighbours of the query
+    for i, flips in enumerate([1, 3, 5, 8], start=500):
+        value = query
+        for bit in rnd.sample(range(64), flips):
+            value ^= 1 << bit
+        hashes[i] = value
+    for i, value in hashes.items():
+        table.add(i, value)
+
+    for radius in (0, 4, 8):
+        expected = sorted(i for i, v in hashes.items() if hamming(query, v) <= radius)
+        assert sorted(i for i, _ in table.search(query, radius)) == expected
+
+    table.remove(500)
+    assert 500 not in [i for i, _ in table.search(query, 8)]
+
+
+def test_index_finds_near_duplicates_per_muse_and_label():
+    index = RenderHashIndex(radius=4)
+    index.add("muse_a", _render(1), "rejected", {"report": "bad"})
+    index.add("muse_a", _render(3), "approved")
+
+    hit = index.nearest("muse_a", _render(1, noise=4.0), labels=("approved", "rejected"))
+    assert hit.label == "rejected" and hit.metadata == {"report": "bad"}
+    assert index.nearest("muse_a", _render(1), labels=("approved",)) is None
+    assert index.nearest("muse_b", _render(1)) is None
+    assert index.find("muse_a", _render(2)) == []
+
+
+def test_index_evicts_oldest_entries_per_muse():
+    index = RenderHashIndex(max_entries_per_muse=2)
+    for seed in (1, 2, 3):
+        index.add("muse_a", _render(seed), "generated")
+
+    assert index.stats() == {"muse_a": 2}
+    assert index.find("muse_a", _render(1)) == []
+    assert index.find("muse_a", _render(3))
+
+
+def test_undecodable_images_are_not_indexed():
+    index = RenderHashIndex()
+    assert index.fingerprint(b"not an image") is None
+    assert index.add("muse_a", b"not an image", "generated") is None
+    assert index.find("muse_a", b"not an image") == []
+    assert index.stats() == {}
+
+
+def test_unknown_algorithm_rejected():
+    with pytest.raises(ValueError):
+        RenderHashIndex(algorithm="ahash")
+
+
+def test_fingerprints_of_the_same_bytes_are_computed_once():
+    index = RenderHashIndex()
+    calls = []
+    index.hash_image = lambda image: calls.append(image) or phash(image)
+    render = _render(3)
+
+    first = index.fingerprint(render)
+    index.add("muse_a", render, "generated")
+    assert index.fingerprint(bytes(render)) == first
+    assert index.fingerprint(b"not an image") is None
+    assert index.fingerprint(b"not an image") is None
+    assert len(calls) == 2
@@ -0,0 +1,113 @@
+"""Tests for the StageGraph pipeline executor."""
+
+import asyncio
+import time
+import pytest
+from app.core.pipeline import StageGraph, run_sync
+
+@pytest.mark.asyncio
+async def test_stages_receive_upstream_outputs():
+    graph = (
+        StageGraph()
+        .add_stage("a", lambda ctx: ctx["seed"] + 1)
+        .add_stage("b", lambda ctx: ctx["a"] * 10, ["a"])
+    )
+    result = await graph.run({"seed": 1})
+    assert result["a"] == 2
+    assert result["b"] == 20
+
+@pytest.mark.asyncio
+async def test_independent_stages_overlap():
+    """Two blocking 0.2s stages without mutual dependency run concurrently."""
+    def slow(ctx):
+        time.sleep(0.2)
+        return True
+
+    graph = (
+        StageGraph()
+        .add_stage("left", slow)
+        .add_stage("right", slow)
+        .add_stage("join", lambda ctx: ctx["left"] and ctx["right"], ["left", "right"])
+    )
+    start = time.monotonic()
+    result = await graph.run()
+    assert result["join"] is True
+    assert time.monotonic() - start < 0.35
+
+@pytest.mark.asyncio
+async def test_coroutine_stages_are_awaited():
+    async def fetch(ctx):
+        await asyncio.sleep(0)
+        return "payload"
+
+    result = await StageGraph().add_stage("fetch", fetch).run()
+    assert result["fetch"] == "payload"
+
+@pytest.mark.asyncio
+async def test_async_start_hook_runs_before_stage():
+    events = []
+
+    async def started(stage):
+        await asyncio.sleep(0.01)
+        events.append(f"start:{stage}")
+
+    def work(ctx):
+        events.append("work")
+        return True
+
+    await StageGraph().add_stage("work", work).run(on_stage_start=started)
+    assert events == ["start:work", "work"]
+
+@pytest.mark.asyncio
+async def test_failure_stops_downstream_stages():
+    called = []
+
+    def boom(ctx):
+        raise RuntimeError("Financial blockade: test")
+
+    graph = (
+        StageGraph()
+        .add_stage("gate", boom)
+        .add_stage("after", lambda ctx: called.append("after"), ["gate"])
+    )
+    with pytest.raises(RuntimeError, match="Financial blockade"):
+        await graph.run()
+    assert called == []
+
+@pytest.mark.asyncio
+async def test_targets_and_precomputed_context():
+    called = []
+
+    def track(name):
+        def _stage(ctx):
+            called.append(name)
+            return name
+        return _stage
+
+    graph = (
+        StageGraph()
+        .add_stage("a", track("a"))
+        .add_stage("b", track("b"), ["a"])
+        .add_stage("c", track("c"), ["a"])
+    )
+    result = await graph.run({"a": "cached"}, targets=["b"])
+    assert called == ["b"]
+    assert "c" not in result
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        StageGraph().add_stage("a", lambda ctx: 1, ["missing"]).validate()
+
+    cyclic = StageGraph().add_stage("a", lambda ctx: 1, ["b"]).add_stage("b", lambda ctx: 1, ["a"])
+    with pytest.raises(ValueError, match="Cycle"):
+        cyclic.validate()
+
+    with pytest.raises(ValueError, match="already registered"):
+        StageGraph().add_stage("a", lambda ctx: 1).add_stage("a", lambda ctx: 2)
+
+@pytest.mark.asyncio
+async def test_run_sync_inside_running_loop():
+    async def work():
+        return 42
+
+    assert run_sync(work()) == 42
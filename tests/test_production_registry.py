@@ -0,0 +1,134 @@
+"""Tests for the ProductionRegistry (live production status)."""
+
+import uuid
+import pytest
+import redis
+from unittest.mock import MagicMock
+from app.core.production_registry import ProductionRegistry
+from app.core.production_scheduler import ProductionScheduler, SchedulerOverloaded
+from app.core.schemas.production import ProductionState
+
+@pytest.fixture
+def registry(real_redis):
+    prefix = f"test-{uuid.uuid4().hex[:8]}:"
+    yield ProductionRegistry(real_redis, history_size=2, ttl_seconds=60, key_prefix=prefix)
+    for key in real_redis.keys(f"{prefix}*"):
+        real_redis.delete(key)
+
+def test_lifecycle_is_visible_from_redis(registry):
+    registry.register("p1", "genesis", intent="intent", priority=7.0)
+    registry.mark_running("p1", "genesis")
+    registry.stage_started("p1", "render")
+    registry.stage_started("p1", "world_references")
+
+    # A fresh registry (another API replica) sees the live progress
+    reader = ProductionRegistry(registry.redis, key_prefix=registry.key_prefix)
+    [active] = reader.list_active()
+    assert active.state == ProductionState.RUNNING
+    assert sorted(active.current_stages) == ["render", "world_references"]
+
+    registry.stage_completed("p1", "render", cost=0.04)
+    registry.set_state("p1", ProductionState.AWAITING_APPROVAL)
+    record = reader.get("p1")
+    assert record.current_stages == ["world_references"]
+    assert record.stage_timings["render"].duration_seconds is not None
+    assert record.cost_so_far == pytest.approx(0.04)
+    assert reader.summary()["by_state"] == {"awaiting_approval": 1}
+
+    registry.complete("p1", {"review_path": "gs://review/p1"}, cost=0.54)
+    assert reader.list_active() == []
+    [done] = reader.list_recent()
+    assert done.state == ProductionState.COMPLETED
+    assert done.artifacts["review_path"] == "gs://review/p1"
+    assert done.cost_so_far == 0.54
+
+def test_history_is_bounded_and_newest_first(registry):
+    for task_id in ("a", "b", "c"):
+        registry.mark_running(task_id, "genesis")
+        registry.fail(task_id, "RuntimeError: boom")
+    assert [r.task_id for r in registry.list_recent()] == ["c", "b"]
+    assert registry.get("c").error == "RuntimeError: boom"
+
+def test_unknown_tasks_are_ignored(registry):
+    registry.stage_started("missing-v1", "render")
+    registry.complete("missing-v1", {})
+    assert registry.get("missing-v1") is None
+
+def test_stuck_productions_are_reported(registry):
+    registry.mark_running("slow", "genesis")
+    assert registry.summary(stuck_after_seconds=3600)["stuck"] == []
+    assert registry.summary(stuck_after_seconds=-1)["stuck"] == ["slow"]
+
+def test_redis_failures_do_not_break_productions():
+    client = MagicMock()
+    client.pipeline.return_value.execute.side_effect = redis.ConnectionError("down")
+    registry = ProductionRegistry(client)
+    registry.mark_running("p1", "genesis")
+    registry.stage_started("p1", "render")
+    assert registry.get("p1").current_stages == ["render"]
+
+async def test_scheduler_events_track_queued_and_shed_productions(registry):
+    scheduler = ProductionScheduler(max_workers=1, per_muse_limit=1, max_queue=1)
+    scheduler.add_listener(registry.on_scheduler_event)
+    scheduler.add_listener(registry.on_scheduler_event)
+    assert len(scheduler._listeners) == 1
+
+    try:
+        # The single worker is idle until the loop yields, so both stay queued
+        await scheduler.submit(lambda: _noop(), "genesis", priority=1.0, task_id="low")
+        with pytest.raises(SchedulerOverloaded):
+            await scheduler.submit(lambda: _noop(), "genesis", priority=0.5, task_id="lower")
+        await scheduler.submit(lambda: _noop(), "genesis", priority=9.0, task_id="high")
+
+        registry.flush()
+        assert [r.task_id for r in registry.list_active()] == ["high"]
+        assert registry.get("low").state == ProductionState.SHED
+        assert registry.get("lower") is None
+    finally:
+        await scheduler.shutdown()
+
+async def _noop():
+    return None
+
+async def test_scheduler_events_do_not_write_to_redis_on_the_loop(registry):
+    """Queued/shed events update the record in place; Redis is written by the writer thread."""
+    import threading
+    writers = []
+    persist = registry._persist
+    registry._persist = lambda record, finished=False: (writers.append(threading.current_thread().name), persist(record, finished))
+
+    registry.on_scheduler_event("p1", "queued", "genesis", 3.0)
+    registry.on_scheduler_event("p2", "queued", "genesis", 1.0)
+    registry.on_scheduler_event("p2", "shed", "genesis", 1.0)
+    assert registry.get("p1").priority == 3.0
+    assert registry.get("p2").state == ProductionState.SHED
+
+    registry.flush()
+    assert set(writers) == {"registry-writer"}
+    reader = ProductionRegistry(registry.redis, key_prefix=registry.key_prefix)
+    assert [r.task_id for r in reader.list_active()] == ["p1"]
+    assert reader.get("p2").state == ProductionState.SHED
+
+def test_deferred_write_never_overwrites_a_newer_state(registry):
+    from unittest.mock import patch
+    with patch.object(registry, "_persist_later") as deferred:
+        registry.on_scheduler_event("p1", "queued", "genesis", 3.0)
+    registry.complete("p1", {"review_path": "gs://review/p1"})
+
+    # The queued event's write lands after the completion
+    ProductionRegistry._persist_later(registry, *deferred.call_args.args)
+    registry.flush()
+    reader = ProductionRegistry(registry.redis, key_prefix=registry.key_prefix)
+    assert reader.get("p1").state == ProductionState.COMPLETED
+    assert reader.list_active() == []
+
+def test_concurrent_updates_persist_the_latest_state(registry):
+    """Redis never keeps an older snapshot than the in-process record."""
+    from concurrent.futures import ThreadPoolExecutor
+    registry.mark_running("p1", "genesis")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: registry.stage_completed("p1", f"s{i}", cost=0.01), range(100)))
+
+    reader = ProductionRegistry(registry.redis, key_prefix=registry.key_prefix)
+    assert reader.get("p1").cost_so_far == pytest.approx(1.0)
+    assert reader.get("p1").updated_at == registry.get("p1").updated_at
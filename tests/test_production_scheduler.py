@@ -0,0 +1,122 @@
+"""Tests for the global ProductionScheduler."""
+
+import asyncio
+import pytest
+from app.core.production_scheduler import ProductionScheduler, SchedulerOverloaded
+
+def make_job(log, name, gate=None):
+    async def job():
+        log.append(("start", name))
+        if gate is not None:
+            await gate.wait()
+        log.append(("end", name))
+    return job
+
+async def wait_until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_global_and_per_muse_caps():
+    scheduler = ProductionScheduler(max_workers=2, per_muse_limit=1, max_queue=10)
+    gate = asyncio.Event()
+    log = []
+    await scheduler.submit(make_job(log, "a1", gate), subject_id="aria")
+    await scheduler.submit(make_job(log, "a2", gate), subject_id="aria")
+    await scheduler.submit(make_job(log, "b1", gate), subject_id="nova")
+
+    # a2 waits for aria's slot, b1 overtakes it
+    await wait_until(lambda: scheduler.stats()["running"] == 2)
+    assert {name for event, name in log if event == "start"} == {"a1", "b1"}
+    stats = scheduler.stats()
+    assert stats["queue_depth"] == 1
+    assert stats["running_per_muse"] == {"aria": 1, "nova": 1}
+
+    gate.set()
+    await wait_until(lambda: scheduler.stats()["completed"] == 3)
+    await scheduler.shutdown()
+
+@pytest.mark.asyncio
+async def test_priority_order_and_shedding():
+    scheduler = ProductionScheduler(max_workers=1, per_muse_limit=1, max_queue=2)
+    blocker = asyncio.Event()
+    log = []
+    await scheduler.submit(make_job(log, "running", blocker), subject_id="m")
+    await wait_until(lambda: scheduler.stats()["running"] == 1)
+
+    await scheduler.submit(make_job(log, "low"), subject_id="m", priority=10)
+    await scheduler.submit(make_job(log, "mid"), subject_id="m", priority=50)
+    # Queue full: a higher priority evicts 'low', a lower one is rejected
+    await scheduler.submit(make_job(log, "high"), subject_id="m", priority=90)
+    with pytest.raises(SchedulerOverloaded):
+        await scheduler.submit(make_job(log, "lowest"), subject_id="m", priority=1)
+
+    blocker.set()
+    await wait_until(lambda: scheduler.stats()["completed"] == 3)
+    assert [name for event, name in log if event == "start"] == ["running", "high", "mid"]
+    assert scheduler.stats()["shed"] == 2
+    assert scheduler.stats()["max_queue_depth"] == 2
+    await scheduler.shutdown()
+
+@pytest.mark.asyncio
+async def test_failures_release_slots():
+    scheduler = ProductionScheduler(max_workers=1, per_muse_limit=1, max_queue=5)
+
+    async def boom():
+        raise RuntimeError("Veo quota exhausted")
+
+    log = []
+    await scheduler.submit(boom, subject_id="m")
+    await scheduler.submit(make_job(log, "next"), subject_id="m")
+    await wait_until(lambda: scheduler.stats()["completed"] == 1)
+    assert scheduler.stats()["failed"] == 1
+    assert scheduler.stats()["running"] == 0
+    await scheduler.shutdown()
+
+@pytest.mark.asyncio
+async def test_parked_productions_free_their_slots():
+    """Productions waiting at a HITL gate do not block other launches."""
+    scheduler = ProductionScheduler(max_workers=4, per_muse_limit=4, max_queue=10)
+    approval = asyncio.Event()
+    log = []
+
+    def gated_job(name):
+        async def job():
+            log.append(("start", name))
+            async with scheduler.parked():
+                await approval.wait()
+            log.append(("end", name))
+        return job
+
+    for i in range(4):
+        await scheduler.submit(gated_job(f"gated{i}"), subject_id="aria")
+    await wait_until(lambda: scheduler.stats()["parked"] == 4)
+    assert scheduler.stats()["running"] == 0
+
+    fifth = asyncio.Event()
+    await scheduler.submit(make_job(log, "fifth", fifth), subject_id="aria")
+    await wait_until(lambda: ("start", "fifth") in log)
+    assert scheduler.stats()["running"] == 1
+
+    # Approved productions take their slots back (never more than the cap at once)
+    peak = []
+    approval.set()
+    while sum(1 for e, n in log if e == "end" and n.startswith("gated")) < 4:
+        peak.append(scheduler.stats()["running"])
+        await asyncio.sleep(0)
+    assert max(peak) <= 4
+    assert scheduler.stats()["running"] == 1
+    fifth.set()
+    await wait_until(lambda: scheduler.stats()["completed"] == 5)
+    assert scheduler.stats()["parked"] == 0
+    assert scheduler.stats()["running"] == 0
+    await scheduler.shutdown()
+
+@pytest.mark.asyncio
+async def test_parked_outside_a_scheduled_production_is_a_noop():
+    scheduler = ProductionScheduler(max_workers=1, per_muse_limit=1, max_queue=1)
+    async with scheduler.parked():
+        pass
+    assert scheduler.stats()["parked"] == 0
@@ -0,0 +1,63 @@
+"""Tests for the two-level PromptCache."""
+
+import uuid
+import pytest
+import redis
+from unittest.mock import MagicMock
+from app.core.services.prompt_cache import PromptCache, normalize_text, instruction_version
+
+@pytest.fixture
+def prefix(real_redis):
+    prefix = f"test-{uuid.uuid4().hex[:8]}:"
+    yield prefix
+    for key in real_redis.keys(f"{prefix}*"):
+        real_redis.delete(key)
+
+def test_keys_normalize_input_and_scope_model_and_version():
+    cache = PromptCache(None)
+    key = cache.make_key("a  walk\non the beach ", "gemini", "v1")
+    assert key == cache.make_key("a walk on the beach", "gemini", "v1")
+    assert key != cache.make_key("a walk on the beach", "gemini", "v2")
+    assert key != cache.make_key("a walk on the beach", "other", "v1")
+    assert normalize_text(" x\t y ") == "x y"
+    assert instruction_version("a") != instruction_version("b")
+
+def test_l2_is_shared_across_processes(real_redis, prefix):
+    writer = PromptCache(real_redis, ttl_seconds=60, key_prefix=prefix)
+    reader = PromptCache(real_redis, ttl_seconds=60, key_prefix=prefix)
+    writer.add("k", "rewrite-1", max_variants=2)
+    writer.add("k", "rewrite-2", max_variants=2)
+    writer.add("k", "rewrite-3", max_variants=2)
+
+    assert reader.get("k") == ["rewrite-1", "rewrite-2"]
+    assert reader.metrics["l2_hits"] == 1
+    assert reader.get("k") == ["rewrite-1", "rewrite-2"]
+    assert reader.metrics["l1_hits"] == 1
+    assert 0 < real_redis.ttl(f"{prefix}k") <= 60
+
+def test_l2_evicts_least_recently_used_keys(real_redis, prefix):
+    cache = PromptCache(real_redis, max_entries=2, l1_size=0, key_prefix=prefix)
+    cache.add("old", "1")
+    cache.add("recent", "2")
+    cache.get("old")  # Refreshes 'old'
+    cache.add("new", "3")
+
+    assert cache.get("recent") == []
+    assert cache.get("old") == ["1"] and cache.get("new") == ["3"]
+    assert cache.metrics["evictions"] == 1
+
+def test_l1_is_bounded():
+    cache = PromptCache(None, l1_size=2)
+    for key in ("a", "b", "c"):
+        cache.add(key, key)
+    assert cache.get("a") == []
+    assert cache.get("c") == ["c"]
+
+def test_redis_failures_fall_back_to_l1():
+    client = MagicMock()
+    client.pipeline.return_value.execute.side_effect = redis.ConnectionError("down")
+    cache = PromptCache(client)
+    cache.add("k", "v")
+    assert cache.get("k") == ["v"]
+    cache.clear_local()
+    assert cache.get("k") == []
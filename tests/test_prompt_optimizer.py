@@ -3,10 +3,14 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from app.core.utils.prompt_optimizer import PromptOptimizer
+from app.core.services.prompt_cache import PromptCache
 
 @pytest.fixture
 def mock_genai():
-    with patch("app.core.utils.prompt_optimizer.get_genai_client") as mock_get:
+    with patch("app.core.utils.prompt_optimizer.get_genai_client") as mock_get, \
+         patch("app.core.utils.prompt_optimizer.get_redis_client") as mock_redis:
+        # Empty L2 cache: every test starts cold
+        mock_redis.return_value.pipeline.return_value.execute.return_value = [[], 0]
         mock_client = MagicMock()
         mock_get.return_value = mock_client
         yield mock_client
@@ -30,3 +34,33 @@ def test_initialization(mock_genai):
     """Test initialization."""
     optimizer = PromptOptimizer(model_name="gemini-3-flash-preview")
     assert optimizer.model_name == "gemini-3-flash-preview"
+
+def test_identical_prompts_hit_the_cache(mock_genai):
+    """Test that a repeated (whitespace-insensitive) prompt skips the model call."""
+    mock_genai.models.generate_content.return_value = MagicMock(text="Cinematic beach walk.")
+    optimizer = PromptOptimizer(cache=PromptCache(None))
+    
+    assert optimizer.optimize("She walks on the beach") == "Cinematic beach walk."
+    assert optimizer.optimize("  She walks   on the beach\n") == "Cinematic beach walk."
+    mock_genai.models.generate_content.assert_called_once()
+    assert optimizer.cache.metrics["l1_hits"] == 1
+
+def test_cache_is_scoped_to_the_model(mock_genai):
+    """Test that another model never reuses a rewrite cached for the first one."""
+    mock_genai.models.generate_content.return_value = MagicMock(text="Rewrite.")
+    cache = PromptCache(None)
+    PromptOptimizer(model_name="model-a", cache=cache).optimize("prompt")
+    PromptOptimizer(model_name="model-b", cache=cache).optimize("prompt")
+    assert mock_genai.models.generate_content.call_count == 2
+
+def test_variant_mode_caches_distinct_rewrites(mock_genai):
+    """Test that variants are generated once, deduplicated and then served from cache."""
+    mock_genai.models.generate_content.side_effect = [
+        MagicMock(text="A"), MagicMock(text="A"), MagicMock(text="B"), MagicMock(text="C")
+    ]
+    optimizer = PromptOptimizer(cache=PromptCache(None))
+    
+    assert optimizer.optimize_variants("prompt", 3) == ["A", "B", "C"]
+    assert optimizer.optimize("prompt", variant=1) == "B"
+    assert optimizer.optimize("prompt") == "A"
+    assert mock_genai.models.generate_content.call_count == 4
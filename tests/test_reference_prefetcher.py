@@ -0,0 +1,75 @@
+"""Tests for the ReferencePrefetcher."""
+
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from google.api_core.exceptions import NotFound
+from app.core.schemas.look import LookSelection
+from app.core.schemas.world import SceneLayout
+from app.matrix.reference_prefetcher import ReferencePrefetcher, ReferenceBundle
+
+class FakeAssets:
+    """Assets manager double recording concurrent downloads."""
+
+    def __init__(self, available, delay=0.0):
+        self.available = available
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def download_asset(self, path):
+        with self._lock:
+            self.calls.append(path)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if path not in self.available:
+            raise NotFound(path)
+        return self.available[path]
+
+@pytest.mark.asyncio
+async def test_prefetch_world_is_concurrent_and_bounded():
+    objects = [f"obj{i}" for i in range(6)]
+    available = {f"world/objects/{o}/reference.png": o.encode() for o in objects}
+    assets = FakeAssets(available, delay=0.05)
+    prefetcher = ReferencePrefetcher(assets, assets, max_workers=3)
+
+    layout = SceneLayout(location_id="loc", selected_objects=objects, scene_description="d")
+    bundle = await prefetcher.prefetch_world(layout)
+
+    assert len(bundle.assets) == 6
+    assert bundle.missing == ["world/locations/loc/reference.png"]
+    assert 1 < assets.peak <= 3
+
+@pytest.mark.asyncio
+async def test_missing_optional_paths_are_negatively_cached():
+    assets = FakeAssets({})
+    prefetcher = ReferencePrefetcher(assets, assets)
+    look = LookSelection(item_ids=["jacket"], stylist_note="n", visual_details="d")
+
+    await prefetcher.prefetch_look(look)
+    second = await prefetcher.prefetch_look(look)
+
+    assert assets.calls == ["wardrobe/items/jacket/reference.png"]
+    assert second.covers("wardrobe/items/jacket/reference.png")
+    assert not second.has("wardrobe/items/jacket/reference.png")
+
+@pytest.mark.asyncio
+async def test_missing_identity_reference_raises():
+    assets = FakeAssets({"muses/genesis/face.png": b"face"})
+    prefetcher = ReferencePrefetcher(assets, assets)
+    with pytest.raises(NotFound):
+        await prefetcher.prefetch_identity("genesis")
+
+def test_bundle_merge():
+    a = ReferenceBundle(assets={"a": b"1"}, missing=["x"])
+    b = ReferenceBundle(assets={"b": b"2"}, missing=["x", "y"])
+    merged = a.merge(b)
+    assert merged.images() == [b"1", b"2"]
+    assert merged.missing == ["x", "y"]
+    assert a.assets == {"a": b"1"}
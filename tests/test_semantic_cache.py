@@ -0,0 +1,64 @@
+"""Tests for the per-agent SemanticCache."""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from app.core.services.semantic_cache import SemanticCache, scope_key, get_semantic_cache
+from app.core.schemas.look import LookSelection
+
+VECTORS = {
+    "summer linen look": [1.0, 0.0, 0.0],
+    "summer linen outfit": [0.98, 0.2, 0.0],
+    "winter coat": [0.0, 1.0, 0.0],
+}
+
+def make_cache(**kwargs):
+    return SemanticCache("test", VECTORS.__getitem__, **kwargs)
+
+def test_hits_above_threshold_only():
+    cache = make_cache(threshold=0.95)
+    compute = MagicMock(side_effect=lambda: LookSelection(item_ids=["linen"], stylist_note="n", visual_details="d"))
+    scope = scope_key("model", "wardrobe-v1")
+
+    first = cache.get_or_compute("summer linen look", scope, compute)
+    second = cache.get_or_compute("summer linen outfit", scope, compute)
+    cache.get_or_compute("winter coat", scope, compute)
+
+    assert second == first and second is not first
+    assert compute.call_count == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["entries"] == 2
+
+def test_scope_must_match_exactly():
+    cache = make_cache()
+    compute = MagicMock(return_value={"a": 1})
+    cache.get_or_compute("summer linen look", scope_key("model", "wardrobe-v1"), compute)
+    cache.get_or_compute("summer linen look", scope_key("model", "wardrobe-v2"), compute)
+    assert compute.call_count == 2
+
+def test_entries_expire():
+    cache = make_cache(ttl_seconds=60)
+    compute = MagicMock(return_value={"a": 1})
+    cache.get_or_compute("winter coat", "s", compute)
+    with patch("app.core.services.semantic_cache.time.monotonic", return_value=1e12):
+        cache.get_or_compute("winter coat", "s", compute)
+    assert compute.call_count == 2
+
+def test_oldest_entries_are_evicted():
+    cache = make_cache(max_entries=2)
+    for text in ("summer linen look", "winter coat"):
+        cache.get_or_compute(text, "s", lambda: text)
+    cache.get_or_compute("summer linen look", "other", lambda: "x")
+    assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] == 1
+    assert cache.get_or_compute("summer linen look", "s", lambda: "recomputed") == "recomputed"
+
+def test_rejected_responses_and_embedding_failures_bypass_the_cache():
+    cache = make_cache()
+    compute = MagicMock(return_value={"parse_error": "bad json"})
+    for _ in range(2):
+        cache.get_or_compute("winter coat", "s", compute, should_store=lambda r: "parse_error" not in r)
+    assert compute.call_count == 2
+
+    assert cache.get_or_compute("unknown text", "s", lambda: "direct") == "direct"
+    assert cache.stats()["embed_errors"] == 1
+
+def test_cache_is_opt_in():
+    assert get_semantic_cache("architect") is None
@@ -0,0 +1,34 @@
+"""Tests for the windowed spend counters."""
+
+from unittest.mock import MagicMock
+from app.core.finance.spend_tracker import SpendTracker
+
+NOW = 1_700_000_000.0  # 2023-11-14T22:13:20Z
+
+
+def test_bucket_keys_are_minute_and_utc_day():
+    tracker = SpendTracker(MagicMock())
+    minute_key, day_key = tracker.bucket_keys("w", NOW)
+    assert minute_key == f"smos:finance:spend:w:m:{int(NOW // 60)}"
+    assert day_key == f"smos:finance:spend:w:d:{int(NOW // 86400)}"
+
+
+def test_hourly_window_reads_sixty_minute_buckets_in_one_call():
+    client = MagicMock()
+    client.mget.return_value = [None] * 58 + [b"1.5", b"0.25"]
+    tracker = SpendTracker(client)
+
+    assert tracker.spend_last("w", 3600, now=NOW) == 1.75
+    keys = client.mget.call_args.args[0]
+    assert len(keys) == 60
+    assert keys[-1] == tracker.minute_key("w", int(NOW // 60))
+    assert keys[0] == tracker.minute_key("w", int(NOW // 60) - 59)
+
+
+def test_daily_spend_reads_the_day_bucket():
+    client = MagicMock()
+    client.mget.return_value = [b"12.5"]
+    tracker = SpendTracker(client)
+
+    assert tracker.spend_today("w", now=NOW) == 12.5
+    assert client.mget.call_args.args[0] == [tracker.day_key("w", int(NOW // 86400))]
@@ -51,24 +51,26 @@ def test_wallet_read_write(mock_redis):
     address = "123abc456def"
     
     # Test Update
-    wallet = Wallet(address=address, balance=100.50)
+    wallet = Wallet(address=address, balance=100.50, internal_usd_balance=20.0)
     manager.update_wallet(wallet)
     
-    mock_redis.set.assert_called_once()
-    args = mock_redis.set.call_args
-    assert args[0][0] == f"smos:state:wallet:{address}"
+    mock_redis.mset.assert_called_once()
+    written = mock_redis.mset.call_args[0][0]
+    assert set(written) == {f"smos:state:wallet:{address}", f"smos:state:wallet:{address}:usd"}
+    assert written[f"smos:state:wallet:{address}:usd"] == "20.0"
     
-    # Test Read
-    saved_json = json.loads(args[0][1])
-    mock_redis.get.return_value = json.dumps(saved_json).encode('utf-8')
+    # Test Read (the numeric balance key wins over the document value)
+    saved_json = json.loads(written[f"smos:state:wallet:{address}"])
+    mock_redis.mget.return_value = [json.dumps(saved_json).encode('utf-8'), b"12.25"]
     
     retrieved_wallet = manager.get_wallet(address)
     assert retrieved_wallet.address == address
     assert retrieved_wallet.balance == 100.50
+    assert retrieved_wallet.internal_usd_balance == 12.25
 
 def test_wallet_not_found(mock_redis):
     """Test getting a non-existent wallet."""
-    mock_redis.get.return_value = None
+    mock_redis.mget.return_value = [None, None]
     manager = StateManager()
     wallet = manager.get_wallet("nonexistent")
     assert wallet is None
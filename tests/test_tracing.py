@@ -0,0 +1,98 @@
+"""Tests for the tracing facility (spans, trace files, histograms)."""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import MagicMock
+from app.core.tracing import Tracer, TracedGenAIClient, instrument_redis, trace_context, get_tracer, span
+from app.core.pipeline import StageGraph
+
+def test_spans_nest_and_inherit_trace_attributes(tmp_path):
+    tracer = Tracer(trace_dir=str(tmp_path))
+    tracer.open_trace("p1")
+    with trace_context(production_id="p1", muse_id="genesis"):
+        with tracer.span("stage.render", "stage") as parent:
+            with trace_context(attempt=2), tracer.span("model.generate_images", "model", model="imagen") as child:
+                pass
+
+    assert child.parent_id == parent.span_id
+    assert child.attributes == {"production_id": "p1", "muse_id": "genesis", "attempt": 2, "model": "imagen"}
+
+    path = tracer.export_trace("p1")
+    events = json.loads(open(path).read())["traceEvents"]
+    assert [e["name"] for e in events] == ["stage.render", "model.generate_images"]
+    assert events[0]["ph"] == "X" and events[1]["args"]["parent_id"] == events[0]["args"]["span_id"]
+    # Exported traces are released from memory
+    assert tracer.spans("p1") == []
+
+def test_histograms_aggregate_per_span_name():
+    tracer = Tracer()
+    for _ in range(3):
+        with tracer.span("redis.GET", "redis"):
+            pass
+    with pytest.raises(RuntimeError):
+        with tracer.span("redis.GET", "redis"):
+            raise RuntimeError("down")
+
+    summary = tracer.histograms("redis")["redis:redis.GET"]
+    assert summary["count"] == 4
+    assert summary["errors"] == 1
+    assert summary["p50_ms"] <= summary["p99_ms"]
+    assert sum(summary["buckets_ms"].values()) == 4
+    # Spans without a production id only feed the histograms
+    assert tracer.spans("None") == []
+
+def test_only_open_traces_are_buffered():
+    """Spans tagged with a production id nobody exports (e.g. A2A task ids) never accumulate."""
+    tracer = Tracer()
+    with tracer.span("a2a.transition", "a2a", production_id="task-1"):
+        pass
+    assert tracer.spans("task-1") == []
+    assert tracer.histograms("a2a")["a2a:a2a.transition"]["count"] == 1
+
+    tracer.MAX_OPEN_TRACES = 2
+    for production_id in ("p1", "p2", "p3"):
+        tracer.open_trace(production_id)
+        with tracer.span("stage.x", "stage", production_id=production_id):
+            pass
+    assert tracer.spans("p1") == []
+    assert [len(tracer.spans(p)) for p in ("p2", "p3")] == [1, 1]
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span("stage.x") as s:
+        assert s is None
+    assert tracer.histograms() == {}
+
+@pytest.mark.asyncio
+async def test_stage_spans_cross_thread_boundaries():
+    tracer = get_tracer()
+
+    def blocking(ctx):
+        with span("gcs.download", "gcs"):
+            return 1
+
+    graph = StageGraph().add_stage("blocking", blocking)
+    tracer.open_trace("cross-thread")
+    with trace_context(production_id="cross-thread", muse_id="m1"):
+        await graph.run()
+
+    spans = {s.name: s for s in tracer.spans("cross-thread")}
+    assert spans["gcs.download"].parent_id == spans["stage.blocking"].span_id
+    assert spans["gcs.download"].attributes["muse_id"] == "m1"
+    tracer.export_trace("cross-thread")
+
+def test_client_instrumentation_delegates():
+    redis_client = MagicMock()
+    redis_client.execute_command.return_value = b"v"
+    traced = instrument_redis(redis_client)
+    assert traced.execute_command("GET", "k") == b"v"
+    assert traced.pipeline().execute is not None
+    assert instrument_redis(traced) is traced
+
+    genai = MagicMock()
+    genai.models.generate_content.return_value = "response"
+    client = TracedGenAIClient(genai)
+    assert client.models.generate_content(model="gemini", contents="x") == "response"
+    genai.models.generate_content.assert_called_once_with(model="gemini", contents="x")
+    assert "model:model.generate_content" in get_tracer().histograms("model")
@@ -107,3 +107,29 @@ def test_edit_image(mock_genai, mock_assets_manager):
     assert len(refs) == 2 # Raw + Mask
 
 
+
+def test_generate_image_uses_prefetched_references(mock_genai, mock_assets_manager):
+    """Test that a reference bundle replaces per-call downloads."""
+    from app.matrix.reference_prefetcher import ReferenceBundle
+    mock_response = MagicMock()
+    mock_response.generated_images = [MagicMock(image_bytes=b"output_image")]
+    mock_genai.models.generate_images.return_value = mock_response
+
+    agent = VisualAgent()
+    bundle = ReferenceBundle(
+        assets={"muses/genesis/face.png": b"face", "world/locations/paris_studio/reference.png": b"loc"},
+        missing=["wardrobe/items/neon_jacket/reference.png"]
+    )
+
+    agent.generate_image(
+        prompt="A muse",
+        subject_id="genesis",
+        location_id="paris_studio",
+        item_ids=["neon_jacket"],
+        references=bundle
+    )
+
+    prompt_used = mock_genai.models.generate_images.call_args.kwargs["prompt"]
+    assert "paris_studio" in prompt_used
+    assert "neon_jacket" not in prompt_used
+    mock_assets_manager.return_value.download_asset.assert_not_called()
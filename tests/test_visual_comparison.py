@@ -54,3 +54,43 @@ def test_calculate_pixel_similarity():
     
     score2 = comparator.calculate_pixel_similarity(data, data2)
     assert score2 < 1.0
+
+def test_pixel_similarity_reuses_anchor_features(mock_genai):
+    """Test that the anchor is decoded once across QA checks of different renders."""
+    from PIL import Image
+    import io
+    from app.core.utils.anchor_features import AnchorFeatureCache
+    
+    def png(color, size):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, color=color).save(buffer, format="PNG")
+        return buffer.getvalue()
+    
+    comparator = VisualComparator()
+    comparator.anchor_cache = AnchorFeatureCache()
+    anchor = png("red", (20, 20))
+    
+    assert comparator.calculate_pixel_similarity(png("red", (10, 10)), anchor) == 1.0
+    assert comparator.calculate_pixel_similarity(png((0, 0, 0), (10, 10)), anchor) == 0.0
+    assert comparator.anchor_cache.stats()["misses"] == 1
+
+def test_rank_renders_prepares_the_anchor_once(mock_genai):
+    """Test that vectorized ranking derives the anchor representation once."""
+    from PIL import Image
+    import io
+    from app.core.utils.anchor_features import AnchorFeatureCache
+    
+    def png(color):
+        buffer = io.BytesIO()
+        Image.new("RGB", (32, 32), color=color).save(buffer, format="PNG")
+        return buffer.getvalue()
+    
+    comparator = VisualComparator()
+    comparator.anchor_cache = AnchorFeatureCache()
+    anchor = png("red")
+    with patch.object(comparator.similarity, "prepare", wraps=comparator.similarity.prepare) as m_prepare:
+        scores = comparator.rank_renders([png("red"), png("blue")], anchor)
+        comparator.rank_renders([png("red")], anchor)
+    
+    assert scores[0] == 1.0 and scores[1] < 1.0
+    assert m_prepare.call_count == 4  # 3 renders + the anchor once
@@ -38,3 +38,31 @@ def test_wardrobe_registry():
     context = registry.get_look_context(["neon_jacket"], ["vintage_camera"])
     assert "Neon Mesh Jacket" in context
     assert "Vintage Leica" in context
+
+def _item(item_id, tags, name="Item"):
+    return WardrobeItem(item_id=item_id, name=name, description="d", visual_reference_path="p", tags=tags)
+
+def test_tag_index_follows_re_registration():
+    registry = WardrobeRegistry()
+    registry.register_item(_item("jacket", ["cyberpunk", "active"]))
+    registry.register_item(_item("boots", ["cyberpunk"]))
+
+    assert [i.item_id for i in registry.list_by_tag("cyberpunk")] == ["jacket", "boots"]
+
+    registry.register_item(_item("jacket", ["formal"]))
+    assert [i.item_id for i in registry.list_by_tag("cyberpunk")] == ["boots"]
+    assert [i.item_id for i in registry.list_by_tag("formal")] == ["jacket"]
+    assert registry.list_by_tag("active") == []
+    assert sorted(registry.list_tags()) == ["cyberpunk", "formal"]
+
+def test_contexts_are_memoized_and_invalidated_on_registration():
+    registry = WardrobeRegistry()
+    registry.register_item(_item("jacket", ["cyberpunk"], name="Jacket"))
+
+    catalog = registry.get_wardrobe_context()
+    assert registry.get_wardrobe_context() is catalog
+    assert registry.get_look_context(["jacket"], ["camera"]) == "Outfit: - Jacket: d\nProps: None"
+
+    registry.register_prop(SceneProp(prop_id="camera", name="Camera", description="d", visual_reference_path="p"))
+    assert "- camera: Camera. d" in registry.get_wardrobe_context()
+    assert registry.get_look_context(["jacket"], ["camera"]) == "Outfit: - Jacket: d\nProps: - Camera: d"
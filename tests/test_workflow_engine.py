@@ -1,8 +1,11 @@
 "Tests for the WorkflowEngine and the Critic loop."
 
+import time
+import uuid
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
 from app.core.workflow_engine import WorkflowEngine
+from app.core.pipeline import run_sync
 from app.state.models import Mood, Wallet
 from app.core.schemas.qa import QAReport, QAFailure
 
@@ -24,6 +27,11 @@ def mock_agents():
         
         # Ensure sovereign mode is ON by default to avoid hanging in loops
         m_redis.return_value.get.return_value = b"true"
+        # Batched audits answer like one verify_consistency call per render
+        critic = m_critic.return_value
+        critic.verify_batch = AsyncMock(
+            side_effect=lambda images, reference: [critic.verify_consistency(i, reference) for i in images]
+        )
         
         yield {
             "narrative": m_narrative.return_value,
@@ -67,6 +75,42 @@ def test_workflow_insufficient_budget(mock_agents):
             
     assert not mock_agents["narrative"].generate_content.called
 
+def test_workflow_blocks_when_balance_is_held(mock_agents, enough_budget):
+    """Verifies that an authorized production stops if in-flight holds took the balance."""
+    engine = WorkflowEngine()
+
+    from app.core.schemas.finance import SolvencyCheck
+    mock_agents["cfo"].verify_solvency.return_value = SolvencyCheck(
+        is_authorized=True, projected_balance=100.0, reasoning="OK"
+    )
+
+    with patch.object(engine.ledger_service, "place_hold", return_value=None) as m_hold, \
+         patch.object(engine.ledger_service, "release_hold") as m_release:
+        with pytest.raises(RuntimeError, match="Financial blockade"):
+            run_sync(engine.run_production("test", Mood(), "genesis", task_id="held-1"))
+
+    assert m_hold.call_args.kwargs["hold_id"] == "held-1"
+    m_release.assert_called_once_with("genesis", "held-1")
+    assert not mock_agents["narrative"].generate_content.called
+
+def test_workflow_failure_releases_budget_hold(mock_agents, enough_budget):
+    """Verifies that a production failing after admission releases its hold."""
+    engine = WorkflowEngine()
+
+    from app.core.schemas.finance import SolvencyCheck
+    mock_agents["cfo"].verify_solvency.return_value = SolvencyCheck(
+        is_authorized=True, projected_balance=100.0, reasoning="OK"
+    )
+    mock_agents["narrative"].generate_content.side_effect = RuntimeError("LLM down")
+
+    with patch.object(engine.ledger_service, "place_hold") as m_hold, \
+         patch.object(engine.ledger_service, "release_hold") as m_release:
+        with pytest.raises(RuntimeError, match="LLM down"):
+            run_sync(engine.run_production("test", Mood(), "genesis", task_id="fail-1"))
+
+    m_hold.assert_called_once()
+    m_release.assert_called_once_with("genesis", "fail-1")
+
 def test_workflow_full_swarm_orchestration(mock_agents, enough_budget):
     """Verifies the complete Narrative -> Architect -> Stylist -> Visual -> Critic -> Director flow."""
     engine = WorkflowEngine()
@@ -185,4 +229,539 @@ def test_workflow_max_retries_failure(mock_agents, enough_budget):
     result = engine.produce_video_content("test", mood, "genesis", max_retries=3)
     
     assert result["video_bytes"] == b"video"
-    assert mock_agents["visual"].generate_image.call_count >= 3
\ No newline at end of file
+    assert mock_agents["visual"].generate_image.call_count >= 3
+def test_workflow_prefetches_references_once(mock_agents, enough_budget):
+    """Verifies that references are fetched once and shared by render and every QA attempt."""
+    engine = WorkflowEngine()
+    
+    from app.core.schemas.finance import SolvencyCheck
+    mock_agents["cfo"].verify_solvency.return_value = SolvencyCheck(
+        is_authorized=True, projected_balance=100.0, reasoning="OK"
+    )
+    mock_agents["narrative"].generate_content.return_value = MagicMock(title="T", script="S", caption="C")
+    from app.core.schemas.world import SceneLayout
+    mock_agents["architect"].plan_scene_layout.return_value = SceneLayout(location_id="loc", selected_objects=["obj"], scene_description="d")
+    from app.core.schemas.look import LookSelection
+    mock_agents["stylist"].select_look.return_value = LookSelection(item_ids=["item"], stylist_note="n", visual_details="d")
+    
+    mock_agents["optimizer"].optimize.return_value = "P"
+    mock_agents["world_assets"].download_asset.return_value = b"ref"
+    mock_agents["wardrobe_assets"].download_asset.return_value = b"wardrobe"
+    mock_agents["visual"].generate_image.return_value = b"bad"
+    mock_agents["director"].generate_video.return_value = b"video"
+    mock_agents["eic"].stage_for_review.return_value = "path"
+    mock_agents["critic"].verify_consistency.return_value = QAReport(
+        is_consistent=False, identity_drift_score=0.1, clip_semantic_score=1.0, failures=[], final_decision="REPAIR_REQUIRED"
+    )
+    
+    engine.produce_video_content("test", Mood(valence=0.5), "genesis", max_retries=3)
+    
+    world_paths = [c.args[0] for c in mock_agents["world_assets"].download_asset.call_args_list]
+    assert world_paths.count("muses/genesis/face_master.png") == 1
+    assert "world/objects/obj/reference.png" in world_paths
+    mock_agents["wardrobe_assets"].download_asset.assert_called_once_with("wardrobe/items/item/reference.png")
+    
+    bundle = mock_agents["visual"].generate_image.call_args_list[0].kwargs["references"]
+    assert bundle.get("wardrobe/items/item/reference.png") == b"wardrobe"
+
+def test_best_of_n_shares_upstream_stages(mock_agents, enough_budget):
+    """Verifies that Best-of-N forks only the render/video stages and settles once."""
+    engine = WorkflowEngine()
+    
+    from app.core.schemas.finance import SolvencyCheck
+    mock_agents["cfo"].verify_solvency.return_value = SolvencyCheck(
+        is_authorized=True, projected_balance=100.0, reasoning="OK"
+    )
+    mock_agents["narrative"].generate_content.return_value = MagicMock(title="T", script="S", caption="C")
+    from app.core.schemas.world import SceneLayout
+    mock_agents["architect"].plan_scene_layout.return_value = SceneLayout(location_id="loc", selected_objects=[], scene_description="d")
+    from app.core.schemas.look import LookSelection
+    mock_agents["stylist"].select_look.return_value = LookSelection(item_ids=[], stylist_note="n", visual_details="d")
+    
+    mock_agents["optimizer"].optimize.return_value = "P"
+    mock_agents["world_assets"].download_asset.return_value = b"ref"
+    mock_agents["visual"].generate_image.return_value = b"image"
+    mock_agents["critic"].verify_consistency.return_value = QAReport(
+        is_consistent=True, identity_drift_score=0.9, clip_semantic_score=1.0, failures=[], final_decision="APPROVED"
+    )
+    mock_agents["director"].generate_video.side_effect = [b"v1", b"v2", b"v3"]
+    mock_agents["critic"].score_video_quality.side_effect = lambda video, prompt: {b"v1": 0.5, b"v2": 0.9, b"v3": 0.7}[video]
+    mock_agents["eic"].stage_for_review.return_value = "path"
+    
+    with patch.object(engine.ledger_service, "record_transaction") as m_record:
+        result = engine.produce_best_of_n_video("test", Mood(valence=0.5), "genesis", n=3)
+    
+    assert result["video_bytes"] == b"v2"
+    assert result["quality_score"] == 0.9
+    assert sorted(result["candidate_scores"]) == [0.5, 0.7, 0.9]
+    
+    mock_agents["cfo"].verify_solvency.assert_called_once()
+    assert mock_agents["cfo"].verify_solvency.call_args.args[2] == pytest.approx(engine._estimate_production_cost(3))
+    mock_agents["narrative"].generate_content.assert_called_once()
+    mock_agents["optimizer"].optimize.assert_called_once()
+    assert mock_agents["visual"].generate_image.call_count == 3
+    assert mock_agents["director"].generate_video.call_count == 3
+    m_record.assert_called_once()
+    assert m_record.call_args.kwargs["amount"] == pytest.approx(result["production_cost"])
+    mock_agents["eic"].stage_for_review.assert_called_once()
+
+def test_best_of_n_charges_failed_branches(mock_agents, enough_budget):
+    """Verifies that a branch failing at the video stage is still charged."""
+    engine = WorkflowEngine()
+    _stub_upstream(mock_agents, b"image")
+    mock_agents["critic"].verify_consistency.return_value = QAReport(
+        is_consistent=True, identity_drift_score=0.9, clip_semantic_score=1.0, failures=[], final_decision="APPROVED"
+    )
+    mock_agents["director"].generate_video.side_effect = [b"v1", RuntimeError("Veo timeout"), b"v3"]
+    mock_agents["critic"].score_video_quality.return_value = 0.8
+
+    with patch.object(engine.ledger_service, "record_transaction") as m_record:
+        result = engine.produce_best_of_n_video("test", Mood(valence=0.5), "genesis", n=3)
+
+    assert len(result["candidate_scores"]) == 2
+    assert result["production_cost"] == pytest.approx(engine._estimate_production_cost(3))
+    assert m_record.call_args.kwargs["amount"] == pytest.approx(engine._estimate_production_cost(3))
+
+def test_best_of_n_audits_all_renders_in_one_batch(mock_agents, enough_budget):
+    """Verifies that Best-of-N branches start from one batched Critic audit."""
+    from app.core.utils.perceptual_hash import RenderHashIndex
+    engine = WorkflowEngine()
+    engine.render_index = RenderHashIndex()
+    _stub_upstream(mock_agents, b"image")
+    mock_agents["visual"].generate_image.side_effect = [b"r1", b"r2", b"r3"]
+    approved = QAReport(is_consistent=True, identity_drift_score=0.9, clip_semantic_score=1.0, failures=[], final_decision="APPROVED")
+    mock_agents["critic"].verify_batch = AsyncMock(return_value=[approved] * 3)
+    mock_agents["critic"].score_video_quality.return_value = 0.8
+
+    engine.produce_best_of_n_video("test", Mood(valence=0.5), "genesis", n=3)
+
+    mock_agents["critic"].verify_batch.assert_awaited_once()
+    assert sorted(mock_agents["critic"].verify_batch.call_args.args[0]) == [b"r1", b"r2", b"r3"]
+    mock_agents["critic"].verify_consistency.assert_not_called()
+    assert mock_agents["director"].generate_video.call_count == 3
+
+def test_tournament_promotes_only_top_k_to_video(mock_agents, enough_budget):
+    """Verifies that the tournament renders N keyframes but only k videos."""
+    engine = WorkflowEngine()
+
+    from app.core.schemas.finance import SolvencyCheck
+    mock_agents["cfo"].allocate_tournament.return_value = (5, 2)
+    mock_agents["cfo"].verify_solvency.return_value = SolvencyCheck(
+        is_authorized=True, projected_balance=100.0, reasoning="OK"
+    )
+    mock_agents["narrative"].generate_content.return_value = MagicMock(title="T", script="S", caption="C")
+    from app.core.schemas.world import SceneLayout
+    mock_agents["architect"].plan_scene_layout.return_value = SceneLayout(location_id="loc", selected_objects=[], scene_description="d")
+    from app.core.schemas.look import LookSelection
+    mock_agents["stylist"].select_look.return_value = LookSelection(item_ids=[], stylist_note="n", visual_details="d")
+
+    mock_agents["optimizer"].optimize.return_value = "P"
+    mock_agents["world_assets"].download_asset.return_value = b"ref"
+    mock_agents["visual"].generate_image.side_effect = [b"k1", b"k2", b"k3", b"k4", b"k5"]
+    identity = {b"k1": 0.2, b"k2": 0.95, b"k3": 0.9, b"k4": 0.3, b"k5": 0.85}
+    mock_agents["critic"].score_identity_batch.side_effect = lambda images, face: [identity[i] for i in images]
+    mock_agents["critic"].detect_physical_artifacts_batch.side_effect = lambda images: [[] for _ in images]
+    mock_agents["critic"].verify_consistency.return_value = QAReport(
+        is_consistent=True, identity_drift_score=0.9, clip_semantic_score=1.0, failures=[], final_decision="APPROVED"
+    )
+    mock_agents["director"].generate_video.side_effect = lambda prompt, image_bytes=None, **kw: b"video-" + image_bytes
+    mock_agents["critic"].score_video_quality.side_effect = lambda video, prompt: {b"video-k2": 0.6, b"video-k3": 0.8}[video]
+    mock_agents["eic"].stage_for_review.return_value = "path"
+
+    with patch.object(engine.ledger_service, "record_transaction") as m_record:
+        result = engine.produce_tournament_video("test", Mood(valence=0.5), "genesis", vvs_score=85.0)
+
+    assert mock_agents["visual"].generate_image.call_count == 5
+    assert mock_agents["director"].generate_video.call_count == 2
+    assert result["video_bytes"] == b"video-k3"
+    assert result["tournament"] == {"keyframes": 5, "promoted": 2}
+    mock_agents["critic"].verify_batch.assert_awaited_once()
+    assert sorted(mock_agents["critic"].verify_batch.call_args.args[0]) == [b"k2", b"k3"]
+    assert mock_agents["cfo"].verify_solvency.call_args.args[2] == pytest.approx(
+        engine._estimate_production_cost(2, keyframes=5)
+    )
+    m_record.assert_called_once()
+    assert m_record.call_args.kwargs["amount"] == pytest.approx(engine._estimate_production_cost(2, keyframes=5))
+
+def test_resume_production_skips_checkpointed_stages(mock_agents, enough_budget, real_redis, tmp_path):
+    """Verifies that a production failing at the video stage resumes without re-paying upstream stages."""
+    from app.agents.narrative_agent import ScriptOutput, AttentionDynamics
+    from app.core.services.checkpoint_store import CheckpointStore
+    engine = WorkflowEngine()
+    engine.checkpoints = CheckpointStore(
+        real_redis, ttl_seconds=60, models=WorkflowEngine.CHECKPOINT_MODELS, blob_dir=str(tmp_path), max_inline_bytes=4
+    )
+    
+    from app.core.schemas.finance import SolvencyCheck
+    mock_agents["cfo"].verify_solvency.return_value = SolvencyCheck(
+        is_authorized=True, projected_balance=100.0, reasoning="OK"
+    )
+    mock_agents["narrative"].generate_content.return_value = ScriptOutput(
+        title="T", script="S", caption="C", estimated_duration=10,
+        attention_dynamics=AttentionDynamics(hook_intensity=0.5, pattern_interrupts=[], tempo_curve=[])
+    )
+    from app.core.schemas.world import SceneLayout
+    mock_agents["architect"].plan_scene_layout.return_value = SceneLayout(location_id="loc", selected_objects=[], scene_description="d")
+    from app.core.schemas.look import LookSelection
+    mock_agents["stylist"].select_look.return_value = LookSelection(item_ids=[], stylist_note="n", visual_details="d")
+    
+    mock_agents["optimizer"].optimize.return_value = "P"
+    mock_agents["world_assets"].download_asset.return_value = b"ref"
+    mock_agents["visual"].generate_image.return_value = b"image"
+    mock_agents["critic"].verify_consistency.return_value = QAReport(
+        is_consistent=True, identity_drift_score=0.9, clip_semantic_score=1.0, failures=[], final_decision="APPROVED"
+    )
+    mock_agents["director"].generate_video.side_effect = [RuntimeError("Pod preempted"), b"video"]
+    mock_agents["eic"].stage_for_review.return_value = "path"
+    
+    production_id = f"test-{uuid.uuid4().hex[:8]}"
+    with pytest.raises(RuntimeError, match="Pod preempted"):
+        run_sync(engine.run_production("test", Mood(valence=0.5), "genesis", task_id=production_id))
+    assert "render" in engine.checkpoints.completed_stages(production_id)
+    # Renders are checkpointed by reference, not inline in Redis
+    assert b"image" not in real_redis.hget(f"smos:checkpoint:{production_id}", "render")
+    assert "solvency" not in engine.checkpoints.completed_stages(production_id)
+    
+    result = engine.resume_video_content(production_id)
+    
+    assert result["video_bytes"] == b"video"
+    assert result["poster_image_bytes"] == b"image"
+    # Solvency is re-checked against the refreshed wallet
+    assert mock_agents["cfo"].verify_solvency.call_count == 2
+    assert result["production_id"] == production_id
+    mock_agents["narrative"].generate_content.assert_called_once()
+    mock_agents["optimizer"].optimize.assert_called_once()
+    mock_agents["visual"].generate_image.assert_called_once()
+    assert mock_agents["director"].generate_video.call_count == 2
+    # A finished production leaves no checkpoint behind
+    assert engine.checkpoints.load(production_id) is None
+    
+    with pytest.raises(ValueError, match="No checkpoint"):
+        engine.resume_video_content(production_id)
+
+def test_resume_after_settlement_leaves_no_hold(mock_agents, enough_budget, real_redis):
+    """Verifies that resuming a production whose cost was settled (only staging failed) holds nothing."""
+    from app.agents.narrative_agent import ScriptOutput, AttentionDynamics
+    from app.core.services.checkpoint_store import CheckpointStore
+    from app.core.services.ledger_service import LedgerService
+    from app.state.db_access import StateManager
+    engine = WorkflowEngine()
+    engine.checkpoints = CheckpointStore(real_redis, ttl_seconds=60, models=WorkflowEngine.CHECKPOINT_MODELS)
+    with patch("app.core.services.ledger_service.get_redis_client", return_value=real_redis):
+        engine.ledger_service = LedgerService()
+    subject_id = f"resume-{uuid.uuid4().hex[:8]}"
+    StateManager().update_wallet(Wallet(address=subject_id, internal_usd_balance=1000.0))
+
+    from app.core.schemas.finance import SolvencyCheck
+    mock_agents["cfo"].verify_solvency.return_value = SolvencyCheck(
+        is_authorized=True, projected_balance=100.0, reasoning="OK"
+    )
+    mock_agents["narrative"].generate_content.return_value = ScriptOutput(
+        title="T", script="S", caption="C", estimated_duration=10,
+        attention_dynamics=AttentionDynamics(hook_intensity=0.5, pattern_interrupts=[], tempo_curve=[])
+    )
+    from app.core.schemas.world import SceneLayout
+    mock_agents["architect"].plan_scene_layout.return_value = SceneLayout(location_id="loc", selected_objects=[], scene_description="d")
+    from app.core.schemas.look import LookSelection
+    mock_agents["stylist"].select_look.return_value = LookSelection(item_ids=[], stylist_note="n", visual_details="d")
+    mock_agents["optimizer"].optimize.return_value = "P"
+    mock_agents["world_assets"].download_asset.return_value = b"ref"
+    mock_agents["visual"].generate_image.return_value = b"image"
+    mock_agents["critic"].verify_consistency.return_value = QAReport(
+        is_consistent=True, identity_drift_score=0.9, clip_semantic_score=1.0, failures=[], final_decision="APPROVED"
+    )
+    mock_agents["director"].generate_video.return_value = b"video"
+    staging_calls = []
+
+    def stage_for_review(production, subject):
+        staging_calls.append(subject)
+        if len(staging_calls) == 1:
+            # Fail staging only once the cost is settled and checkpointed
+            deadline = time.monotonic() + 2
+            while "cost_tracking" not in engine.checkpoints.completed_stages(production_id) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            raise RuntimeError("GCS unavailable")
+        return "path"
+    mock_agents["eic"].stage_for_review.side_effect = stage_for_review
+
+    production_id = f"test-{uuid.uuid4().hex[:8]}"
+    try:
+        with pytest.raises(RuntimeError, match="GCS unavailable"):
+            run_sync(engine.run_production("test", Mood(), subject_id, task_id=production_id))
+        assert "cost_tracking" in engine.checkpoints.completed_stages(production_id)
+
+        with patch.object(engine.ledger_service, "place_hold", wraps=engine.ledger_service.place_hold) as m_hold:
+            result = engine.resume_video_content(production_id)
+
+        assert result["review_path"] == "path"
+        m_hold.assert_not_called()
+        mock_agents["cfo"].verify_solvency.assert_called_once()
+        assert engine.ledger_service.get_held_amount(subject_id) == 0.0
+        # Settled exactly once
+        assert real_redis.llen(f"smos:finance:history:{subject_id}") == 1
+    finally:
+        real_redis.delete(f"smos:state:wallet:{subject_id}", f"smos:state:wallet:{subject_id}:usd",
+                          f"smos:finance:history:{subject_id}", f"smos:finance:holds:{subject_id}",
+                          f"smos:finance:holds:{subject_id}:expiry")
+        engine.checkpoints.discard(production_id)
+
+def test_render_via_comfy_binds_compiled_template(mock_agents):
+    """Verifies that Comfy renders bind typed values into the compiled template."""
+    engine = WorkflowEngine()
+    with patch.object(engine.comfy_client, "queue_prompt", return_value="p1") as m_queue, \
+         patch.object(engine.comfy_client, "get_output_data", return_value=b"img"):
+        assert engine._render_via_comfy('Muse "in" {Paris}', [], Mood(arousal=0.5)) == b"img"
+    
+    workflow = m_queue.call_args.args[0]
+    assert workflow["6"]["inputs"]["text"] == 'Muse "in" {Paris}'
+    assert workflow["10"]["inputs"]["strength"] == pytest.approx(0.65)
+    assert workflow["10"]["inputs"]["blur"] == pytest.approx(5.0)
+
+def test_production_exports_a_trace(mock_agents, enough_budget, tmp_path):
+    """Verifies that a production writes a JSON trace of its stages tagged with production, muse and attempt."""
+    import json
+    from app.core.tracing import get_tracer
+    engine = WorkflowEngine()
+    
+    from app.core.schemas.finance import SolvencyCheck
+    mock_agents["cfo"].verify_solvency.return_value = SolvencyCheck(
+        is_authorized=True, projected_balance=100.0, reasoning="OK"
+    )
+    mock_agents["narrative"].generate_content.return_value = MagicMock(title="T", script="S", caption="C")
+    from app.core.schemas.world import SceneLayout
+    mock_agents["architect"].plan_scene_layout.return_value = SceneLayout(location_id="loc", selected_objects=[], scene_description="d")
+    from app.core.schemas.look import LookSelection
+    mock_agents["stylist"].select_look.return_value = LookSelection(item_ids=[], stylist_note="n", visual_details="d")
+    mock_agents["optimizer"].optimize.return_value = "P"
+    mock_agents["world_assets"].download_asset.return_value = b"ref"
+    mock_agents["visual"].generate_image.return_value = b"image"
+    mock_agents["critic"].verify_consistency.return_value = QAReport(
+        is_consistent=True, identity_drift_score=0.9, clip_semantic_score=1.0, failures=[], final_decision="APPROVED"
+    )
+    mock_agents["director"].generate_video.return_value = b"video"
+    mock_agents["eic"].stage_for_review.return_value = "path"
+    
+    with patch.object(get_tracer(), "trace_dir", str(tmp_path)):
+        run_sync(engine.run_production("test", Mood(valence=0.5), "genesis", task_id="traced-1"))
+    
+    events = json.loads((tmp_path / "traced-1.trace.json").read_text())["traceEvents"]
+    names = {e["name"] for e in events}
+    assert {"stage.narrative", "stage.render", "stage.video", "visual_qa.attempt"} <= names
+    assert all(e["args"]["production_id"] == "traced-1" and e["args"]["muse_id"] == "genesis" for e in events)
+    assert next(e for e in events if e["name"] == "visual_qa.attempt")["args"]["attempt"] == 1
+
+@pytest.mark.asyncio
+async def test_async_production_goes_through_the_scheduler(mock_agents):
+    """Verifies that background productions are queued on the global scheduler."""
+    engine = WorkflowEngine()
+    with patch.object(engine.scheduler, "submit", new_callable=AsyncMock) as m_submit:
+        task_id = await engine.produce_video_content_async("test", Mood(), "genesis", priority=72.0)
+    
+    assert m_submit.call_args.kwargs["task_id"] == task_id
+    assert m_submit.call_args.kwargs["subject_id"] == "genesis"
+    assert m_submit.call_args.kwargs["priority"] == 72.0
+
+def test_production_reports_progress_to_the_registry(mock_agents, enough_budget):
+    """Verifies that stage progress, estimated spend and final artifacts reach the production registry."""
+    engine = WorkflowEngine()
+    engine.production_registry = MagicMock()
+    
+    from app.core.schemas.finance import SolvencyCheck
+    mock_agents["cfo"].verify_solvency.return_value = SolvencyCheck(
+        is_authorized=True, projected_balance=100.0, reasoning="OK"
+    )
+    mock_agents["narrative"].generate_content.return_value = MagicMock(title="T", script="S", caption="C")
+    from app.core.schemas.world import SceneLayout
+    mock_agents["architect"].plan_scene_layout.return_value = SceneLayout(location_id="loc", selected_objects=[], scene_description="d")
+    from app.core.schemas.look import LookSelection
+    mock_agents["stylist"].select_look.return_value = LookSelection(item_ids=[], stylist_note="n", visual_details="d")
+    mock_agents["optimizer"].optimize.return_value = "P"
+    mock_agents["world_assets"].download_asset.return_value = b"ref"
+    mock_agents["visual"].generate_image.return_value = b"image"
+    mock_agents["critic"].verify_consistency.return_value = QAReport(
+        is_consistent=True, identity_drift_score=0.9, clip_semantic_score=1.0, failures=[], final_decision="APPROVED"
+    )
+    mock_agents["director"].generate_video.return_value = b"video"
+    mock_agents["eic"].stage_for_review.return_value = "path"
+    
+    run_sync(engine.run_production("test", Mood(valence=0.5), "genesis", task_id="tracked-1"))
+    
+    registry = engine.production_registry
+    registry.mark_running.assert_called_once_with("tracked-1", "genesis", "test")
+    started = {c.args[1] for c in registry.stage_started.call_args_list}
+    assert {"narrative", "render", "video", "staging"} <= started
+    spend = {c.args[1]: c.args[2] for c in registry.stage_completed.call_args_list}
+    assert spend["render"] > 0 and spend["video"] > 0 and spend["narrative"] == 0
+    artifacts = registry.complete.call_args.args[1]
+    assert artifacts["review_path"] == "path" and artifacts["title"] == "T"
+    registry.fail.assert_not_called()
+
+def _stub_upstream(mock_agents, render: bytes):
+    """Upstream agents of a production whose render fails QA without inpaint hints."""
+    from app.core.schemas.finance import SolvencyCheck
+    from app.core.schemas.world import SceneLayout
+    from app.core.schemas.look import LookSelection
+    mock_agents["cfo"].verify_solvency.return_value = SolvencyCheck(
+        is_authorized=True, projected_balance=100.0, reasoning="OK"
+    )
+    mock_agents["narrative"].generate_content.return_value = MagicMock(title="T", script="S", caption="C")
+    mock_agents["architect"].plan_scene_layout.return_value = SceneLayout(location_id="loc", selected_objects=[], scene_description="d")
+    mock_agents["stylist"].select_look.return_value = LookSelection(item_ids=[], prop_ids=[], stylist_note="n", visual_details="d")
+    mock_agents["optimizer"].optimize.return_value = "P"
+    mock_agents["world_assets"].download_asset.return_value = b"ref"
+    mock_agents["director"].generate_video.return_value = b"video"
+    mock_agents["eic"].stage_for_review.return_value = "path"
+    mock_agents["visual"].generate_image.return_value = render
+    mock_agents["critic"].verify_consistency.return_value = QAReport(
+        is_consistent=False, identity_drift_score=0.1, clip_semantic_score=1.0, failures=[], final_decision="REPAIR_REQUIRED"
+    )
+
+
+def _png(image) -> bytes:
+    import io
+    buf = io.BytesIO()
+    image.convert("RGB").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_visual_qa_reuses_verdict_of_near_duplicate_render(mock_agents, enough_budget):
+    """A regenerated render that is a near-duplicate of a judged one skips the Critic."""
+    from PIL import Image
+    from app.core.utils.perceptual_hash import RenderHashIndex
+
+    engine = WorkflowEngine()
+    engine.render_index = RenderHashIndex()
+    _stub_upstream(mock_agents, _png(Image.radial_gradient("L")))
+
+    result = engine.produce_video_content("test", Mood(valence=0.5), "genesis", max_retries=3)
+
+    assert result["video_bytes"] == b"video"
+    mock_agents["critic"].verify_consistency.assert_called_once()
+    assert mock_agents["visual"].generate_image.call_count >= 3
+
+
+def test_visual_qa_rechecks_a_repaired_near_duplicate(mock_agents, enough_budget):
+    """A repair that stays within the duplicate radius of its source still gets its own verdict."""
+    import numpy as np
+    from PIL import Image
+    from app.core.utils.perceptual_hash import RenderHashIndex, hamming, phash
+
+    engine = WorkflowEngine()
+    engine.render_index = RenderHashIndex()
+    pixels = np.asarray(Image.radial_gradient("L").convert("RGB")).copy()
+    original = _png(Image.fromarray(pixels))
+    pixels[120:128, 120:128] = 0
+    repaired = _png(Image.fromarray(pixels))
+    assert 0 < hamming(phash(original), phash(repaired)) <= engine.render_index.radius
+
+    _stub_upstream(mock_agents, original)
+    repair = QAReport(
+        is_consistent=False, identity_drift_score=0.5, clip_semantic_score=1.0, final_decision="REPAIR_REQUIRED",
+        failures=[QAFailure(area="face", description="drift", severity=0.5, action_type="inpaint")]
+    )
+    approved = QAReport(is_consistent=True, identity_drift_score=0.99, clip_semantic_score=1.0, failures=[], final_decision="APPROVED")
+    mock_agents["critic"].verify_consistency.side_effect = [repair, approved]
+    mock_agents["critic"].detect_mask_area.return_value = [450, 450, 550, 550]
+    mock_agents["visual"].edit_image.return_value = repaired
+
+    result = engine.produce_video_content("test", Mood(valence=0.5), "genesis", max_retries=3)
+
+    assert result["poster_image_bytes"] == repaired
+    assert mock_agents["critic"].verify_consistency.call_count == 2
+    mock_agents["visual"].edit_image.assert_called_once()
+
+
+def test_visual_qa_compares_against_best_matching_anchor(mock_agents, enough_budget):
+    """Identity QA uses the registered anchor closest to the render, not the master face."""
+    from PIL import Image
+    from app.matrix.anchor_index import AnchorVectorIndex
+    from app.matrix.models import IdentityAnchor
+    from app.core.utils.perceptual_hash import RenderHashIndex
+
+    engine = WorkflowEngine()
+    engine.render_index = RenderHashIndex()
+    engine.anchor_index = AnchorVectorIndex()
+    front, side = _png(Image.linear_gradient("L")), _png(Image.radial_gradient("L"))
+    for anchor_id, image in (("front", front), ("side", side)):
+        engine.anchor_index.add(IdentityAnchor(
+            anchor_id=anchor_id, muse_id="genesis", asset_path=f"muses/genesis/anchors/{anchor_id}.png", asset_type="face_front"
+        ), image)
+    _stub_upstream(mock_agents, side)
+    mock_agents["world_assets"].download_asset.side_effect = lambda path: side if path.endswith("side.png") else b"ref"
+
+    engine.produce_video_content("test", Mood(valence=0.5), "genesis", max_retries=1)
+
+    assert mock_agents["critic"].verify_consistency.call_args.args == (side, side)
+
+
+def _two_area_repair(mock_agents):
+    from PIL import Image
+    _stub_upstream(mock_agents, _png(Image.new("RGB", (100, 100))))
+    failures = [
+        QAFailure(area="face", description="drift", severity=0.8, action_type="inpaint"),
+        QAFailure(area="hands", description="six fingers", severity=0.6, action_type="inpaint"),
+    ]
+    repair = QAReport(is_consistent=False, identity_drift_score=0.5, clip_semantic_score=1.0, failures=failures, final_decision="REPAIR_REQUIRED")
+    approved = QAReport(is_consistent=True, identity_drift_score=0.99, clip_semantic_score=1.0, failures=[], final_decision="APPROVED")
+    mock_agents["critic"].detect_mask_areas.return_value = [[0, 0, 500, 500], [500, 500, 1000, 1000]]
+    return repair, approved
+
+
+def test_multi_area_repair_uses_one_detection_and_one_edit(mock_agents, enough_budget):
+    """All failure areas are inpainted through one combined mask."""
+    import io
+    import numpy as np
+    from PIL import Image
+    from app.core.utils.perceptual_hash import RenderHashIndex
+
+    engine = WorkflowEngine()
+    engine.render_index = RenderHashIndex()
+    repair, approved = _two_area_repair(mock_agents)
+    mock_agents["critic"].verify_consistency.side_effect = [repair, approved]
+    mock_agents["visual"].edit_image.return_value = b"repaired"
+
+    result = engine.produce_video_content("test", Mood(valence=0.5), "genesis", max_retries=3)
+
+    assert result["poster_image_bytes"] == b"repaired"
+    mock_agents["critic"].detect_mask_areas.assert_called_once()
+    mock_agents["critic"].detect_mask_area.assert_not_called()
+    mock_agents["visual"].edit_image.assert_called_once()
+    mask = np.asarray(Image.open(io.BytesIO(mock_agents["visual"].edit_image.call_args.kwargs["mask_image_bytes"])))
+    assert mask[25, 25] == 255 and mask[75, 75] == 255 and mask[25, 75] == 0
+
+
+def test_failed_merged_repair_falls_back_to_per_area_edits(mock_agents, enough_budget):
+    """When the merged edit fails QA, each area is patched on its own, from the pre-merge image."""
+    from app.core.utils.perceptual_hash import RenderHashIndex
+
+    engine = WorkflowEngine()
+    engine.render_index = RenderHashIndex()
+    repair, approved = _two_area_repair(mock_agents)
+    original = mock_agents["visual"].generate_image.return_value
+    mock_agents["critic"].verify_consistency.side_effect = [repair, repair, approved]
+    mock_agents["visual"].edit_image.side_effect = [b"merged", b"face_fixed", b"both_fixed"]
+
+    result = engine.produce_video_content("test", Mood(valence=0.5), "genesis", max_retries=3)
+
+    assert result["poster_image_bytes"] == b"both_fixed"
+    bases = [c.kwargs["base_image_bytes"] for c in mock_agents["visual"].edit_image.call_args_list]
+    assert bases == [original, original, b"face_fixed"]
+    mock_agents["critic"].detect_mask_areas.assert_called_once()
+
+
+def test_rejected_merged_repair_raises(mock_agents, enough_budget):
+    """A REJECTED verdict after a merged edit is an identity failure, not a cue to repair area by area."""
+    from app.core.utils.perceptual_hash import RenderHashIndex
+
+    engine = WorkflowEngine()
+    engine.render_index = RenderHashIndex()
+    repair, _ = _two_area_repair(mock_agents)
+    rejected = QAReport(is_consistent=False, identity_drift_score=0.2, clip_semantic_score=1.0, failures=[], final_decision="REJECTED")
+    mock_agents["critic"].verify_consistency.side_effect = [repair, rejected]
+    mock_agents["visual"].edit_image.return_value = b"merged"
+
+    with pytest.raises(RuntimeError, match="Identity Failure"):
+        engine.produce_video_content("test", Mood(valence=0.5), "genesis", max_retries=3)
+
+    mock_agents["visual"].edit_image.assert_called_once()
+    mock_agents["director"].generate_video.assert_not_called()
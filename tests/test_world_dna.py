@@ -42,3 +42,40 @@ def test_invalid_location_retrieval():
     registry = WorldRegistry()
     assert registry.get_location("none") is None
     assert registry.get_location_context("none") == ""
+
+def _object(object_id, name):
+    return WorldObject(object_id=object_id, name=name, description="d", visual_reference_path="p", properties={})
+
+def _location(location_id, objects):
+    return WorldLocation(
+        location_id=location_id, name=location_id, description="d", visual_reference_path="p",
+        recurring_objects=objects, lighting_setup="l"
+    )
+
+def test_location_object_adjacency():
+    registry = WorldRegistry()
+    registry.register_object(_object("sofa", "Sofa"))
+    registry.register_location(_location("studio", ["sofa", "lamp"]))
+    registry.register_location(_location("loft", ["sofa"]))
+
+    assert [o.object_id for o in registry.get_location_objects("studio")] == ["sofa"]
+    assert [l.location_id for l in registry.get_object_locations("sofa")] == ["loft", "studio"]
+
+    registry.register_location(_location("loft", []))
+    assert [l.location_id for l in registry.get_object_locations("sofa")] == ["studio"]
+
+def test_contexts_are_memoized_and_invalidated_on_registration():
+    registry = WorldRegistry()
+    registry.register_location(_location("studio", ["lamp"]))
+    registry.register_location(_location("loft", []))
+
+    world = registry.get_world_context()
+    assert registry.get_world_context() is world
+    assert "Lamp" not in registry.get_location_context("studio")
+
+    # The lamp shows up once registered, in both the location and world contexts
+    registry.register_object(_object("lamp", "Lamp"))
+    assert "- Lamp: d" in registry.get_location_context("studio")
+    assert registry.get_world_context() == "\n\n".join(
+        registry.get_location_context(loc_id) for loc_id in ("studio", "loft")
+    )